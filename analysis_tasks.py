@@ -0,0 +1,211 @@
+"""
+분석 페이지(pages/Analyze.py)의 백엔드 호출 세 가지를 동시에 실행하는 오케스트레이터.
+
+    ml           고객 특성 기반 예측 (그리드 조회 → 없으면 모델 예측, 모델 워밍업 대기 포함)
+                 INFERENCE_BATCHING=1 이면 모델 예측은 inference_batcher 로 다른 세션 요청과 묶어서 실행
+    store_score  위치 기반 백화점 선호도 점수 (affinity 배열 조회 → 없으면 get_store_score)
+    spending     거주지 평균 소비력 (그리드 조회 → 없으면 get_estimated_spending)
+
+호출마다 제한 시간이 있고, 끝나는 순서대로 on_result 콜백으로 결과를 넘기므로
+화면은 먼저 끝난 섹션부터 그릴 수 있습니다. 제한 시간을 넘긴 호출은 "timeout" 결과로 처리되고
+작업 자체는 백그라운드에서 끝까지 실행되어 조회 캐시를 채웁니다 (다음 요청은 캐시 적중).
+작업 스레드에는 Streamlit 컨텍스트가 없으므로 화면 출력은 on_result 를 부른 스레드(스크립트 스레드)에서만 합니다.
+"""
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from inference_batcher import BATCHING_ENABLED, get_batcher
+from tracing import span
+
+# 호출별 제한 시간(초). ml 은 모델 워밍업 대기 시간을 포함
+CALL_TIMEOUTS = {
+    "ml": float(os.getenv("ANALYZE_TIMEOUT_ML", "20")),
+    "store_score": float(os.getenv("ANALYZE_TIMEOUT_STORE_SCORE", "15")),
+    "spending": float(os.getenv("ANALYZE_TIMEOUT_SPENDING", "15")),
+}
+
+# 여러 세션이 동시에 분석을 요청해도 스레드 수가 늘지 않도록 프로세스 공유 풀 사용
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv("ANALYZE_WORKERS", "8")), thread_name_prefix="analyze")
+
+# 원천 테이블 버전을 확인해 바뀐 섹션(그리드 지출, affinity)을 다시 계산하는 간격(초). 0 이면 확인하지 않음
+VERSION_CHECK_SECONDS = float(os.getenv("GRID_VERSION_CHECK_SECONDS", "300"))
+
+_refresh_lock = threading.Lock()
+_refresh_future = None
+_versions_checked_at = None
+
+
+class CallResult:
+    def __init__(self, name, status, value=None, error=None, seconds=0.0):
+        self.name = name
+        self.status = status # ok / timeout / error
+        self.value = value
+        self.error = error
+        self.seconds = seconds
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+def _grid_is_stale(grid, predictor) -> bool:
+    from segment_options import dong_options
+
+    return (predictor is not None and not grid.has_section("model", predictor.data_fingerprint)) \
+        or not grid.has_section("estimated_spending") or grid.dongs != dong_options()
+
+
+def _refresh_precomputed(predictor, check_versions: bool = False):
+    from prediction_grid import SECTION_SOURCES, refresh_grid
+    from snowflake_data_setting.query_cache import query_cache, source_table_versions
+    from snowflake_data_setting.snowpark_queries import get_table_versions
+    from store_affinity import AFFINITY_TABLES, RATIO_TABLE, get_affinity, refresh_affinity
+
+    if not check_versions:
+        if get_affinity() is None:
+            refresh_affinity()
+        refresh_grid(predictor)
+        return
+
+    # 다시 계산할 섹션이 조회 캐시의 이전 결과로 채워지지 않도록 캐시의 테이블 버전부터 맞춤
+    query_cache.check_table_versions(source_table_versions, force=True)
+    # 버전 조회에 실패하면({}) 있는 결과를 그대로 두고 빠진 것만 채움
+    affinity_versions = get_table_versions(AFFINITY_TABLES + (RATIO_TABLE,))
+    if affinity_versions or get_affinity() is None:
+        refresh_affinity(affinity_versions or None)
+    grid_versions = get_table_versions([t for sources in SECTION_SOURCES.values() for t in sources])
+    refresh_grid(predictor, table_versions=grid_versions or None)
+
+
+def refresh_grid_in_background(predictor):
+    """
+    그리드에 없는 섹션이 있거나 affinity 배열이 없으면 백그라운드에서 한 번만 채웁니다 (이미 진행 중이면 다시 시작하지 않음).
+    VERSION_CHECK_SECONDS 마다 원천 테이블 버전도 확인해, 데이터가 바뀐 섹션은 다시 계산합니다.
+    이번 요청은 기다리지 않고 직접 조회로 처리합니다.
+    """
+    global _refresh_future, _versions_checked_at
+    from prediction_grid import get_grid
+    from store_affinity import get_affinity
+
+    check_versions = VERSION_CHECK_SECONDS > 0 and (
+        _versions_checked_at is None or time.time() - _versions_checked_at >= VERSION_CHECK_SECONDS
+    )
+    if not check_versions and not _grid_is_stale(get_grid(), predictor) and get_affinity() is not None:
+        return
+    with _refresh_lock:
+        if _refresh_future is not None and not _refresh_future.done():
+            return
+        if check_versions:
+            _versions_checked_at = time.time()
+        _refresh_future = _executor.submit(_refresh_precomputed, predictor, check_versions)
+
+
+def _predict_ml(user_input, registry, timeout):
+    from prediction_grid import get_grid
+
+    # 디스크에 저장된 그리드가 있으면 모델 워밍업 전에도 바로 조회 가능
+    with span("grid.lookup_ml") as current:
+        prediction = get_grid().lookup_ml(user_input)
+        current.set(hit=prediction is not None)
+    if prediction is not None:
+        return prediction
+    predictor = registry.get()
+    if predictor is None:
+        with span("model.wait"):
+            predictor = registry.wait(timeout)
+    if predictor is None:
+        return None
+    if BATCHING_ENABLED:
+        return get_batcher().predict(predictor, user_input, timeout)
+    return predictor.predict(user_input)
+
+
+def _store_score(res_dong, work_dong):
+    from snowflake_data_setting.snowpark_queries import get_store_score
+    from store_affinity import get_affinity
+
+    affinity = get_affinity()
+    store_score_df = affinity.lookup(res_dong, work_dong) if affinity is not None else None
+    if store_score_df is None:
+        store_score_df = get_store_score(res_dong=res_dong, work_dong=work_dong)
+    return store_score_df
+
+
+def _estimated_spending(res_dong):
+    from prediction_grid import get_grid
+    from snowflake_data_setting.snowpark_queries import get_estimated_spending
+
+    spending = get_grid().lookup_spending(res_dong)
+    if spending is None:
+        spending = get_estimated_spending(res_dong=res_dong)
+    return spending
+
+
+def _timed(name, func, *args):
+    started = time.perf_counter()
+    with span(f"analyze.{name}"):
+        value = func(*args)
+    return value, time.perf_counter() - started
+
+
+def run_calls(calls: dict, on_result, timeouts: dict = None) -> dict:
+    """
+    calls: {이름: (함수, 인자 튜플)} 를 공유 스레드 풀에서 동시에 실행합니다.
+    끝나는 순서대로(제한 시간을 넘기면 그 시점에) on_result(CallResult)를 호출하고,
+    모든 호출이 정리되면 {이름: CallResult} 를 반환합니다.
+    """
+    timeouts = timeouts or CALL_TIMEOUTS
+    started = time.perf_counter()
+    # 호출 측 span(요청 trace)을 작업 스레드에서도 이어 쓰도록 컨텍스트를 복사해 실행
+    futures = {
+        _executor.submit(contextvars.copy_context().run, _timed, name, func, *args): name
+        for name, (func, args) in calls.items()
+    }
+    deadlines = {future: started + timeouts.get(name, 30.0) for future, name in futures.items()}
+    results = {}
+
+    pending = set(futures)
+    while pending:
+        now = time.perf_counter()
+        next_deadline = min(deadlines[future] for future in pending)
+        done, pending = wait(pending, timeout=max(0.0, next_deadline - now), return_when=FIRST_COMPLETED)
+
+        for future in done:
+            name = futures[future]
+            try:
+                value, seconds = future.result()
+                result = CallResult(name, "ok", value=value, seconds=seconds)
+            except Exception as e:
+                print(f"Analyze call '{name}' failed: {e}")
+                result = CallResult(name, "error", error=e, seconds=time.perf_counter() - started)
+            results[name] = result
+            on_result(result)
+
+        now = time.perf_counter()
+        expired = {future for future in pending if deadlines[future] <= now}
+        for future in expired:
+            name = futures[future]
+            # 이미 실행 중인 작업은 취소되지 않음 → 끝나면 결과는 캐시에만 남음
+            future.cancel()
+            print(f"Analyze call '{name}' timed out after {timeouts.get(name, 30.0):g}s")
+            result = CallResult(name, "timeout", seconds=now - started)
+            results[name] = result
+            on_result(result)
+        pending -= expired
+
+    return results
+
+
+def run_analysis(user_input: dict, registry, on_result, timeouts: dict = None) -> dict:
+    """분석 페이지의 세 호출을 동시에 실행합니다. 결과는 run_calls 와 같습니다."""
+    timeouts = timeouts or CALL_TIMEOUTS
+    refresh_grid_in_background(registry.get())
+    calls = {
+        "ml": (_predict_ml, (user_input, registry, timeouts.get("ml", 30.0))),
+        "store_score": (_store_score, (user_input["residence"], user_input["work"])),
+        "spending": (_estimated_spending, (user_input["residence"],)),
+    }
+    return run_calls(calls, on_result, timeouts)
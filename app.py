@@ -1,9 +1,13 @@
 import streamlit as st
 import os
+from predictor_registry import get_registry
 
 
 st.set_page_config(page_title="백화점 방문 예측", layout="centered")
 
+# 앱 시작 시 예측 모델 워밍업을 백그라운드에서 시작 (이미 진행 중이거나 완료됐으면 무시)
+get_registry().start()
+
 # 사이드바 관련 모든 요소 숨기기 강화
 st.markdown("""
     <style>
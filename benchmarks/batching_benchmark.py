@@ -0,0 +1,103 @@
+"""
+예측 마이크로 배칭 벤치마크 (inference_batcher.MicroBatcher).
+
+동시 사용자 수(threads)만큼 스레드가 각자 requests 번씩 예측을 요청할 때,
+요청마다 predictor.predict 를 실행하는 경우(direct)와 배치 대기 시간(wait_ms)별 마이크로 배칭을 비교합니다.
+
+    throughput_rps      초당 처리한 예측 요청 수
+    p50_ms / p99_ms     요청 하나의 지연 (대기열 대기 + 배치 추론)
+    batch_size_avg      평균 배치 크기
+
+    DATA_SOURCE=local LOCAL_DATA_DIR=local_data python benchmarks/batching_benchmark.py
+    python benchmarks/batching_benchmark.py --threads 32 --wait-ms 0,2,5,10 --max-batch 64
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from inference_batcher import MicroBatcher # noqa: E402
+from model_store import load_or_train # noqa: E402
+from segment_options import AGE_OPTIONS, CUSTOMER_TYPE_OPTIONS, GENDER_OPTIONS # noqa: E402
+
+
+def make_inputs(n, rng):
+    return [
+        {"gender": rng.choice(GENDER_OPTIONS), "age": rng.choice(AGE_OPTIONS), "type": rng.choice(CUSTOMER_TYPE_OPTIONS),
+         "residence": "소공동", "work": "소공동"}
+        for _ in range(n)
+    ]
+
+
+def run_load(predict, inputs_per_thread):
+    # 모든 스레드를 동시에 출발시켜 요청별 지연을 모음
+    latencies = [[] for _ in inputs_per_thread]
+    start = threading.Barrier(len(inputs_per_thread) + 1)
+
+    def worker(i, inputs):
+        start.wait()
+        for user_input in inputs:
+            t0 = time.perf_counter()
+            predict(user_input)
+            latencies[i].append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=worker, args=(i, inputs)) for i, inputs in enumerate(inputs_per_thread)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    t0 = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - t0
+    samples = np.concatenate([np.array(l) for l in latencies])
+    return {
+        "throughput_rps": len(samples) / elapsed,
+        "p50_ms": float(np.percentile(samples, 50) * 1000),
+        "p99_ms": float(np.percentile(samples, 99) * 1000),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16, help="동시 요청 스레드 수")
+    parser.add_argument("--requests", type=int, default=50, help="스레드당 요청 수")
+    parser.add_argument("--wait-ms", default="0,2,5,10", help="쉼표로 구분한 배치 대기 시간 목록")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    predictor = load_or_train()
+    if not predictor.is_initialized:
+        print("모델을 불러오지 못했습니다.")
+        return 1
+
+    rng = np.random.default_rng(args.seed)
+    inputs = [make_inputs(args.requests, rng) for _ in range(args.threads)]
+
+    # 배칭 결과가 단건 예측과 같은지 먼저 확인
+    sample = inputs[0][:8]
+    assert predictor.predict_many(sample) == [predictor.predict(user_input) for user_input in sample]
+
+    results = [{"mode": "direct", **run_load(predictor.predict, inputs)}]
+    for wait_ms in (float(w) for w in args.wait_ms.split(",")):
+        batcher = MicroBatcher(max_batch_size=args.max_batch, max_wait_ms=wait_ms)
+        result = run_load(lambda user_input: batcher.predict(predictor, user_input), inputs)
+        stats = batcher.stats()
+        results.append({"mode": f"batch wait={wait_ms:g}ms", **result, "batch_size_avg": stats["batch_size_avg"]})
+
+    table = pd.DataFrame(results).set_index("mode")
+    with pd.option_context("display.float_format", "{:,.2f}".format, "display.width", 200):
+        print(f"threads={args.threads} requests/thread={args.requests} max_batch={args.max_batch}")
+        print(table)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
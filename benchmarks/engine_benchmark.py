@@ -0,0 +1,120 @@
+"""
+모델 엔진 비교 벤치마크 (model_engines.ENGINES).
+
+학습 데이터(피처 조합별 집계 행)를 한 번 읽은 뒤 학습/홀드아웃으로 나누고
+(방문: 셀 행 수를 이항 분할 = 원본 행 무작위 분할, 지출: 셀 단위 분할),
+모든 엔진을 같은 데이터로 학습해 다음 항목을 표로 출력합니다.
+
+    fit_s            학습 시간 (방문 + 지출 모델)
+    size_kb          pickle 크기
+    p50_us / p99_us  단건(1행) 예측 지연 (방문 확률 + 지출)
+    batch_rows_s     배치 예측 처리량
+    store_acc        홀드아웃 방문 백화점 정확도 (방문 수 가중)
+    store_logloss    홀드아웃 로그 손실 (방문 수 가중)
+    spend_rmse       홀드아웃 원본 행 기준 지출 RMSE (셀의 합계/제곱합으로 계산)
+
+    DATA_SOURCE=local LOCAL_DATA_DIR=local_data python benchmarks/engine_benchmark.py
+    python benchmarks/engine_benchmark.py --engines random_forest,flat_forest --json results.json
+"""
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from model import DepartmentStorePredictor, SPENDING_FEATURES, STORE_FEATURES # noqa: E402
+from model_engines import ENGINES # noqa: E402
+from model_evaluation import holdout_split, load_training_data, score_predictor # noqa: E402
+from segment_options import build_segment_grid # noqa: E402
+from snowflake_data_setting.catalog import DEFAULT_DONGS # noqa: E402
+
+
+def percentile_us(samples, q):
+    return float(np.percentile(samples, q) * 1e6)
+
+
+def evaluate(engine, dep_train, dep_test, sales_train, sales_test, latency_rows, batch_rows):
+    predictor = DepartmentStorePredictor(train=False, engine=engine)
+    predictor.dep_data, predictor.sales_data = dep_train, sales_train
+
+    started = time.perf_counter()
+    predictor._train_models()
+    fit_seconds = time.perf_counter() - started
+    predictor.is_initialized = True
+
+    size_bytes = len(pickle.dumps((predictor.store_model, predictor.spending_model), protocol=pickle.HIGHEST_PROTOCOL))
+
+    # 홀드아웃 점수 (셀 가중치 = 원본 행 수)
+    scores = score_predictor(predictor, dep_test, sales_test)
+    spending_X = predictor.encoder.transform(sales_test, SPENDING_FEATURES)
+
+    # 단건 지연: 홀드아웃 행을 하나씩 예측
+    rows = spending_X[np.arange(latency_rows) % len(spending_X)]
+    samples = []
+    for row in rows:
+        t0 = time.perf_counter()
+        predictor.store_model.predict_proba(row[np.newaxis, :len(STORE_FEATURES)])
+        predictor.spending_model.predict(row[np.newaxis, :])
+        samples.append(time.perf_counter() - t0)
+
+    # 배치 처리량: 입력 폼 조합을 batch_rows 행까지 반복 (거주지/직장은 모델 피처가 아니므로 기본 동 목록만 사용)
+    grid = build_segment_grid(dongs=DEFAULT_DONGS)
+    segments = pd.concat([grid] * max(1, batch_rows // len(grid)), ignore_index=True)
+    t0 = time.perf_counter()
+    for _ in predictor.predict_batch(segments, chunk_size=len(segments)):
+        pass
+    batch_seconds = time.perf_counter() - t0
+
+    return {
+        "engine": engine,
+        "fit_s": fit_seconds,
+        "size_kb": size_bytes / 1024,
+        "p50_us": percentile_us(samples, 50),
+        "p99_us": percentile_us(samples, 99),
+        "batch_rows_s": len(segments) / batch_seconds,
+        **scores,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engines", default=",".join(ENGINES), help="쉼표로 구분한 엔진 이름")
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-rows", type=int, default=500)
+    parser.add_argument("--batch-rows", type=int, default=100_000)
+    parser.add_argument("--json", help="결과를 JSON 파일로도 저장")
+    args = parser.parse_args()
+
+    dep_data, sales_data = load_training_data()
+    if dep_data.empty or sales_data.empty:
+        print("학습 데이터를 읽지 못했습니다.")
+        return 1
+
+    dep_train, dep_test, sales_train, sales_test = holdout_split(dep_data, sales_data, args.holdout, args.seed)
+    print(f"train cells: store={len(dep_train)} spending={len(sales_train)} / "
+          f"holdout cells: store={len(dep_test)} spending={len(sales_test)}")
+
+    results = [
+        evaluate(engine, dep_train, dep_test, sales_train, sales_test, args.latency_rows, args.batch_rows)
+        for engine in args.engines.split(",")
+    ]
+    table = pd.DataFrame(results).set_index("engine")
+    with pd.option_context("display.float_format", "{:,.4f}".format, "display.width", 200, "display.max_columns", None):
+        print(table)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+app.py / pages/Analyze.py 첫 렌더링 시간(time-to-first-paint) 벤치마크.
+
+각 스크립트를 새 파이썬 프로세스(콜드 인터프리터)에서 streamlit AppTest로 한 번 실행하고,
+프로세스 시작부터 첫 스크립트 실행 완료까지의 시간을 잽니다. 같은 방식으로 최소 페이지
+(benchmarks/startup_reference_page.py: streamlit 임포트 + 요소 하나)도 측정해, 스크립트 중앙값 ÷ 기준 페이지 중앙값
+비율을 기준선과 비교합니다. 비율은 머신 속도(CPU, 디스크, 파이썬/streamlit 임포트 비용)가 상쇄되므로
+기준선을 기록한 머신과 다른 머신(CI 등)에서도 같은 기준으로 검사할 수 있습니다.
+
+    python benchmarks/startup_benchmark.py                    # 측정 + 기준선 대비 회귀 검사
+    python benchmarks/startup_benchmark.py --update-baseline  # 현재 측정값을 기준선으로 저장
+
+비율이 기준선보다 tolerance(기본 25%) 이상 커지면 종료 코드 1, 기준선 파일(benchmarks/startup_baseline.json)이 없거나
+기준선에 없는 스크립트(또는 비율이 없는 이전 형식)가 있으면 종료 코드 2를 반환합니다 (검사 없이 통과하지 않도록).
+기준선의 초 단위 값은 참고용이며 검사에는 쓰지 않습니다.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = ["app.py", "pages/Analyze.py"]
+REFERENCE_SCRIPT = "benchmarks/startup_reference_page.py"
+BASELINE_PATH = os.path.join(REPO_ROOT, "benchmarks", "startup_baseline.json")
+
+
+def _child(script: str):
+    # 자식 프로세스: 인터프리터 시작 시각(부모가 전달)부터 첫 실행 완료까지 측정
+    started = float(os.environ["STARTUP_BENCH_T0"])
+    import_started = time.perf_counter()
+    sys.path.insert(0, REPO_ROOT) # 페이지 스크립트가 루트 모듈(input_form 등)을 임포트
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(REPO_ROOT, script), default_timeout=60)
+    app.run()
+    result = {
+        "script": script,
+        "first_paint_seconds": time.time() - started,
+        "run_seconds": time.perf_counter() - import_started,
+        "exceptions": [str(e.value) for e in app.exception],
+    }
+    print(json.dumps(result), flush=True)
+    # 첫 실행이 시작한 백그라운드 작업(모델 워밍업 등)이 인터프리터 종료와 겹치면 멈추거나 비정상 종료할 수 있으므로
+    # 측정이 끝나면 정리 없이 바로 종료
+    os._exit(0)
+
+
+def measure(script: str) -> dict:
+    env = dict(os.environ, STARTUP_BENCH_T0=str(time.time()))
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", script],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    # AppTest/스레드 로그가 섞일 수 있으므로 마지막 JSON 줄만 사용
+    return json.loads([line for line in out.stdout.splitlines() if line.startswith("{")][-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="기준선 대비 허용 증가율")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child)
+        return 0
+
+    # 기준 페이지와 스크립트를 번갈아 측정 (측정 중 머신 부하가 바뀌어도 양쪽에 같이 반영)
+    runs = {script: [] for script in [REFERENCE_SCRIPT] + SCRIPTS}
+    for _ in range(args.repeat):
+        for script in runs:
+            runs[script].append(measure(script))
+    reference = statistics.median(r["first_paint_seconds"] for r in runs[REFERENCE_SCRIPT])
+    print(f"{'reference':20s} median={reference:.3f}s")
+
+    results = {"reference": {"median_seconds": reference}}
+    for script in SCRIPTS:
+        errors = sorted({e for run in runs[script] for e in run["exceptions"]})
+        median = statistics.median(r["first_paint_seconds"] for r in runs[script])
+        results[script] = {
+            "median_ratio": median / reference,
+            "median_seconds": median,
+            "max_seconds": max(r["first_paint_seconds"] for r in runs[script]),
+        }
+        print(f"{script:20s} median={median:.3f}s max={results[script]['max_seconds']:.3f}s "
+              f"ratio={results[script]['median_ratio']:.2f}")
+        for error in errors:
+            print(f"  exception during first run: {error}")
+
+    if args.update_baseline:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+
+    if not os.path.exists(BASELINE_PATH):
+        print(f"No baseline found at {BASELINE_PATH}; run with --update-baseline to record one.")
+        return 2
+
+    with open(BASELINE_PATH, encoding="utf-8") as f:
+        baseline = json.load(f)
+    missing = [script for script in SCRIPTS if "median_ratio" not in baseline.get(script, {})]
+    if missing:
+        print(f"Baseline has no entry for {', '.join(missing)}; run with --update-baseline to record one.")
+        return 2
+    regressed = False
+    for script in SCRIPTS:
+        ratio = results[script]["median_ratio"]
+        limit = baseline[script]["median_ratio"] * (1 + args.tolerance)
+        if ratio > limit:
+            regressed = True
+            print(f"REGRESSION {script}: ratio {ratio:.2f} > {limit:.2f} "
+                  f"(baseline ratio {baseline[script]['median_ratio']:.2f})")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
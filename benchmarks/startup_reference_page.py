@@ -0,0 +1,4 @@
+# startup_benchmark.py 의 기준 측정용 최소 페이지 (streamlit 임포트 + 요소 하나)
+import streamlit as st
+
+st.write("startup reference")
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+# 학습 때 보지 못한 값(및 결측값)이 들어가는 코드. 알려진 값은 1부터 시작
+UNKNOWN_CODE = 0
+
+
+def canonical_value(value):
+    """
+    어휘에 쓰는 값 표현 (문자열). 백엔드에 따라 같은 코드가 숫자/문자열, int/float(20 / 20.0) 로 올 수 있으므로
+    정수인 실수는 정수로 바꾼 뒤 문자열로 맞춥니다. 결측값은 None (항상 UNKNOWN_CODE).
+    """
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        value = int(value)
+    return str(value)
+
+
+def canonical_values(values) -> np.ndarray:
+    """canonical_value 를 배열 전체에 적용합니다 (숫자 dtype 은 벡터 연산, 그 외는 값별 변환)."""
+    values = np.asarray(values)
+    if values.dtype.kind in "iu":
+        return values.astype(np.int64).astype(str).astype(object)
+    if values.dtype.kind == "f":
+        missing = np.isnan(values)
+        if np.all(np.mod(values[~missing], 1) == 0):
+            out = np.where(missing, 0, values).astype(np.int64).astype(str).astype(object)
+            out[missing] = None
+            return out
+    return np.frompyfunc(canonical_value, 1, 1)(values).astype(object)
+
+
+def _numeric_key(value: str):
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    # "nan"/"inf" 같은 문자열은 숫자 범주로 보지 않음
+    return number if np.isfinite(number) else None
+
+
+def sorted_vocabulary(values) -> np.ndarray:
+    """
+    canonical_value 문자열들의 어휘 순서. 모든 값이 숫자이면 숫자 크기 순(3 < 20 < 100),
+    아니면 문자열 순으로 정렬합니다 (코드 순서가 트리 분할에 쓰이므로 숫자 범주는 값 순서를 유지).
+    """
+    values = sorted(set(values))
+    keys = [_numeric_key(value) for value in values]
+    if values and all(key is not None for key in keys):
+        values = [value for _, value in sorted(zip(keys, values))]
+    return np.asarray(values, dtype=object)
+
+
+class CategoricalEncoder:
+    """
+    범주형 피처 인코더 (컬럼별 sklearn LabelEncoder 대체).
+    - 컬럼별 어휘(vocabulary)를 정렬된 배열로 보관하고(숫자 컬럼은 숫자 순), 알려진 값은 1..n / 모르는 값은 UNKNOWN_CODE 로 변환
+    - 컬럼 전체를 pd.Index.get_indexer 로 한 번에 변환 (category dtype 은 카테고리만 변환)
+    - 값은 canonical_value 로 문자열 하나의 표현으로 맞춰 비교 (프레임/백엔드마다 dtype 이 달라도 같은 코드)
+    - 방문/지출 모델이 같은 인코더를 공유 (두 모델의 공통 피처 컬럼을 한 번만 인코딩)
+    - to_dict()/from_dict() 로 JSON 직렬화 가능 (모델 아티팩트에 함께 저장)
+    """
+
+    def __init__(self, vocabularies: dict = None):
+        # 저장된 어휘의 순서가 곧 코드이므로 값 표현만 맞추고 순서는 유지
+        self.vocabularies = {col: canonical_values(np.asarray(values, dtype=object))
+                             for col, values in (vocabularies or {}).items()}
+        self._indexes = {} # 컬럼 → pd.Index (지연 생성)
+        self._code_maps = {} # 컬럼 → {값: 코드} (단건 변환용, 지연 생성)
+
+    def fit(self, frames, columns):
+        """frames(DataFrame 목록)에 나타나는 columns 의 값을 합쳐 어휘를 만듭니다. 결측값은 어휘에 넣지 않습니다."""
+        self.vocabularies = {}
+        for col in columns:
+            values = [canonical_values(frame[col].dropna().unique()) for frame in frames if col in frame]
+            if not values:
+                raise KeyError(f"학습 데이터에 '{col}' 컬럼이 없습니다.")
+            self.vocabularies[col] = sorted_vocabulary(np.concatenate(values).tolist())
+        self._indexes = {}
+        self._code_maps = {}
+        return self
+
+    @property
+    def columns(self):
+        return list(self.vocabularies)
+
+    def _index(self, col) -> pd.Index:
+        index = self._indexes.get(col)
+        if index is None:
+            index = pd.Index(self.vocabularies[col])
+            self._indexes[col] = index
+        return index
+
+    def _code_map(self, col) -> dict:
+        code_map = self._code_maps.get(col)
+        if code_map is None:
+            code_map = {value: code for code, value in enumerate(self.vocabularies[col], start=UNKNOWN_CODE + 1)}
+            self._code_maps[col] = code_map
+        return code_map
+
+    def transform_column(self, col, values) -> np.ndarray:
+        index = self._index(col)
+        if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+            # category dtype: 카테고리 목록만 변환한 뒤 정수 코드로 펼침
+            found = index.get_indexer(canonical_values(values.cat.categories))
+            categories = np.where(found >= 0, found + UNKNOWN_CODE + 1, UNKNOWN_CODE)
+            codes = values.cat.codes.to_numpy()
+            return np.where(codes >= 0, categories[codes], UNKNOWN_CODE).astype(np.int32)
+        codes = index.get_indexer(canonical_values(values))
+        return np.where(codes >= 0, codes + UNKNOWN_CODE + 1, UNKNOWN_CODE).astype(np.int32)
+
+    def transform(self, data, columns) -> np.ndarray:
+        """data(DataFrame 또는 {컬럼: 배열})의 columns 를 (행 수, 컬럼 수) 정수 배열로 변환합니다."""
+        return np.column_stack([self.transform_column(col, data[col]) for col in columns])
+
+    def encode_value(self, col, value) -> int:
+        return self._code_map(col).get(canonical_value(value), UNKNOWN_CODE)
+
+    def transform_row(self, values: dict, columns) -> list:
+        """단건 입력(예측 1회) 변환. dict 조회만 하므로 pandas 를 거치지 않습니다."""
+        return [self.encode_value(col, values[col]) for col in columns]
+
+    def unknown_values(self, values: dict, columns) -> list:
+        return [(col, values[col]) for col in columns if canonical_value(values[col]) not in self._code_map(col)]
+
+    def to_dict(self) -> dict:
+        return {col: vocab.tolist() for col, vocab in self.vocabularies.items()}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(data)
+
+    def __getstate__(self):
+        # 조회 캐시는 저장하지 않음 (로드 후 지연 생성)
+        return {"vocabularies": self.vocabularies}
+
+    def __setstate__(self, state):
+        self.__init__(state["vocabularies"])
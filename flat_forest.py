@@ -0,0 +1,192 @@
+import numpy as np
+
+# 배치 평가 시 한 번에 처리하는 행 수 (트리 수 × 행 수 작업 배열이 캐시에 머물도록)
+CHUNK_ROWS = 2048
+
+
+class FlatForest:
+    """
+    학습된 sklearn 트리 앙상블(RandomForest 등)을 연속 NumPy 배열로 펼친 추론 전용 모델.
+    - 모든 트리의 노드를 feature / threshold / left / right / value 배열 하나씩에 이어 붙임
+      (리프는 left = right = 자기 자신이라 남은 반복에서도 제자리에 머묾)
+    - 배치 전체 × 모든 트리를 깊이 단위로 한 번에 내려가며 평가
+    - 트리별 결과를 sklearn 과 같은 순서(트리 순서대로 누적 후 트리 수로 나눔)로 합쳐 결과가 sklearn 과 비트 단위로 같음
+    sklearn 은 변환(from_sklearn) 시에만 필요하고 추론에는 numpy 만 사용합니다.
+    배열은 읽기만 하므로 메모리 매핑된 파일의 읽기 전용 배열을 그대로 받아 여러 프로세스가 공유할 수 있습니다.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, classes=None,
+                 children=None, is_leaf=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        # 파생 배열도 저장된 것이 있으면 그대로 사용 (프로세스마다 새로 만들지 않음)
+        self.children = children if children is not None else np.ascontiguousarray(np.column_stack([left, right]).ravel())
+        self.is_leaf = is_leaf if is_leaf is not None else left == np.arange(len(left))
+        self.value = value # (노드 수, 출력 수): 분류는 트리별로 정규화된 클래스 확률, 회귀는 리프 평균
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+
+    @property
+    def is_classifier(self) -> bool:
+        return self.classes_ is not None
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        classes = getattr(forest, "classes_", None)
+        normalize = classes is not None and _tree_normalizes_proba(forest.estimators_[0], len(classes))
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            is_leaf = tree.children_left < 0
+            index = np.arange(offset, offset + n)
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(is_leaf, index, tree.children_left + offset))
+            rights.append(np.where(is_leaf, index, tree.children_right + offset))
+
+            if classes is not None:
+                value = tree.value[:, 0, :len(classes)].copy()
+                if normalize:
+                    value = _normalize(value)
+            else:
+                value = tree.value[:, 0, :1].copy()
+            values.append(value)
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp),
+            right=np.ascontiguousarray(np.concatenate(rights), dtype=np.intp),
+            value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            classes=None if classes is None else np.asarray(classes),
+        )
+
+    def apply(self, X) -> np.ndarray:
+        """(트리 수, 행 수) 리프 노드 인덱스."""
+        # sklearn 트리와 같이 float32 로 변환한 값을 float64 임계값과 비교
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        if X.shape[0] > CHUNK_ROWS:
+            return np.concatenate(
+                [self.apply(X[start:start + CHUNK_ROWS]) for start in range(0, X.shape[0], CHUNK_ROWS)], axis=1
+            )
+
+        X_flat = X.ravel()
+        row_offset = (np.arange(X.shape[0], dtype=np.intp) * X.shape[1])[np.newaxis, :]
+        node = np.repeat(self.roots[:, np.newaxis], X.shape[0], axis=1)
+        for depth in range(self.max_depth):
+            # children 은 (왼쪽, 오른쪽)을 번갈아 저장 → 조건 결과(0/1)를 더해 한 번에 다음 노드 선택
+            go_right = X_flat[row_offset + self.feature[node]] > self.threshold[node]
+            node = self.children[2 * node + go_right]
+            # 모든 경로가 리프에 닿았으면 조기 종료 (검사 비용 때문에 몇 단계마다 확인)
+            if depth % 4 == 3 and self.is_leaf[node].all():
+                break
+        return node
+
+    def _accumulate(self, X) -> np.ndarray:
+        # sum() 은 배열 모양에 따라 쌍별(pairwise) 합산을 쓰므로, 순차 누적인 cumsum 의 마지막 값을 사용
+        # → sklearn 의 트리 순서대로 out += tree_prediction 누적과 같은 결과
+        leaf_values = self.value[self.apply(X)] # (트리 수, 행 수, 출력 수)
+        out = np.cumsum(leaf_values, axis=0)[-1]
+        out /= self.n_trees
+        return out
+
+    def predict_proba(self, X) -> np.ndarray:
+        return self._accumulate(X)
+
+    def predict(self, X) -> np.ndarray:
+        out = self._accumulate(X)
+        if self.is_classifier:
+            return self.classes_.take(np.argmax(out, axis=1))
+        return out[:, 0]
+
+    def to_arrays(self, prefix: str) -> dict:
+        """파일로 저장할 배열 묶음 (pickle 없이 읽을 수 있는 dtype 만 사용)."""
+        arrays = {
+            "feature": self.feature, "threshold": self.threshold, "left": self.left, "right": self.right,
+            "value": self.value, "roots": self.roots, "max_depth": np.asarray(self.max_depth),
+            "children": self.children, "is_leaf": self.is_leaf,
+        }
+        if self.classes_ is not None:
+            arrays["classes"] = np.asarray(self.classes_).astype(str) if self.classes_.dtype == object else self.classes_
+        return {f"{prefix}.{name}": array for name, array in arrays.items()}
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix: str):
+        def get(name):
+            return arrays[f"{prefix}.{name}"]
+
+        classes_key = f"{prefix}.classes"
+        return cls(
+            feature=get("feature"), threshold=get("threshold"), left=get("left"), right=get("right"),
+            value=get("value"), roots=get("roots"), max_depth=int(get("max_depth")),
+            classes=arrays[classes_key].astype(object) if classes_key in arrays else None,
+            children=arrays.get(f"{prefix}.children"), is_leaf=arrays.get(f"{prefix}.is_leaf"),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.left, self.right, self.value, self.roots,
+                                      self.children, self.is_leaf))
+
+
+def _normalize(value):
+    # 이전 sklearn 버전 DecisionTreeClassifier.predict_proba 의 정규화 (합이 0이면 1로 나눔)
+    normalizer = value.sum(axis=1)[:, np.newaxis]
+    normalizer[normalizer == 0.0] = 1.0
+    return value / normalizer
+
+
+def _tree_normalizes_proba(estimator, n_classes) -> bool:
+    """
+    설치된 sklearn 의 트리 predict_proba 가 노드 값을 다시 정규화하는지 확인합니다 (버전마다 다름).
+    값의 합이 정확히 1이 아닌 리프 하나로 가는 입력을 경로 조건에서 만들어, 실제 출력과 비트 단위로 비교합니다.
+    """
+    tree = estimator.tree_
+    value = tree.value[:, 0, :n_classes]
+    is_leaf = tree.children_left < 0
+    candidates = np.flatnonzero(is_leaf & (value.sum(axis=1) != 1.0))
+    if len(candidates) == 0:
+        return False # 정규화해도 값이 같음
+    leaf = candidates[0]
+
+    parent = {}
+    for node in np.flatnonzero(~is_leaf):
+        parent[tree.children_left[node]] = (node, True)
+        parent[tree.children_right[node]] = (node, False)
+    lower = np.full(estimator.n_features_in_, -np.inf)
+    upper = np.full(estimator.n_features_in_, np.inf)
+    node = leaf
+    while node in parent:
+        node, went_left = parent[node]
+        f, t = tree.feature[node], tree.threshold[node]
+        if went_left:
+            upper[f] = min(upper[f], t) # x <= t
+        else:
+            lower[f] = max(lower[f], t) # x > t
+    X = np.where(np.isfinite(upper), upper, np.where(np.isfinite(lower), lower + 1.0, 0.0)).astype(np.float32)
+    # float32 로 반올림하면서 상한을 넘은 값은 한 칸 내림
+    over = X.astype(np.float64) > upper
+    X[over] = np.nextafter(X[over], np.float32(-np.inf))
+    X = X[np.newaxis, :]
+    if estimator.apply(X)[0] != leaf:
+        raise RuntimeError("정규화 방식 확인용 입력을 만들지 못했습니다.")
+    actual = estimator.predict_proba(X)[0]
+    return not np.array_equal(actual, value[leaf])
@@ -0,0 +1,159 @@
+"""
+예측 요청 마이크로 배칭 (선택 기능, INFERENCE_BATCHING=1).
+
+여러 세션이 동시에 "예측하기"를 누르면 요청마다 1행짜리 predict_proba 를 따로 실행하게 됩니다.
+MicroBatcher 는 요청을 프로세스 공유 큐에 넣고, 배치 스레드가 첫 요청부터 최대 max_wait_ms 동안
+(또는 max_batch_size 개가 모일 때까지) 요청을 모아 predictor.predict_many 한 번으로 예측한 뒤
+각 요청의 Future 로 결과를 돌려줍니다.
+
+    INFERENCE_BATCH_MAX      배치 최대 크기 (기본 64)
+    INFERENCE_BATCH_WAIT_MS  첫 요청 뒤 기다리는 최대 시간 (기본 5ms) — 클수록 처리량↑ 지연↑
+    INFERENCE_QUEUE_MAX      대기열 최대 길이 (기본 1024) — 가득 차면 배칭 없이 바로 예측
+
+배치 통계(크기, 대기 시간, 대기열 길이)는 stats() 와 진단 페이지에서 확인합니다.
+"""
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from tracing import span
+
+BATCHING_ENABLED = os.getenv("INFERENCE_BATCHING", "0") == "1"
+BATCH_MAX_SIZE = int(os.getenv("INFERENCE_BATCH_MAX", "64"))
+BATCH_WAIT_MS = float(os.getenv("INFERENCE_BATCH_WAIT_MS", "5"))
+QUEUE_MAX = int(os.getenv("INFERENCE_QUEUE_MAX", "1024"))
+
+
+class _Request:
+    __slots__ = ("predictor", "user_input", "future", "enqueued_at")
+
+    def __init__(self, predictor, user_input):
+        self.predictor = predictor
+        self.user_input = user_input
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatcher:
+    def __init__(self, max_batch_size: int = BATCH_MAX_SIZE, max_wait_ms: float = BATCH_WAIT_MS,
+                 max_queue: int = QUEUE_MAX):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+
+        self.requests = 0
+        self.batches = 0
+        self.overflows = 0 # 대기열이 가득 차 배칭 없이 처리한 요청 수
+        self.errors = 0
+        self.queue_depth_max = 0
+        self._batch_sizes = deque(maxlen=1024) # 최근 배치 크기
+        self._queue_waits = deque(maxlen=1024) # 최근 요청의 대기열 대기 시간(초)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, predictor, user_input) -> Future:
+        """요청을 대기열에 넣고 Future 를 반환합니다. 대기열이 가득 차면 queue.Full 을 던집니다."""
+        self.start()
+        request = _Request(predictor, user_input)
+        self._queue.put_nowait(request)
+        with self._lock:
+            self.requests += 1
+            self.queue_depth_max = max(self.queue_depth_max, self._queue.qsize())
+        return request.future
+
+    def predict(self, predictor, user_input, timeout: float = None):
+        """predictor.predict(user_input) 과 같은 결과를 마이크로 배치로 계산합니다."""
+        with span("model.batched_predict"):
+            try:
+                future = self.submit(predictor, user_input)
+            except queue.Full:
+                with self._lock:
+                    self.overflows += 1
+                return predictor.predict(user_input)
+            return future.result(timeout)
+
+    def _collect(self):
+        # 첫 요청이 올 때까지 기다린 뒤, 그 시점부터 max_wait 동안 max_batch_size 개까지 모음
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            # 모델 교체 직후에는 서로 다른 모델로 들어온 요청이 섞일 수 있으므로 모델별로 나눠 실행
+            groups = {}
+            for request in batch:
+                groups.setdefault(id(request.predictor), []).append(request)
+            for requests in groups.values():
+                self._run_batch(requests)
+            with self._lock:
+                self.batches += len(groups)
+                self._batch_sizes.extend(len(requests) for requests in groups.values())
+                self._queue_waits.extend(started - request.enqueued_at for request in batch)
+
+    def _run_batch(self, requests):
+        predictor = requests[0].predictor
+        try:
+            with span("model.batch", size=len(requests)):
+                results = predictor.predict_many([request.user_input for request in requests])
+        except Exception as e:
+            print(f"Batched prediction failed ({len(requests)} requests): {e}")
+            with self._lock:
+                self.errors += 1
+            for request in requests:
+                request.future.set_exception(e)
+            return
+        for request, result in zip(requests, results):
+            request.future.set_result(result)
+
+    def stats(self) -> dict:
+        with self._lock:
+            sizes = np.array(self._batch_sizes, dtype=float)
+            waits = np.array(self._queue_waits, dtype=float) * 1000
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "requests": self.requests,
+                "batches": self.batches,
+                "overflows": self.overflows,
+                "errors": self.errors,
+                "queue_depth": self._queue.qsize(),
+                "queue_depth_max": self.queue_depth_max,
+                "batch_size_avg": float(sizes.mean()) if len(sizes) else 0.0,
+                "batch_size_p95": float(np.percentile(sizes, 95)) if len(sizes) else 0.0,
+                "queue_wait_ms_p50": float(np.percentile(waits, 50)) if len(waits) else 0.0,
+                "queue_wait_ms_p95": float(np.percentile(waits, 95)) if len(waits) else 0.0,
+            }
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher() -> MicroBatcher:
+    """프로세스 공유 MicroBatcher (환경 변수 설정 사용)."""
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher()
+    return _batcher
@@ -1,5 +1,5 @@
 import streamlit as st
-from snowflake.snowpark import Session
+from segment_options import GENDER_OPTIONS, AGE_OPTIONS, CUSTOMER_TYPE_OPTIONS, dong_options
 
 # 사이드바 제거
 st.markdown("""
@@ -29,18 +29,21 @@ def get_user_input():
     col1, col2 = st.columns(2)
     with col1:
         st.markdown("**성별**") # 별도 markdown 라벨 사용
-        gender = st.radio(label="성별", options=["남성", "여성"], horizontal=True, label_visibility="collapsed") # 위젯 라벨 숨김
+        gender = st.radio(label="성별", options=GENDER_OPTIONS, horizontal=True, label_visibility="collapsed") # 위젯 라벨 숨김
 
     st.markdown("<br>", unsafe_allow_html=True)
 
     # 거주지/직장 위치: 이전 방식 유지 (st.markdown + label_visibility)
+    # 선택지는 카탈로그의 전체 동 (프로세스당 한 번 로드한 목록 재사용)
+    # 카탈로그를 DB에서 만드는 중이면 기다리지 않고 기본 목록으로 먼저 그림 (다음 렌더부터 전체 목록)
+    dongs = dong_options(wait=False)
     col3, col4 = st.columns(2)
     with col3:
         st.markdown("**거주지**")
-        residence = st.selectbox(label="🏠 거주지", options=["여의도동", "소공동", "반포동"], label_visibility="collapsed")
+        residence = st.selectbox(label="🏠 거주지", options=dongs, label_visibility="collapsed")
     with col4:
         st.markdown("**직장 위치**")
-        work = st.selectbox(label="💼 직장 위치", options=["여의도동", "소공동", "반포동"], label_visibility="collapsed")
+        work = st.selectbox(label="💼 직장 위치", options=dongs, label_visibility="collapsed")
 
     st.markdown("<br>", unsafe_allow_html=True)
 
@@ -48,10 +51,10 @@ def get_user_input():
     col5, col6 = st.columns(2)
     with col5:
         st.markdown("**연령대**")
-        age = st.selectbox(label="연령대", options=["20대", "30대", "40대", "50대 이상"], label_visibility="collapsed")
+        age = st.selectbox(label="연령대", options=AGE_OPTIONS, label_visibility="collapsed")
     with col6:
         st.markdown("**고객 형태**")
-        type = st.selectbox(label="고객 형태", options=["싱글", '신혼부부',"영유아가족", "청소년가족", "성인자녀가족", '실버'], label_visibility="collapsed")
+        type = st.selectbox(label="고객 형태", options=CUSTOMER_TYPE_OPTIONS, label_visibility="collapsed")
 
 
     st.markdown("<br>", unsafe_allow_html=True)
@@ -1,102 +1,193 @@
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
-from sklearn.preprocessing import LabelEncoder
-import snowflake.connector
 import os
-from dotenv import load_dotenv
+import time
 import streamlit as st # Streamlit 임포트 추가
+from feature_encoder import CategoricalEncoder
+from model_engines import DEFAULT_ENGINE, build_engine, engine_params
+from model_store import compute_data_fingerprint
+from training_data import MemoryBudgetExceeded, load_aggregated
+from snowflake_data_setting.data_sources import get_data_source
+from snowflake_data_setting.catalog import get_catalog
+from segment_options import DEFAULT_TIME_SLOT, DEFAULT_WEEKDAY_WEEKEND, DEFAULT_CARD_TYPE
+from tracing import span
+
+# 모델 입력 피처 순서 (학습/예측 공통)
+STORE_FEATURES = ['AGE_GROUP', 'GENDER', 'TIME_SLOT', 'WEEKDAY_WEEKEND', 'LIFESTYLE']
+SPENDING_FEATURES = STORE_FEATURES + ['CARD_TYPE']
+
+# 배치 입력 컬럼(user_input 키) → 모델 피처 컬럼
+INPUT_FEATURE_MAP = {"age": "AGE_GROUP", "gender": "GENDER", "type": "LIFESTYLE"}
+# 입력에 없으면 채워 넣는 피처 고정값
+DEFAULT_FEATURE_VALUES = {
+    "TIME_SLOT": DEFAULT_TIME_SLOT,
+    "WEEKDAY_WEEKEND": DEFAULT_WEEKDAY_WEEKEND,
+    "CARD_TYPE": DEFAULT_CARD_TYPE,
+}
+
+# 학습 데이터 집계 쿼리 (파이프라인의 *_FEATURE_CUBE 테이블, 없으면 원본 테이블에서 직접 집계)
+# SALES_SUM_SQ 는 학습에는 쓰지 않고 홀드아웃 평가에서 원본 행 기준 지출 RMSE 를 계산하는 데 씀 (model_evaluation)
+# 필터 값(백화점 원본 이름, 학습 대상 동)은 카탈로그에서 바인드 파라미터로 전달 → 목록이 늘어도 쿼리 수는 그대로
+DEP_CUBE_QUERY = """
+SELECT {keys}, DEP_NAME, SUM(ROW_COUNT) AS ROW_COUNT
+FROM DEP_STORE_FEATURE_CUBE
+WHERE DEP_NAME IN ({names})
+GROUP BY {keys}, DEP_NAME
+"""
+DEP_RAW_QUERY = """
+SELECT {keys}, DEP_NAME, COUNT(*) AS ROW_COUNT
+FROM DEP_STORE_DATA
+WHERE DEP_NAME IN ({names})
+GROUP BY {keys}, DEP_NAME
+"""
+SALES_CUBE_QUERY = """
+SELECT {keys}, SUM(ROW_COUNT) AS ROW_COUNT, SUM(SALES_SUM) AS SALES_SUM, SUM(SALES_SUM_SQ) AS SALES_SUM_SQ
+FROM SALES_DISTRICT_FEATURE_CUBE
+WHERE DISTRICT_NAME IN ({districts})
+GROUP BY {keys}
+"""
+SALES_RAW_QUERY = """
+SELECT {keys}, COUNT(*) AS ROW_COUNT,
+    SUM(COALESCE(DEPARTMENT_STORE_SALES, 0)) AS SALES_SUM,
+    SUM(COALESCE(DEPARTMENT_STORE_SALES, 0) * COALESCE(DEPARTMENT_STORE_SALES, 0)) AS SALES_SUM_SQ
+FROM SALES_KOR_LABELING
+WHERE DISTRICT_NAME IN ({districts})
+GROUP BY {keys}
+"""
+
+
+def _placeholders(values) -> str:
+    return ", ".join(["?"] * len(values))
 
 class DepartmentStorePredictor:
-    def __init__(self):
-        # Snowflake 연결 설정
-        load_dotenv()
-        self.conn = None # conn 초기화
+    def __init__(self, train=True, engine=None):
+        # 백화점 목록 (표시 이름, 카탈로그 기준 — 학습 시 실제 학습된 클래스로 갱신)
+        self.stores = []
+
+        # 모델 초기화 (엔진: random_forest / hist_gbm / lookup_table / flat_forest, 기본값은 MODEL_ENGINE)
+        # 모델 객체는 학습(_train_models) 또는 아티팩트 로드 시 생성
+        self.engine = engine or DEFAULT_ENGINE
+        self.engine_params = {} # 엔진 설정 (MODEL_ENGINE_PARAMS, 학습 시 기록)
+        self.store_model = None
+        self.spending_model = None
+        self.encoder = CategoricalEncoder() # 방문/지출 모델 공용 범주형 인코더
+
+        self.source = None # 데이터 소스 (Snowflake 또는 로컬 Parquet)
         self.is_initialized = False # 초기화 플래그 추가 (기본 False)
+        self.data_fingerprint = None # 학습 데이터 지문 (아티팩트 저장 시 사용)
+        self.trained_at = None # 학습 완료 시각 (epoch seconds)
+
+        # train=False 이면 빈 껍데기만 생성 (model_store.load_predictor 에서 아티팩트로 채움)
+        if train:
+            self.train()
+
+    def train(self):
+        # 데이터 소스 연결 (DATA_SOURCE=local 이면 로컬 Parquet/DuckDB)
+        self.is_initialized = False
 
         try:
-            self.conn = snowflake.connector.connect(
-                user=os.getenv("DB_USER"),
-                password=os.getenv("DB_PASSWORD"),
-                account=os.getenv("DB_ACCOUNT"),
-                warehouse=os.getenv("DB_WAREHOUSE"),
-                database=os.getenv("DB_DATABASE"),
-                schema=os.getenv("DB_SCHEMA"),
-                role=os.getenv("DB_ROLE"),
-            )
+            self.source = get_data_source()
+            self.source.connect()
         except Exception as e:
-            print(f"Snowflake connection failed: {e}")
-            st.error(f"ML 모델용 Snowflake 연결 실패: {e}")
+            print(f"Data source connection failed: {e}")
+            st.error(f"ML 모델용 데이터 소스 연결 실패: {e}")
+            self.source = None
             # 연결 실패 시 더 이상 진행하지 않음 (또는 기본 모델 로드 등의 로직 추가)
-            return # __init__ 종료
-
-        # 백화점 목록
-        self.stores = ["롯데백화점", "신세계백화점", "현대백화점"]
-
-        # 모델 초기화
-        self.store_model = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.spending_model = RandomForestRegressor(n_estimators=100, random_state=42)
+            return # train 종료
 
         # 데이터 로드 및 모델 학습
         try:
             self._load_data()
-            self._train_models()
-            if self.dep_data.empty or self.sales_data.empty: # _train_models 내부 검사 후 재확인
+            if self.fit(self.dep_data, self.sales_data):
+                 print("DepartmentStorePredictor initialized successfully.") # 성공 로그 추가
+            else:
                  st.warning("데이터 로딩 후 확인 결과, 학습 데이터가 부족하여 ML 모델이 초기화되지 않았습니다.")
                  # self.is_initialized는 False 유지됨
-            else:
-                 self.is_initialized = True # 성공적으로 학습 완료 시 True로 설정
-                 print("DepartmentStorePredictor initialized successfully.") # 성공 로그 추가
         except Exception as e:
             print(f"Error during model initialization: {e}")
             st.error(f"ML 모델 초기화 중 오류 발생: {e}")
             # self.is_initialized는 False 유지됨
         finally:
-             if self.conn:
-                 self.conn.close() # 데이터 로드/학습 후 연결 종료 보장
-                 print("Snowflake connection for ML model closed.")
+            # 학습이 끝나면 집계 데이터는 더 쓰지 않으므로 해제 (예측에는 모델과 인코더만 필요)
+            self.release_training_data()
 
+    def fit(self, dep_data, sales_data) -> bool:
+        """
+        이미 읽어 둔 집계 데이터로 학습합니다 (train 과 재학습 스케줄러의 홀드아웃 평가에서 사용).
+        데이터가 비어 있으면 학습하지 않고 False를 반환합니다.
+        """
+        self.is_initialized = False
+        self.dep_data, self.sales_data = dep_data, sales_data
+        self._train_models()
+        if self.dep_data.empty or self.sales_data.empty: # _train_models 내부 검사 후 재확인
+            return False
+        self.data_fingerprint = compute_data_fingerprint(self.dep_data, self.sales_data)
+        self.trained_at = time.time()
+        self.is_initialized = True # 성공적으로 학습 완료 시 True로 설정
+        return True
 
-    def _load_data(self):
+    def release_training_data(self):
+        self.dep_data = pd.DataFrame()
+        self.sales_data = pd.DataFrame()
+
+
+    def _load_data(self, extra_keys=()):
         # 데이터 로드 전에 연결 상태 확인
-        if not self.conn:
-             print("Error: Snowflake connection not established. Cannot load data.")
-             st.error("ML 모델 데이터 로딩 실패: Snowflake 연결 없음.")
+        if not self.source:
+             print("Error: Data source not connected. Cannot load data.")
+             st.error("ML 모델 데이터 로딩 실패: 데이터 소스 연결 없음.")
              self.dep_data = pd.DataFrame() # 빈 데이터프레임 할당
              self.sales_data = pd.DataFrame()
              return
 
         print("Loading data for ML model...") # 로딩 시작 로그
-        # 백화점 방문 데이터 로드
-        query_dep = """
-        SELECT AGE_GROUP, GENDER, TIME_SLOT, WEEKDAY_WEEKEND, LIFESTYLE, DEP_NAME
-        FROM DEP_STORE_DATA
-        WHERE DEP_NAME IN ('롯데백화점_본점', '신세계_강남', '더현대서울')
-        """
+        # 원본 행 대신 피처 조합별 집계 행(행 수, 매출 합계)만 가져와 가중치로 학습
+        self.dep_data = self._load_store_data(extra_keys)
+        self.sales_data = self._load_sales_data(extra_keys)
+
+    # extra_keys: 피처와 함께 묶을 추가 컬럼 (재학습 스케줄러는 STANDARD_YEAR_MONTH 별로 받아 새 월로 평가)
+    def _load_store_data(self, extra_keys=()):
+        dep_keys = STORE_FEATURES + list(extra_keys)
+        keys = ", ".join(dep_keys)
+        dep_names = get_catalog().stores
+        return self._load_aggregate(
+            DEP_CUBE_QUERY.format(keys=keys, names=_placeholders(dep_names)),
+            DEP_RAW_QUERY.format(keys=keys, names=_placeholders(dep_names)),
+            dep_keys + ['DEP_NAME'], "DEP_STORE_FEATURE_CUBE", "백화점 방문", cube_params=dep_names, raw_params=dep_names,
+        )
+
+    def _load_sales_data(self, extra_keys=()):
+        sales_keys = SPENDING_FEATURES + list(extra_keys)
+        keys = ", ".join(sales_keys)
+        # 카탈로그의 백화점 소재 동 (새 매장이 생기면 그 동도 학습 대상)
+        districts = get_catalog().districts
+        return self._load_aggregate(
+            SALES_CUBE_QUERY.format(keys=keys, districts=_placeholders(districts)),
+            SALES_RAW_QUERY.format(keys=keys, districts=_placeholders(districts)),
+            sales_keys, "SALES_DISTRICT_FEATURE_CUBE", "카드 소비", cube_params=districts, raw_params=districts,
+        )
+
+    def _load_aggregate(self, cube_query, raw_query, keys, cube_name, label, cube_params=None, raw_params=None):
+        # 파이프라인이 만든 집계 테이블을 우선 사용하고, 없으면 같은 집계를 원본 테이블에서 수행
+        # 결과는 Arrow 배치로 스트리밍하며 메모리 상한(TRAINING_MEMORY_BUDGET_MB) 안에서 키별로 합산
         try:
-            self.dep_data = pd.read_sql(query_dep, self.conn)
-            print(f"Loaded {len(self.dep_data)} rows from DEP_STORE_DATA.") # 로드된 행 수 로그
+            df = load_aggregated(self.source, cube_query, keys, params=cube_params)
+            print(f"Loaded {len(df)} aggregated rows from {cube_name}.") # 로드된 행 수 로그
+            return df
+        except MemoryBudgetExceeded as e:
+            print(f"Error loading {cube_name} data: {e}")
+            st.error(f"{label} 데이터 로딩 실패: {e}")
+            return pd.DataFrame()
         except Exception as e:
-             print(f"Error loading DEP_STORE_DATA: {e}")
-             st.error(f"백화점 방문 데이터 로딩 실패: {e}")
-             self.dep_data = pd.DataFrame()
-
-        # 카드 소비 데이터 로드
-        query_sales = """
-        SELECT AGE_GROUP, GENDER, TIME_SLOT, WEEKDAY_WEEKEND, LIFESTYLE, CARD_TYPE, DEPARTMENT_STORE_SALES
-        FROM SALES_KOR_LABELING
-        WHERE DISTRICT_NAME IN ('여의도동', '소공동', '반포동')
-        """
+            print(f"{cube_name} unavailable ({e}); aggregating raw table instead.")
         try:
-            self.sales_data = pd.read_sql(query_sales, self.conn)
-            print(f"Loaded {len(self.sales_data)} rows from SALES_KOR_LABELING.") # 로드된 행 수 로그
+            df = load_aggregated(self.source, raw_query, keys, params=raw_params)
+            print(f"Loaded {len(df)} aggregated rows from raw table for {cube_name}.")
+            return df
         except Exception as e:
-            print(f"Error loading SALES_KOR_LABELING: {e}")
-            st.error(f"카드 소비 데이터 로딩 실패: {e}")
-            self.sales_data = pd.DataFrame()
-
-        # 데이터 로드 후 연결 종료는 __init__의 finally 블록으로 이동
-        # self.conn.close()
+            print(f"Error loading {cube_name} data: {e}")
+            st.error(f"{label} 데이터 로딩 실패: {e}")
+            return pd.DataFrame()
 
     def _train_models(self):
         # 데이터 유효성 검사
@@ -106,36 +197,29 @@ class DepartmentStorePredictor:
             return # 여기서 함수 종료 시 is_initialized = False 유지됨
 
         print("Training ML models...") # 학습 시작 로그
+        self.engine_params = engine_params(self.engine)
+        self.store_model, self.spending_model = build_engine(self.engine, self.engine_params)
+        # 범주형 변수 인코딩: 두 데이터의 값을 합친 어휘로 인코더 하나를 학습해 두 모델이 공유
+        self.encoder = CategoricalEncoder().fit([self.dep_data, self.sales_data], SPENDING_FEATURES)
+
         # 백화점 방문 예측 모델 학습
-        # 범주형 변수 인코딩 (LabelEncoder 사용)
-        store_features = self.dep_data[['AGE_GROUP', 'GENDER', 'TIME_SLOT', 'WEEKDAY_WEEKEND', 'LIFESTYLE']].copy()
-        encoders = {}
-        for col in store_features.columns:
-            le = LabelEncoder()
-            store_features[col] = le.fit_transform(store_features[col])
-            encoders[col] = le # 나중에 예측 시 사용하기 위해 인코더 저장
-        self.store_encoders = encoders
-
-        y_store = self.dep_data['DEP_NAME'].map({
-            '롯데백화점_본점': '롯데백화점',
-            '신세계_강남': '신세계백화점',
-            '더현대서울': '현대백화점'
-        })
-        self.store_model.fit(store_features, y_store)
+        store_features = self.encoder.transform(self.dep_data, STORE_FEATURES)
+
+        # LOPLAT 원본 매장 이름 → 카탈로그 표시 이름 (category dtype 이면 카테고리만 변환)
+        y_store = self.dep_data['DEP_NAME'].map(get_catalog().canonical_store).astype(str)
+        # 집계 행의 행 수를 가중치로 사용 (원본 행을 반복한 것과 같은 분할 기준, bootstrap 차이는 model_engines 참고)
+        self.store_model.fit(store_features, y_store, sample_weight=self.dep_data['ROW_COUNT'].astype(float))
+        self.stores = [str(store) for store in self.store_model.classes_]
 
         # 지출 예측 모델 학습
-        spending_features = self.sales_data[['AGE_GROUP', 'GENDER', 'TIME_SLOT', 'WEEKDAY_WEEKEND', 'LIFESTYLE', 'CARD_TYPE']].copy()
-        encoders = {}
-        for col in spending_features.columns:
-            le = LabelEncoder()
-            spending_features[col] = le.fit_transform(spending_features[col])
-            encoders[col] = le
-        self.spending_encoders = encoders
-
-        y_spend = self.sales_data['DEPARTMENT_STORE_SALES']
-        # NaN 또는 무한대 값 처리 (예: 0으로 대체)
+        spending_features = self.encoder.transform(self.sales_data, SPENDING_FEATURES)
+
+        # 셀 평균 매출을 행 수 가중치로 학습: 제곱오차 기준에서 셀 내부 분산은 분할과 무관하므로
+        # 원본 행으로 학습한 것과 같은 분할/리프 값이 나옴 (NaN 매출은 집계 시 0으로 처리됨)
+        weights = self.sales_data['ROW_COUNT'].astype(float)
+        y_spend = (self.sales_data['SALES_SUM'].astype(float) / weights)
         y_spend = y_spend.fillna(0).replace([np.inf, -np.inf], 0)
-        self.spending_model.fit(spending_features, y_spend)
+        self.spending_model.fit(spending_features, y_spend, sample_weight=weights)
 
         print("ML models trained successfully.") # 학습 완료 로그
 
@@ -146,20 +230,87 @@ class DepartmentStorePredictor:
             return {"store_predictions": {}, "spending": 0} # 기본값 반환
 
         # 입력 데이터 전처리
-        processed_input_store, processed_input_spending = self._preprocess_input(user_input)
+        with span("model.encode"):
+            processed_input_store, processed_input_spending = self._preprocess_input(user_input)
 
-        # 백화점 방문 예측
-        store_probs = self.store_model.predict_proba([processed_input_store])[0]
-        store_predictions = dict(zip(self.store_model.classes_, store_probs))
+        with span("model.inference", engine=self.engine):
+            # 백화점 방문 예측
+            store_probs = self.store_model.predict_proba([processed_input_store])[0]
+            store_predictions = dict(zip(self.store_model.classes_, store_probs))
 
-        # 지출 예측
-        spending = self.spending_model.predict([processed_input_spending])[0]
+            # 지출 예측
+            spending = self.spending_model.predict([processed_input_spending])[0]
 
         return {
             "store_predictions": store_predictions,
             "spending": max(0, int(spending)) # 음수 값 방지
         }
 
+    def predict_many(self, user_inputs):
+        """
+        여러 요청의 user_input 을 인코딩/추론 한 번으로 예측합니다 (inference_batcher 의 마이크로 배치용).
+        각 결과는 predict() 와 같은 형식이고 입력 순서를 따릅니다.
+        """
+        if not self.is_initialized:
+            raise AttributeError("Model is not initialized, cannot predict.")
+
+        segments = pd.DataFrame({key: [user_input[key] for user_input in user_inputs] for key in INPUT_FEATURE_MAP})
+        with span("model.encode", rows=len(segments)):
+            spending_X = self.encoder.transform(self._batch_features(segments), SPENDING_FEATURES)
+        with span("model.inference", engine=self.engine, rows=len(segments)):
+            store_probs = self.store_model.predict_proba(spending_X[:, :len(STORE_FEATURES)])
+            spending = self.spending_model.predict(spending_X)
+
+        classes = self.store_model.classes_
+        return [
+            {"store_predictions": dict(zip(classes, probs)), "spending": max(0, int(value))}
+            for probs, value in zip(store_probs, spending)
+        ]
+
+    def predict_batch(self, segments, chunk_size=100_000):
+        """
+        여러 고객 세그먼트를 한 번에 예측합니다 (제너레이터).
+        segments 컬럼: gender, age, type (필수) / TIME_SLOT, WEEKDAY_WEEKEND, CARD_TYPE (선택, 없으면 고정값)
+        chunk_size 행마다 인코딩과 predict_proba/predict를 한 번씩만 호출하고, 결과 DataFrame을 바로 내보냅니다.
+        결과에는 입력 컬럼 + 백화점별 방문 확률 컬럼 + spending 컬럼이 포함됩니다.
+        """
+        if not self.is_initialized:
+            raise AttributeError("Model is not initialized, cannot predict batch.")
+
+        for start in range(0, len(segments), chunk_size):
+            chunk = segments.iloc[start:start + chunk_size]
+            features = self._batch_features(chunk)
+
+            # 공통 피처는 한 번만 인코딩 (STORE_FEATURES 는 SPENDING_FEATURES 의 앞부분)
+            spending_X = self.encoder.transform(features, SPENDING_FEATURES)
+            store_X = spending_X[:, :len(STORE_FEATURES)]
+
+            store_probs = self.store_model.predict_proba(store_X)
+            spending = self.spending_model.predict(spending_X)
+
+            result = chunk.reset_index(drop=True).copy()
+            for i, store in enumerate(self.store_model.classes_):
+                result[store] = store_probs[:, i]
+            result["spending"] = np.maximum(spending, 0).astype(np.int64) # 음수 값 방지
+            yield result
+
+    def predict_csv(self, source, chunk_size=100_000):
+        """
+        CRM 세그먼트 CSV를 chunk_size 행씩 읽으면서 predict_batch 결과를 내보냅니다.
+        파일 전체를 메모리에 올리지 않습니다.
+        """
+        for chunk in pd.read_csv(source, chunksize=chunk_size):
+            yield from self.predict_batch(chunk, chunk_size=chunk_size)
+
+    def _batch_features(self, segments):
+        # user_input 키 컬럼을 모델 피처 컬럼으로 옮기고, 없는 피처는 고정값으로 채움
+        features = {}
+        for key, col in INPUT_FEATURE_MAP.items():
+            features[col] = segments[col].to_numpy() if col in segments else segments[key].to_numpy()
+        for col, default in DEFAULT_FEATURE_VALUES.items():
+            features[col] = segments[col].to_numpy() if col in segments else np.full(len(segments), default, dtype=object)
+        return features
+
     def _preprocess_input(self, user_input):
         # 예측 전 초기화 상태 재확인 (이론상 predict에서 걸러지지만 안전 장치)
         if not self.is_initialized:
@@ -168,52 +319,18 @@ class DepartmentStorePredictor:
         # 입력 데이터를 모델이 이해할 수 있는 형태로 변환
         # 순서는 _train_models 에서 사용된 특성 순서와 일치해야 함
 
-        # 백화점 방문 예측용 특성
-        store_feature_values = [
-            user_input["age"],
-            user_input["gender"],
-            "00~06", # 임시값 또는 사용자 입력 추가 필요 (TIME_SLOT)
-            "주중",   # 임시값 또는 사용자 입력 추가 필요 (WEEKDAY_WEEKEND)
-            user_input["type"] # 고객 형태를 라이프스타일로 사용 (가정)
-        ]
-        processed_store = []
-        store_cols = ['AGE_GROUP', 'GENDER', 'TIME_SLOT', 'WEEKDAY_WEEKEND', 'LIFESTYLE']
-        for i, col in enumerate(store_cols):
-            try:
-                # 학습 시 사용된 인코더로 변환
-                processed_store.append(self.store_encoders[col].transform([store_feature_values[i]])[0])
-            except ValueError:
-                # 모르는 값(새로운 카테고리) 처리: 예를 들어 0 또는 다른 대표값 할당
-                # 또는 에러 발생시키기: st.error(f"Unknown value '{store_feature_values[i]}' for feature '{col}'")
-                print(f"Warning: Unknown value '{store_feature_values[i]}' for store feature '{col}'. Using 0.")
-                processed_store.append(0)
-            except KeyError:
-                # 인코더 자체가 없는 경우 (학습 실패 시 발생 가능)
-                print(f"Error: Encoder for store feature '{col}' not found. Check model training.")
-                st.error(f"ML 모델 오류: '{col}' 특징에 대한 인코더를 찾을 수 없습니다.")
-                # 이 경우 예측 중단 또는 기본값 사용
-                processed_store.append(0) # 예시: 기본값 사용
-
-        # 지출 예측용 특성
-        spending_feature_values = [
-            user_input["age"],
-            user_input["gender"],
-            "00~06", # 임시값
-            "주중",   # 임시값
-            user_input["type"], # 고객 형태를 라이프스타일로 사용 (가정)
-            1        # 임시값 또는 사용자 입력 추가 필요 (CARD_TYPE, 예: 개인=1)
-        ]
-        processed_spending = []
-        spending_cols = ['AGE_GROUP', 'GENDER', 'TIME_SLOT', 'WEEKDAY_WEEKEND', 'LIFESTYLE', 'CARD_TYPE']
-        for i, col in enumerate(spending_cols):
-            try:
-                processed_spending.append(self.spending_encoders[col].transform([spending_feature_values[i]])[0])
-            except ValueError:
-                print(f"Warning: Unknown value '{spending_feature_values[i]}' for spending feature '{col}'. Using 0.")
-                processed_spending.append(0)
-            except KeyError:
-                print(f"Error: Encoder for spending feature '{col}' not found. Check model training.")
-                st.error(f"ML 모델 오류: '{col}' 특징에 대한 인코더를 찾을 수 없습니다.")
-                processed_spending.append(0)
-
-        return processed_store, processed_spending 
\ No newline at end of file
+        values = {
+            "AGE_GROUP": user_input["age"],
+            "GENDER": user_input["gender"],
+            "TIME_SLOT": DEFAULT_TIME_SLOT, # 임시값 또는 사용자 입력 추가 필요 (TIME_SLOT)
+            "WEEKDAY_WEEKEND": DEFAULT_WEEKDAY_WEEKEND, # 임시값 또는 사용자 입력 추가 필요 (WEEKDAY_WEEKEND)
+            "LIFESTYLE": user_input["type"], # 고객 형태를 라이프스타일로 사용 (가정)
+            "CARD_TYPE": DEFAULT_CARD_TYPE, # 임시값 또는 사용자 입력 추가 필요 (CARD_TYPE, 예: 개인=1)
+        }
+        # 모르는 값(새로운 카테고리)은 인코더의 unknown 코드로 변환됨
+        for col, value in self.encoder.unknown_values(values, SPENDING_FEATURES):
+            print(f"Warning: Unknown value '{value}' for feature '{col}'. Using unknown bucket.")
+
+        processed_spending = self.encoder.transform_row(values, SPENDING_FEATURES)
+        processed_store = processed_spending[:len(STORE_FEATURES)]
+        return processed_store, processed_spending
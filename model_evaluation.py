@@ -0,0 +1,169 @@
+"""
+학습/홀드아웃 분할과 홀드아웃 점수 (엔진 벤치마크와 재학습 스케줄러가 같은 기준으로 모델을 비교).
+
+학습 데이터는 피처 조합별 집계 행이므로 원본 행 단위로 나눌 수 없습니다.
+    방문: 셀 행 수를 이항 분할 = 원본 행을 무작위로 떼어 낸 것과 같음
+    지출: 셀(피처 조합) 단위 분할 = 처음 보는 조합에 대한 일반화 성능
+월별로 받은 집계(by_partition)는 partition_holdout 으로 새 월의 행에서만 시험 데이터를 떼어 낼 수 있습니다
+(이미 서비스 중인 모델이 학습하지 않은 데이터로 비교 — retrain_scheduler).
+교차 검증(model_tuning)은 같은 방식으로 k 개 폴드로 나눕니다 (kfold_split).
+
+점수 (낮을수록 좋은 것은 logloss/rmse)
+    store_acc        방문 백화점 정확도 (방문 수 가중)
+    store_logloss    로그 손실 (방문 수 가중)
+    spend_rmse       원본 행 기준 지출 RMSE (셀의 합계/제곱합으로 계산)
+"""
+import numpy as np
+import pandas as pd
+
+from model import DepartmentStorePredictor, SPENDING_FEATURES, STORE_FEATURES
+from snowflake_data_setting.catalog import get_catalog
+from snowflake_data_setting.data_sources import get_data_source
+from snowflake_data_setting.pipeline import PARTITION_COLUMN
+
+_SUM_COLUMNS = ("ROW_COUNT", "SALES_SUM", "SALES_SUM_SQ")
+_MIN_PROB = 1e-15
+
+
+def load_training_data(by_partition: bool = False):
+    """
+    (방문 집계, 지출 집계). 모델 학습과 같은 쿼리/집계 테이블을 사용합니다.
+    by_partition 이면 월(PARTITION_COLUMN)별로 나눠 받고, 월 컬럼이 없는 원천은 월 구분 없이 받습니다.
+    """
+    predictor = DepartmentStorePredictor(train=False)
+    predictor.source = get_data_source()
+    predictor.source.connect()
+    if not by_partition:
+        predictor._load_data()
+        return predictor.dep_data, predictor.sales_data
+
+    frames = []
+    for load in (predictor._load_store_data, predictor._load_sales_data):
+        df = load((PARTITION_COLUMN,))
+        frames.append(df if not df.empty else load())
+    return tuple(frames)
+
+
+def collapse_partitions(df):
+    """월 컬럼을 없애고 같은 피처 조합의 행 수/합계를 합칩니다 (모델 학습 입력 형태)."""
+    if PARTITION_COLUMN not in df.columns:
+        return df
+    keys = [c for c in df.columns if c not in _SUM_COLUMNS and c != PARTITION_COLUMN]
+    return df.drop(columns=PARTITION_COLUMN).groupby(keys, observed=True, sort=False, as_index=False).sum()
+
+
+def split_rows(df, holdout, rng):
+    # 방문 집계: 셀의 행 수를 이항 분포로 나누면 원본 행을 무작위로 떼어 낸 것과 같음
+    held = rng.binomial(df["ROW_COUNT"].to_numpy(dtype=np.int64), holdout)
+    train, test = df.copy(), df.copy()
+    train["ROW_COUNT"] = df["ROW_COUNT"].to_numpy() - held
+    test["ROW_COUNT"] = held
+    return (train[train["ROW_COUNT"] > 0].reset_index(drop=True),
+            test[test["ROW_COUNT"] > 0].reset_index(drop=True))
+
+
+def split_cells(df, holdout, rng):
+    # 지출 집계: 셀 안 개별 매출값이 없으므로 셀(피처 조합) 단위로 분할 → 처음 보는 조합에 대한 일반화 성능
+    mask = rng.random(len(df)) < holdout
+    return df[~mask].reset_index(drop=True), df[mask].reset_index(drop=True)
+
+
+def partition_holdout(df, partitions, holdout, rng, split):
+    """
+    partitions(월 값 목록)에 속한 행에서만 holdout 비율을 split(split_rows / split_cells)으로 떼어
+    (월을 합친 학습 데이터, 시험 데이터)를 반환합니다. 월 컬럼이 없거나, 해당 월의 행이 없거나,
+    새 월이 작아 시험 데이터가 비면 None (점수를 계산할 수 없음 → 무작위 홀드아웃 사용).
+    """
+    if PARTITION_COLUMN not in df.columns or not partitions:
+        return None
+    is_new = df[PARTITION_COLUMN].astype(str).isin([str(p) for p in partitions]).to_numpy()
+    if not is_new.any():
+        return None
+    new_train, test = split(df[is_new].reset_index(drop=True), holdout, rng)
+    if test.empty:
+        return None
+    train = pd.concat([df[~is_new], new_train], ignore_index=True)
+    return collapse_partitions(train), test
+
+
+def holdout_split(dep_data, sales_data, holdout, seed):
+    """(dep_train, dep_test, sales_train, sales_test). 같은 seed 면 항상 같은 분할입니다."""
+    rng = np.random.default_rng(seed)
+    dep_train, dep_test = split_rows(dep_data, holdout, rng)
+    sales_train, sales_test = split_cells(sales_data, holdout, rng)
+    return dep_train, dep_test, sales_train, sales_test
+
+
+def kfold_split(dep_data, sales_data, k, seed) -> list:
+    """
+    [(dep_train, dep_test, sales_train, sales_test)] × k.
+    방문은 셀 행 수를 k 개로 다항 분할(원본 행의 k-fold), 지출은 셀을 k 개 폴드 중 하나에 배정합니다.
+    """
+    rng = np.random.default_rng(seed)
+    counts = dep_data["ROW_COUNT"].to_numpy(dtype=np.int64)
+    remaining = counts.copy()
+    held = []
+    for i in range(k):
+        # 남은 행을 남은 폴드 수로 나눠 차례로 떼어 내면 폴드별 행 수가 다항 분포를 따름
+        fold = remaining if i == k - 1 else rng.binomial(remaining, 1 / (k - i))
+        remaining = remaining - fold
+        held.append(fold)
+    cell_fold = rng.integers(0, k, len(sales_data))
+
+    folds = []
+    for i in range(k):
+        dep_train, dep_test = dep_data.copy(), dep_data.copy()
+        dep_train["ROW_COUNT"] = counts - held[i]
+        dep_test["ROW_COUNT"] = held[i]
+        folds.append((
+            dep_train[dep_train["ROW_COUNT"] > 0].reset_index(drop=True),
+            dep_test[dep_test["ROW_COUNT"] > 0].reset_index(drop=True),
+            sales_data[cell_fold != i].reset_index(drop=True),
+            sales_data[cell_fold == i].reset_index(drop=True),
+        ))
+    return folds
+
+
+def store_scores(probs, classes, labels, weights) -> dict:
+    """
+    방문 모델 점수 (store_acc, store_logloss). 모델이 학습하지 않은 백화점(클래스)의 방문은
+    틀린 예측(확률 _MIN_PROB)으로 계산하므로 클래스 구성이 다른 모델끼리도 비교할 수 있습니다.
+    """
+    label_index = pd.Series(labels).map({str(c): i for i, c in enumerate(classes)}).to_numpy(dtype=float)
+    known = ~np.isnan(label_index)
+    index = np.where(known, label_index, 0).astype(int)
+    weights = np.asarray(weights, dtype=float)
+    correct = known & (probs.argmax(axis=1) == index)
+    true_probs = np.where(known, probs[np.arange(len(probs)), index], 0.0)
+    true_probs = np.clip(true_probs, _MIN_PROB, 1.0)
+    return {
+        "store_acc": float(np.sum(weights * correct) / weights.sum()),
+        "store_logloss": float(-np.sum(weights * np.log(true_probs)) / weights.sum()),
+    }
+
+
+def spending_rmse(pred, n, total, total_sq) -> float:
+    """셀의 행 수/매출 합계/제곱합으로 계산한 원본 행 기준 지출 RMSE."""
+    # 셀 안 원본 행들의 제곱오차 합 = Σy² - 2·pred·Σy + n·pred²
+    squared_error = np.maximum(np.sum(total_sq - 2 * pred * total + n * pred ** 2), 0.0)
+    return float(np.sqrt(squared_error / np.sum(n)))
+
+
+def store_labels(dep_data) -> np.ndarray:
+    """방문 집계의 정답 라벨 (카탈로그 표시 이름, 학습과 같은 변환)."""
+    return dep_data["DEP_NAME"].map(get_catalog().canonical_store).astype(str).to_numpy(dtype=str)
+
+
+def score_predictor(predictor, dep_test, sales_test) -> dict:
+    """학습된 predictor 의 홀드아웃 점수 (store_acc, store_logloss, spend_rmse)."""
+    store_X = predictor.encoder.transform(dep_test, STORE_FEATURES)
+    scores = store_scores(
+        predictor.store_model.predict_proba(store_X), predictor.store_model.classes_,
+        store_labels(dep_test), dep_test["ROW_COUNT"],
+    )
+    spending_X = predictor.encoder.transform(sales_test, SPENDING_FEATURES)
+    scores["spend_rmse"] = spending_rmse(
+        predictor.spending_model.predict(spending_X), sales_test["ROW_COUNT"].to_numpy(dtype=float),
+        sales_test["SALES_SUM"].to_numpy(dtype=float), sales_test["SALES_SUM_SQ"].to_numpy(dtype=float),
+    )
+    return scores
@@ -0,0 +1,407 @@
+import hashlib
+import json
+import os
+import shutil
+import struct
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+import single_flight
+
+try:
+    import fcntl # 프로세스 간 학습 잠금 (POSIX)
+except ImportError:
+    fcntl = None
+
+# 아티팩트 포맷 버전: 피처 구성/인코더 형식이 바뀌면 올려서 기존 아티팩트를 무효화
+MODEL_VERSION = 3
+
+ARTIFACT_DIR = os.getenv("MODEL_ARTIFACT_DIR", "artifacts")
+ARTIFACT_FILE = "department_store_predictor.joblib"
+METADATA_FILE = "department_store_predictor.json"
+# 포레스트 엔진의 모델을 NumPy 노드 배열로 펼친 추론 전용 파일 (sklearn 없이 로드)
+# 헤더(JSON) 뒤에 배열을 정렬된 위치에 그대로 이어 붙인 형식 → 워커 프로세스들이 읽기 전용 메모리 매핑으로 공유
+COMPILED_FILE = "department_store_predictor.flat.bin"
+COMPILED_MAGIC = b"DSPFLAT1"
+_ALIGN = 64
+
+# attach: 워커는 학습하지 않고 다른 프로세스(python model_store.py)가 만든 아티팩트가 생길 때까지 기다려 연결만 함
+SERVING_MODE = os.getenv("MODEL_SERVING_MODE", "train")
+ATTACH_POLL_SECONDS = float(os.getenv("MODEL_ATTACH_POLL_SECONDS", "5"))
+TRAINING_LOCK_FILE = ".training.lock"
+
+# 저장할 때마다 versions/<버전>/ 에 새로 쓰고, 서비스할 버전 이름을 CURRENT 파일 하나로 가리킴
+# → CURRENT 를 os.replace 로 바꾸는 순간 세 파일(joblib/json/flat.bin)이 한 번에 교체됨 (승격)
+VERSIONS_DIR = "versions"
+CURRENT_FILE = "CURRENT"
+# 이전 버전을 매핑해 쓰고 있는 워커가 있을 수 있으므로 최근 몇 개는 남겨 둠
+KEEP_VERSIONS = int(os.getenv("MODEL_KEEP_VERSIONS", "3"))
+
+
+def compute_data_fingerprint(*frames: pd.DataFrame) -> str:
+    """
+    학습 데이터프레임 내용을 해시하여 데이터 지문(fingerprint)을 만듭니다.
+    같은 데이터로 학습한 모델은 항상 같은 지문을 가집니다.
+    """
+    digest = hashlib.sha256()
+    for frame in frames:
+        digest.update(",".join(map(str, frame.columns)).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(frame, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+def _write_packed(path: str, meta: dict, arrays: dict):
+    # [MAGIC][헤더 길이 8바이트][헤더 JSON][배열 0][배열 1]... (각 배열은 _ALIGN 바이트 경계에서 시작)
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        array = np.asarray(array) # ascontiguousarray 는 0차원 배열을 1차원으로 바꾸므로 사용하지 않음
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps({"meta": meta, "arrays": layout}, ensure_ascii=False).encode("utf-8")
+    data_start = -(-(len(COMPILED_MAGIC) + 8 + len(header)) // _ALIGN) * _ALIGN
+
+    with open(f"{path}.tmp", "wb") as f:
+        f.write(COMPILED_MAGIC + struct.pack("<Q", len(header)) + header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(np.asarray(array).tobytes(order="C"))
+        f.truncate(data_start + offset)
+    os.replace(f"{path}.tmp", path)
+
+
+def _read_packed(path: str, mmap_mode: str = "r"):
+    """(meta, {이름: 배열}). mmap_mode 가 None 이면 메모리로 읽고, 아니면 파일을 매핑한 읽기 전용 배열을 반환합니다."""
+    with open(path, "rb") as f:
+        if f.read(len(COMPILED_MAGIC)) != COMPILED_MAGIC:
+            raise ValueError(f"컴파일된 모델 파일 형식이 아닙니다: {path}")
+        (header_len,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_len).decode("utf-8"))
+    data_start = -(-(len(COMPILED_MAGIC) + 8 + header_len) // _ALIGN) * _ALIGN
+
+    if mmap_mode is None:
+        with open(path, "rb") as f:
+            buffer = np.frombuffer(f.read(), dtype=np.uint8)
+    else:
+        buffer = np.memmap(path, dtype=np.uint8, mode=mmap_mode)
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        start = data_start + spec["offset"]
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        arrays[name] = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+    return header["meta"], arrays
+
+
+def current_version(artifact_dir: str = None):
+    """CURRENT 가 가리키는 버전 이름 (버전 디렉터리를 쓰기 전의 아티팩트면 None)."""
+    try:
+        with open(os.path.join(artifact_dir or ARTIFACT_DIR, CURRENT_FILE), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def model_dir(artifact_dir: str = None) -> str:
+    """서비스 중인 모델 파일이 있는 디렉터리 (CURRENT 가 없으면 artifact_dir 자체)."""
+    artifact_dir = artifact_dir or ARTIFACT_DIR
+    version = current_version(artifact_dir)
+    return os.path.join(artifact_dir, VERSIONS_DIR, version) if version else artifact_dir
+
+
+def promote_version(artifact_dir: str, version: str):
+    """
+    versions/<version> 을 서비스 버전으로 원자적으로 승격하고 오래된 버전을 정리합니다.
+    이미 불러온 워커는 기존 파일을 계속 사용하고, 새로 불러오는 쪽은 새 버전만 봅니다.
+    """
+    artifact_dir = artifact_dir or ARTIFACT_DIR
+    path = os.path.join(artifact_dir, CURRENT_FILE)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(f"{path}.tmp", path)
+    print(f"Promoted model version {version}.")
+
+    versions_root = os.path.join(artifact_dir, VERSIONS_DIR)
+    old = sorted(name for name in os.listdir(versions_root) if name != version)
+    for name in old[:max(0, len(old) - (KEEP_VERSIONS - 1))]:
+        shutil.rmtree(os.path.join(versions_root, name), ignore_errors=True)
+
+
+def artifact_path(artifact_dir: str = None) -> str:
+    return os.path.join(model_dir(artifact_dir), ARTIFACT_FILE)
+
+
+def read_metadata(artifact_dir: str = None) -> dict:
+    """
+    아티팩트 본문을 열지 않고 메타데이터(버전, 데이터 지문, 학습 시각)만 읽습니다.
+    아티팩트가 없으면 빈 dict를 반환합니다.
+    """
+    path = os.path.join(model_dir(artifact_dir), METADATA_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_predictor(predictor, artifact_dir: str = None, promote: bool = True) -> str:
+    """
+    학습된 DepartmentStorePredictor의 모델과 인코더를 버전/데이터 지문과 함께 새 버전 디렉터리에 저장합니다.
+    promote 이면 저장이 모두 끝난 뒤 CURRENT 를 바꿔 승격하므로 읽는 쪽은 항상 한 버전의 완전한 파일만 봅니다.
+    promote=False 로 저장한 버전은 promote_version 으로 나중에 승격할 수 있습니다.
+    """
+    import joblib
+
+    if not predictor.is_initialized:
+        raise ValueError("초기화되지 않은 모델은 저장할 수 없습니다.")
+
+    root_dir = artifact_dir or ARTIFACT_DIR
+    version = f"{time.strftime('%Y%m%d-%H%M%S')}-{(predictor.data_fingerprint or '')[:8]}"
+    artifact_dir = os.path.join(root_dir, VERSIONS_DIR, version)
+    os.makedirs(artifact_dir, exist_ok=True)
+
+    metadata = {
+        "version": MODEL_VERSION,
+        "model_version": version,
+        "engine": predictor.engine,
+        "engine_params": predictor.engine_params,
+        "data_fingerprint": predictor.data_fingerprint,
+        "trained_at": predictor.trained_at,
+        "saved_at": time.time(),
+    }
+    payload = {
+        **metadata,
+        "engine": predictor.engine,
+        "stores": predictor.stores,
+        "store_model": predictor.store_model,
+        "spending_model": predictor.spending_model,
+        "encoder": predictor.encoder.to_dict(),
+    }
+
+    path = artifact_path(artifact_dir)
+    tmp_path = f"{path}.tmp"
+    # 압축하지 않아야 load 시 mmap_mode로 numpy 배열을 메모리 매핑할 수 있음
+    joblib.dump(payload, tmp_path)
+    os.replace(tmp_path, path)
+
+    meta_path = os.path.join(artifact_dir, METADATA_FILE)
+    with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    os.replace(f"{meta_path}.tmp", meta_path)
+
+    print(f"Saved model artifact to {path} (fingerprint={predictor.data_fingerprint[:12]}).")
+    export_compiled(predictor, artifact_dir)
+    if promote:
+        promote_version(root_dir, version)
+    return path
+
+
+def export_compiled(predictor, artifact_dir: str = None):
+    """
+    포레스트 엔진(random_forest / flat_forest)의 방문·지출 모델을 FlatForest 배열로 변환해
+    인코더 어휘·메타데이터와 함께 파일 하나로 저장합니다. 결과는 sklearn 과 비트 단위로 같습니다.
+    트리 앙상블이 아닌 엔진이면 저장하지 않고 None을 반환합니다.
+    """
+    from model_engines import compile_forest
+
+    store_forest = compile_forest(predictor.store_model)
+    spending_forest = compile_forest(predictor.spending_model)
+    path = os.path.join(model_dir(artifact_dir), COMPILED_FILE)
+    if store_forest is None or spending_forest is None:
+        # 이전 포레스트 모델의 파일이 남아 있으면 새 아티팩트와 어긋나므로 삭제
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+
+    meta = {
+        "version": MODEL_VERSION,
+        "engine": predictor.engine,
+        "engine_params": predictor.engine_params,
+        "data_fingerprint": predictor.data_fingerprint,
+        "trained_at": predictor.trained_at,
+        "stores": predictor.stores,
+        "encoder": predictor.encoder.to_dict(),
+    }
+    arrays = {**store_forest.to_arrays("store"), **spending_forest.to_arrays("spending")}
+    _write_packed(path, meta, arrays)
+    print(f"Exported compiled forests to {path} ({(store_forest.nbytes + spending_forest.nbytes) / 1e6:.1f}MB).")
+    return path
+
+
+def load_compiled(artifact_dir: str = None, mmap_mode: str = "r"):
+    """
+    export_compiled 로 저장한 파일로 DepartmentStorePredictor를 복원합니다. sklearn/joblib 을 임포트하지 않습니다.
+    노드 배열은 파일을 읽기 전용으로 매핑한 것이라 같은 파일을 여는 워커 프로세스들이 페이지 캐시 한 벌을 공유합니다.
+    파일이 없거나 버전이 맞지 않으면 None을 반환합니다.
+    """
+    from feature_encoder import CategoricalEncoder
+    from flat_forest import FlatForest
+    from model import DepartmentStorePredictor
+    from model_engines import FlatForestModel
+
+    path = os.path.join(model_dir(artifact_dir), COMPILED_FILE)
+    if not os.path.exists(path):
+        return None
+
+    meta, arrays = _read_packed(path, mmap_mode)
+    if meta.get("version") != MODEL_VERSION:
+        print(f"Compiled model version mismatch: {meta.get('version')} != {MODEL_VERSION}")
+        return None
+
+    predictor = DepartmentStorePredictor(train=False, engine=meta["engine"])
+    predictor.engine_params = meta.get("engine_params", {})
+    predictor.stores = meta["stores"]
+    predictor.store_model = FlatForestModel("classifier", FlatForest.from_arrays(arrays, "store"))
+    predictor.spending_model = FlatForestModel("regressor", FlatForest.from_arrays(arrays, "spending"))
+    predictor.encoder = CategoricalEncoder.from_dict(meta["encoder"])
+    predictor.data_fingerprint = meta["data_fingerprint"]
+    predictor.trained_at = meta["trained_at"]
+    predictor.is_initialized = True
+    print(f"Loaded compiled model from {path} (fingerprint={predictor.data_fingerprint[:12]}).")
+    return predictor
+
+
+def load_predictor(artifact_dir: str = None, mmap_mode: str = "r", prefer_compiled: bool = True):
+    """
+    저장된 아티팩트로 DepartmentStorePredictor를 복원합니다. Snowflake에는 접속하지 않습니다.
+    prefer_compiled 이면 같은 학습 결과의 펼친 포레스트 파일(COMPILED_FILE)을 먼저 사용합니다 (결과 동일, 더 빠름).
+    아티팩트가 없거나 버전이 맞지 않으면 None을 반환합니다.
+    """
+    from model_engines import DEFAULT_ENGINE, engine_params
+
+    # 읽는 도중 승격되어도 한 버전의 파일만 쓰도록 디렉터리를 먼저 고정
+    artifact_dir = model_dir(artifact_dir)
+    path = artifact_path(artifact_dir)
+    if not os.path.exists(path):
+        print(f"Model artifact not found: {path}")
+        return None
+
+    if prefer_compiled:
+        metadata = read_metadata(artifact_dir)
+        compiled = load_compiled(artifact_dir, mmap_mode)
+        if (compiled is not None and compiled.engine == DEFAULT_ENGINE
+                and compiled.engine_params == engine_params(DEFAULT_ENGINE)
+                and compiled.data_fingerprint == metadata.get("data_fingerprint")
+                and compiled.trained_at == metadata.get("trained_at")):
+            return compiled
+
+    import joblib
+    from feature_encoder import CategoricalEncoder
+    from model import DepartmentStorePredictor
+
+    payload = joblib.load(path, mmap_mode=mmap_mode)
+    if payload.get("version") != MODEL_VERSION:
+        print(f"Model artifact version mismatch: {payload.get('version')} != {MODEL_VERSION}")
+        return None
+
+    if payload.get("engine") != DEFAULT_ENGINE:
+        print(f"Model artifact engine mismatch: {payload.get('engine')} != {DEFAULT_ENGINE}")
+        return None
+
+    # MODEL_ENGINE_PARAMS 로 엔진 설정을 바꾸면 이전 설정으로 학습한 아티팩트는 사용하지 않음
+    if payload.get("engine_params", {}) != engine_params(DEFAULT_ENGINE):
+        print(f"Model artifact engine params mismatch: {payload.get('engine_params', {})} != {engine_params(DEFAULT_ENGINE)}")
+        return None
+
+    predictor = DepartmentStorePredictor(train=False, engine=payload["engine"])
+    predictor.engine_params = payload.get("engine_params", {})
+    predictor.stores = payload["stores"]
+    predictor.store_model = payload["store_model"]
+    predictor.spending_model = payload["spending_model"]
+    predictor.encoder = CategoricalEncoder.from_dict(payload["encoder"])
+    predictor.data_fingerprint = payload["data_fingerprint"]
+    predictor.trained_at = payload["trained_at"]
+    predictor.is_initialized = True
+    print(f"Loaded model artifact from {path} (fingerprint={predictor.data_fingerprint[:12]}).")
+    return predictor
+
+
+def attach_predictor(artifact_dir: str = None, timeout: float = None, poll_seconds: float = None):
+    """
+    학습하지 않고 아티팩트가 생길 때까지 기다렸다가 불러옵니다 (MODEL_SERVING_MODE=attach 워커용).
+    timeout 안에 아티팩트가 없으면 None을 반환합니다.
+    """
+    poll_seconds = poll_seconds or ATTACH_POLL_SECONDS
+    deadline = None if timeout is None else time.time() + timeout
+    waiting = False
+    while True:
+        if os.path.exists(artifact_path(artifact_dir)):
+            predictor = load_predictor(artifact_dir)
+            if predictor is not None:
+                return predictor
+        if deadline is not None and time.time() >= deadline:
+            return None
+        if not waiting:
+            print(f"Waiting for model artifact in {artifact_dir or ARTIFACT_DIR} (run: python model_store.py).")
+            waiting = True
+        time.sleep(poll_seconds)
+
+
+@contextmanager
+def training_lock(artifact_dir: str = None):
+    """
+    같은 아티팩트 디렉터리를 쓰는 프로세스들 사이의 학습 잠금. 다른 프로세스가 학습 중이면 끝날 때까지 기다립니다.
+    fcntl 이 없는 환경에서는 잠그지 않습니다.
+    """
+    if fcntl is None:
+        yield
+        return
+    artifact_dir = artifact_dir or ARTIFACT_DIR
+    os.makedirs(artifact_dir, exist_ok=True)
+    with open(os.path.join(artifact_dir, TRAINING_LOCK_FILE), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def load_or_train(artifact_dir: str = None, retrain: bool = False):
+    """
+    아티팩트가 있으면 불러오고, 없으면(또는 retrain=True) 한 번 학습한 뒤 저장합니다.
+    MODEL_SERVING_MODE=attach 이면 학습하지 않고 attach_predictor 로 저장된 아티팩트에 연결만 합니다.
+    같은 프로세스에서 동시에 호출되면 single_flight 로 한 번만 실행하고, 다른 프로세스가 학습 중이면
+    그 학습이 끝나기를 기다렸다가 결과 아티팩트를 사용합니다.
+    """
+    key = (os.path.abspath(artifact_dir or ARTIFACT_DIR), retrain)
+    return single_flight.group("model_load").do(key, _load_or_train, artifact_dir, retrain)
+
+
+def _load_or_train(artifact_dir: str = None, retrain: bool = False):
+    from model import DepartmentStorePredictor
+
+    if SERVING_MODE == "attach":
+        return attach_predictor(artifact_dir)
+
+    if not retrain:
+        predictor = load_predictor(artifact_dir)
+        if predictor is not None:
+            return predictor
+
+    saved_at = read_metadata(artifact_dir).get("saved_at")
+    with training_lock(artifact_dir):
+        # 잠금을 기다리는 동안 다른 프로세스가 새 아티팩트를 저장했으면 다시 학습하지 않고 그것을 사용
+        if read_metadata(artifact_dir).get("saved_at") != saved_at:
+            predictor = load_predictor(artifact_dir)
+            if predictor is not None:
+                print("Using model artifact trained concurrently by another process.")
+                return predictor
+
+        predictor = DepartmentStorePredictor()
+        if predictor.is_initialized:
+            save_predictor(predictor, artifact_dir)
+    if predictor.is_initialized:
+        # 학습한 모델 객체 대신 방금 저장한 파일을 매핑해 사용 → 학습한 워커도 다른 워커와 같은 페이지를 공유하고
+        # 학습 중 만든 힙 메모리는 해제됨
+        attached = load_predictor(artifact_dir)
+        if attached is not None and attached.data_fingerprint == predictor.data_fingerprint:
+            return attached
+    return predictor
+
+
+if __name__ == "__main__":
+    # 배포 전에 아티팩트를 미리 만들어 두기: python model_store.py [--retrain]
+    import sys
+
+    load_or_train(retrain="--retrain" in sys.argv)
@@ -0,0 +1,318 @@
+"""
+엔진 설정 교차 검증 탐색 (방문 분류기 store / 지출 회귀기 spending).
+
+학습 데이터를 한 번 읽어 k 개 폴드로 나누고(model_evaluation.kfold_split), 폴드마다 인코딩한 배열을
+<캐시 디렉터리>/<데이터 지문>-k<k>-s<seed>/fold<i>/*.npy 로 저장합니다. 같은 데이터와 폴드 설정으로 다시 실행하면
+캐시를 그대로 쓰고, 작업 프로세스는 이 파일을 메모리 매핑해 읽으므로 시도(trial)마다 다시 인코딩하지 않습니다.
+
+시도 = (모델, 엔진, 설정). 프로세스 풀(기본: 사용 가능한 CPU 수)이 시도마다 k 개 폴드를 학습/평가하고,
+마지막 폴드의 모델을 서비스 형태(포레스트는 FlatForest)로 바꿔 크기와 단건 예측 지연을 잽니다.
+작업 프로세스 하나가 코어 하나를 쓰므로 지연은 다른 시도와 동시에 잰 값입니다.
+
+리더보드 (--output, CSV)
+    model             store / spending
+    engine, params    엔진과 설정 (JSON)
+    score, score_std  폴드 평균/표준편차 (store: store_logloss, spending: spend_rmse — 낮을수록 좋음)
+    store_acc         방문 정확도 (store 만)
+    fit_s             폴드 평균 학습 시간
+    size_kb           서비스 형태 모델 크기
+    p50_us / p99_us   단건(1행) 예측 지연
+    meets_bar         정확도 기준 통과 여부 (--store-bar / --spending-bar, 없으면 모델별 최고 점수 × (1 + --tolerance))
+
+엔진마다 기준을 통과한 설정 중 가장 작고(size_kb) 빠른(p99_us) 것을 골라 --write-params 파일에 씁니다.
+MODEL_ENGINE_PARAMS 로 이 파일을 지정하면 학습(model_store.py, retrain_scheduler.py)이 그 설정을 사용합니다.
+
+    DATA_SOURCE=local LOCAL_DATA_DIR=local_data python model_tuning.py
+    python model_tuning.py --engines random_forest,lookup_table --folds 5 --max-trials 20 --jobs 8
+    python model_tuning.py --store-bar 1.45 --spending-bar 140000 --write-params engine_params.json
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import pickle
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from model_store import ARTIFACT_DIR
+
+CACHE_DIR = os.getenv("TUNING_CACHE_DIR", os.path.join(ARTIFACT_DIR, "tuning_cache"))
+
+# 엔진별 탐색 범위 (방문/지출 모델 공통, 각 모델을 따로 탐색)
+# flat_forest 는 random_forest 와 같은 모델이므로 따로 탐색하지 않고 같은 설정을 씀
+SEARCH_SPACE = {
+    "random_forest": {
+        "n_estimators": [25, 50, 100, 200],
+        "max_depth": [None, 8, 16],
+        "min_samples_leaf": [1, 5, 20],
+    },
+    "hist_gbm": {
+        "learning_rate": [0.05, 0.1, 0.2],
+        "max_iter": [50, 100, 200],
+        "max_leaf_nodes": [15, 31],
+    },
+    "lookup_table": {
+        "smoothing": [0.1, 0.3, 1.0, 3.0, 10.0, 30.0],
+    },
+}
+SAME_PARAMS = {"flat_forest": "random_forest"}
+MODEL_METRICS = {"store": "store_logloss", "spending": "spend_rmse"}
+
+
+def available_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def search_trials(engines, max_trials: int = None, seed: int = 0) -> list:
+    """[(모델, 엔진, 설정)]. 엔진·모델별 격자가 max_trials 보다 크면 그중 무작위로 max_trials 개만 시도합니다."""
+    rng = np.random.default_rng(seed)
+    trials = []
+    for engine in engines:
+        space = SEARCH_SPACE[SAME_PARAMS.get(engine, engine)]
+        grid = [dict(zip(space, values)) for values in itertools.product(*space.values())]
+        if max_trials and len(grid) > max_trials:
+            grid = [grid[i] for i in sorted(rng.choice(len(grid), max_trials, replace=False))]
+        trials += [(model, engine, params) for model in MODEL_METRICS for params in grid]
+    return trials
+
+
+def build_fold_cache(dep_data, sales_data, folds: int, seed: int, cache_root: str = None) -> list:
+    """
+    폴드별 인코딩 배열을 캐시에 저장하고 폴드 디렉터리 목록을 반환합니다.
+    같은 데이터 지문/폴드 수/seed 의 캐시가 있으면 다시 만들지 않습니다.
+    """
+    from feature_encoder import CategoricalEncoder
+    from model import SPENDING_FEATURES, STORE_FEATURES
+    from model_evaluation import kfold_split, store_labels
+    from model_store import compute_data_fingerprint
+
+    cache_root = cache_root or CACHE_DIR
+    cache_dir = os.path.join(cache_root, f"{compute_data_fingerprint(dep_data, sales_data)[:16]}-k{folds}-s{seed}")
+    fold_dirs = [os.path.join(cache_dir, f"fold{i}") for i in range(folds)]
+    if os.path.isdir(cache_dir):
+        print(f"Using cached folds in {cache_dir}.")
+        return fold_dirs
+
+    # 임시 디렉터리에 다 쓴 뒤 이름을 바꿔 반쯤 쓴 캐시를 쓰지 않도록 함
+    tmp_dir = f"{cache_dir}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    for i, (dep_train, dep_test, sales_train, sales_test) in enumerate(kfold_split(dep_data, sales_data, folds, seed)):
+        # 학습과 같은 인코딩/타깃 (model.DepartmentStorePredictor._train_models)
+        encoder = CategoricalEncoder().fit([dep_train, sales_train], SPENDING_FEATURES)
+        weights = sales_train["ROW_COUNT"].astype(float)
+        y_spend = (sales_train["SALES_SUM"].astype(float) / weights).fillna(0).replace([np.inf, -np.inf], 0)
+        arrays = {
+            "store_X": encoder.transform(dep_train, STORE_FEATURES),
+            "store_y": store_labels(dep_train),
+            "store_w": dep_train["ROW_COUNT"].to_numpy(dtype=float),
+            "store_X_test": encoder.transform(dep_test, STORE_FEATURES),
+            "store_y_test": store_labels(dep_test),
+            "store_w_test": dep_test["ROW_COUNT"].to_numpy(dtype=float),
+            "spending_X": encoder.transform(sales_train, SPENDING_FEATURES),
+            "spending_y": y_spend.to_numpy(),
+            "spending_w": weights.to_numpy(),
+            "spending_X_test": encoder.transform(sales_test, SPENDING_FEATURES),
+            "spending_n": sales_test["ROW_COUNT"].to_numpy(dtype=float),
+            "spending_total": sales_test["SALES_SUM"].to_numpy(dtype=float),
+            "spending_total_sq": sales_test["SALES_SUM_SQ"].to_numpy(dtype=float),
+        }
+        fold_dir = os.path.join(tmp_dir, f"fold{i}")
+        os.makedirs(fold_dir)
+        for name, array in arrays.items():
+            np.save(os.path.join(fold_dir, f"{name}.npy"), array)
+    try:
+        os.replace(tmp_dir, cache_dir)
+    except OSError:
+        # 다른 실행이 같은 캐시를 먼저 만들었음
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    print(f"Cached {folds} encoded folds in {cache_dir}.")
+    return fold_dirs
+
+
+def _load_fold(fold_dir: str) -> dict:
+    return {
+        name[:-len(".npy")]: np.load(os.path.join(fold_dir, name), mmap_mode="r")
+        for name in os.listdir(fold_dir) if name.endswith(".npy")
+    }
+
+
+def _init_worker():
+    # 작업 프로세스 하나가 코어 하나만 쓰도록 (hist_gbm 의 OpenMP 스레드가 풀 크기만큼 겹치지 않게)
+    for name in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[name] = "1"
+
+
+def run_trial(fold_dirs: list, model: str, engine: str, params: dict, latency_rows: int) -> dict:
+    """(작업 프로세스) 설정 하나를 모든 폴드로 학습/평가하고 크기와 단건 지연을 잽니다."""
+    from model_engines import build_engine, compile_forest
+    from model_evaluation import spending_rmse, store_scores
+
+    scores, fit_seconds = [], []
+    for fold_dir in fold_dirs:
+        data = _load_fold(fold_dir)
+        estimator = build_engine(engine, {model: params})[0 if model == "store" else 1]
+        started = time.perf_counter()
+        estimator.fit(data[f"{model}_X"], data[f"{model}_y"], sample_weight=data[f"{model}_w"])
+        fit_seconds.append(time.perf_counter() - started)
+        X_test = data[f"{model}_X_test"]
+        if model == "store":
+            scores.append(store_scores(estimator.predict_proba(X_test), estimator.classes_,
+                                       data["store_y_test"], data["store_w_test"]))
+        else:
+            scores.append({"spend_rmse": spending_rmse(estimator.predict(X_test), data["spending_n"],
+                                                       data["spending_total"], data["spending_total_sq"])})
+
+    # 서비스에서 쓰는 형태로 크기/지연 측정 (포레스트는 펼친 배열, 그 외는 pickle)
+    compiled = compile_forest(estimator)
+    serving = compiled if compiled is not None else estimator
+    size_bytes = compiled.nbytes if compiled is not None else len(pickle.dumps(estimator, protocol=pickle.HIGHEST_PROTOCOL))
+    predict = serving.predict_proba if model == "store" else serving.predict
+    rows = np.asarray(X_test[np.arange(latency_rows) % len(X_test)])
+    samples = []
+    for row in rows:
+        t0 = time.perf_counter()
+        predict(row[np.newaxis, :])
+        samples.append(time.perf_counter() - t0)
+
+    values = np.array([score[MODEL_METRICS[model]] for score in scores])
+    return {
+        "model": model,
+        "engine": engine,
+        "params": json.dumps(params, sort_keys=True),
+        "score": float(values.mean()),
+        "score_std": float(values.std()),
+        "store_acc": float(np.mean([score["store_acc"] for score in scores])) if model == "store" else np.nan,
+        "fit_s": float(np.mean(fit_seconds)),
+        "size_kb": size_bytes / 1024,
+        "p50_us": float(np.percentile(samples, 50) * 1e6) if samples else np.nan,
+        "p99_us": float(np.percentile(samples, 99) * 1e6) if samples else np.nan,
+        "folds": len(fold_dirs),
+    }
+
+
+def run_search(fold_dirs: list, trials: list, jobs: int, latency_rows: int) -> list:
+    # 작업 프로세스는 폴드 캐시만 매핑해 읽으므로 부모의 데이터 소스 연결/스레드를 물려받지 않도록 spawn 사용
+    context = multiprocessing.get_context("spawn")
+    results = []
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context, initializer=_init_worker) as executor:
+        futures = {executor.submit(run_trial, fold_dirs, *trial, latency_rows): trial for trial in trials}
+        for done, future in enumerate(as_completed(futures), 1):
+            model, engine, params = futures[future]
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"Trial failed ({model}, {engine}, {params}): {e}")
+            if done % max(1, len(trials) // 10) == 0 or done == len(trials):
+                print(f"  {done}/{len(trials)} trials ({time.perf_counter() - started:.0f}s)")
+    return results
+
+
+def leaderboard(results: list, bars: dict = None, tolerance: float = 0.02) -> pd.DataFrame:
+    """시도 결과 표. bars({모델: 최대 점수})가 없는 모델은 최고 점수 × (1 + tolerance) 를 기준으로 씁니다."""
+    board = pd.DataFrame(results)
+    if board.empty:
+        return board
+    board = board.sort_values(["model", "score"]).reset_index(drop=True)
+    limits = {
+        model: (bars or {}).get(model) or group["score"].min() * (1 + tolerance)
+        for model, group in board.groupby("model")
+    }
+    board["bar"] = board["model"].map(limits)
+    board["meets_bar"] = board["score"] <= board["bar"]
+    return board
+
+
+def select_params(board: pd.DataFrame) -> dict:
+    """
+    {엔진: {"store": 설정, "spending": 설정}}. 엔진·모델별로 기준을 통과한 설정 중 가장 작고 빠른 것
+    (size_kb, p99_us, score 순). 한 모델이라도 통과한 설정이 없는 엔진은 넣지 않습니다.
+    """
+    selected = {}
+    for engine, group in board[board["meets_bar"]].groupby("engine"):
+        choice = {}
+        for model in MODEL_METRICS:
+            passing = group[group["model"] == model].sort_values(["size_kb", "p99_us", "score"])
+            if not passing.empty:
+                choice[model] = json.loads(passing.iloc[0]["params"])
+        if len(choice) == len(MODEL_METRICS):
+            selected[engine] = choice
+    for engine, same in SAME_PARAMS.items():
+        if same in selected and engine not in selected:
+            selected[engine] = selected[same]
+    return selected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engines", default=",".join(SEARCH_SPACE), help="쉼표로 구분한 엔진 이름")
+    parser.add_argument("--folds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-trials", type=int, help="엔진·모델별 최대 시도 수 (격자가 더 크면 무작위 선택)")
+    parser.add_argument("--jobs", type=int, help="작업 프로세스 수 (기본: 사용 가능한 CPU 수)")
+    parser.add_argument("--latency-rows", type=int, default=200, help="단건 지연을 잴 예측 횟수")
+    parser.add_argument("--store-bar", type=float, help="방문 모델 기준 (최대 store_logloss)")
+    parser.add_argument("--spending-bar", type=float, help="지출 모델 기준 (최대 spend_rmse)")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="기준을 주지 않은 모델: 최고 점수 대비 허용 비율")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--output", default=os.path.join(ARTIFACT_DIR, "tuning_leaderboard.csv"))
+    parser.add_argument("--write-params", help="엔진별 선택 설정을 저장할 JSON 파일 (MODEL_ENGINE_PARAMS 로 지정)")
+    args = parser.parse_args()
+
+    from model_engines import ENGINES, load_engine_params
+    from model_evaluation import load_training_data
+
+    engines = args.engines.split(",")
+    unknown = [engine for engine in engines if engine not in ENGINES]
+    if unknown:
+        print(f"알 수 없는 엔진: {', '.join(unknown)} (사용 가능: {', '.join(ENGINES)})")
+        return 1
+
+    dep_data, sales_data = load_training_data()
+    if dep_data.empty or sales_data.empty:
+        print("학습 데이터를 읽지 못했습니다.")
+        return 1
+    fold_dirs = build_fold_cache(dep_data, sales_data, args.folds, args.seed, args.cache_dir)
+    del dep_data, sales_data
+
+    jobs = args.jobs or available_cpus()
+    trials = search_trials(engines, args.max_trials, args.seed)
+    print(f"{len(trials)} trials x {args.folds} folds on {jobs} processes")
+    results = run_search(fold_dirs, trials, jobs, args.latency_rows)
+
+    board = leaderboard(results, {"store": args.store_bar, "spending": args.spending_bar}, args.tolerance)
+    if board.empty:
+        print("완료된 시도가 없습니다.")
+        return 1
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    board.to_csv(args.output, index=False)
+    with pd.option_context("display.float_format", "{:,.4f}".format, "display.width", 250,
+                           "display.max_columns", None, "display.max_colwidth", 80):
+        for model, group in board.groupby("model"):
+            print(f"\n[{model}] {MODEL_METRICS[model]} bar={group['bar'].iloc[0]:,.4f}")
+            print(group.drop(columns=["model", "bar"]).head(10).to_string(index=False))
+    print(f"\nLeaderboard written to {args.output} ({len(board)} trials).")
+
+    selected = select_params(board)
+    for engine, params in selected.items():
+        print(f"{engine}: store={params['store']} spending={params['spending']}")
+    if args.write_params and selected:
+        # 이번에 탐색하지 않은 엔진의 기존 설정은 유지
+        params = {**load_engine_params(args.write_params), **selected}
+        with open(f"{args.write_params}.tmp", "w", encoding="utf-8") as f:
+            json.dump(params, f, ensure_ascii=False, indent=2)
+        os.replace(f"{args.write_params}.tmp", args.write_params)
+        print(f"Engine params written to {args.write_params} (set MODEL_ENGINE_PARAMS to use them).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,14 @@
 import streamlit as st
 import os
 from input_form import get_user_input # 경로 수정
-from model import DepartmentStorePredictor # 모델 임포트
-from output_display import display_prediction_results # 경로 수정
-# Snowpark 쿼리 함수 임포트 경로 수정
-from snowflake_data_setting.snowpark_queries import get_store_score, get_estimated_spending
-import pandas as pd # pandas 임포트 추가
+from predictor_registry import get_registry # 프로세스 공유 모델 보관소
+from analysis_tasks import CALL_TIMEOUTS, run_analysis # 세 백엔드 호출 동시 실행
+from tracing import span # 요청 단위 추적 (진단 페이지에서 단계별 지연 시간 확인)
+from output_display import (
+    display_results_header, display_ml_store_section, display_location_store_section,
+    display_ml_spending_section, display_location_spending_section, display_customer_grade,
+    display_additional_info,
+)
 
 
 # 사이드바 제거
@@ -20,7 +23,74 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+def show_model_status(registry):
+    # 모델 준비 상태/나이를 스피너 대신 한 줄로 표시
+    status = registry.status()
+    if status["ready"]:
+        age_min = int((status["model_age_seconds"] or 0) // 60)
+        st.caption(f"🤖 예측 모델 준비 완료 (학습 후 {age_min}분 경과)")
+    elif status["state"] == "failed":
+        st.caption(f"⚠️ 예측 모델을 불러오지 못했습니다: {status['error']}")
+        # 자동 재시도는 RETRY_SECONDS 뒤에만 → 그 전에는 사용자가 직접 다시 시도
+        if st.button("🔄 모델 다시 불러오기"):
+            registry.retry()
+            st.rerun()
+    else:
+        st.caption("⏳ 예측 모델을 준비 중입니다. 위치 기반 분석은 바로 확인할 수 있습니다.")
+
+
+# 호출별로 결과를 그릴 화면 자리와 렌더링 함수
+RESULT_SECTIONS = {
+    "ml": [("ml_store", display_ml_store_section), ("ml_spending", display_ml_spending_section),
+           ("grade", display_customer_grade)],
+    "store_score": [("location_store", display_location_store_section)],
+    "spending": [("location_spending", display_location_spending_section)],
+}
+
+
+def build_result_layout():
+    # 결과 화면 골격을 먼저 그리고, 각 섹션 자리는 st.empty()로 비워 두었다가 결과가 오는 대로 채움
+    display_results_header()
+    st.markdown("### 🏢 백화점 방문 분석")
+    col1, col2 = st.columns(2)
+    slots = {"ml_store": col1.empty(), "location_store": col2.empty()}
+    st.divider()
+
+    st.markdown("### 💰 예상 소비력 분석")
+    col3, col4 = st.columns(2)
+    slots["ml_spending"] = col3.empty()
+    slots["location_spending"] = col4.empty()
+    st.divider()
+
+    slots["grade"] = st.empty()
+    st.divider()
+    display_additional_info()
+
+    for slot in slots.values():
+        slot.info("⏳ 결과를 불러오는 중입니다...")
+    return slots
+
+
+def render_call_result(slots, result):
+    # 시간 초과/오류인 호출은 빈 결과로 그린 뒤 이유를 덧붙임 (다른 섹션은 그대로 표시)
+    value = result.value if result.ok else None
+    for slot_name, render in RESULT_SECTIONS[result.name]:
+        with slots[slot_name].container():
+            render(value)
+            if result.status == "timeout":
+                st.caption(f"⏱️ 응답이 {CALL_TIMEOUTS[result.name]:g}초 안에 오지 않아 이 항목을 건너뛰었습니다. "
+                           "잠시 후 다시 예측하면 결과를 확인할 수 있습니다.")
+            elif result.status == "error":
+                st.caption(f"⚠️ 조회 중 오류가 발생했습니다: {result.error}")
+            elif result.name == "ml" and value is None:
+                st.caption("⏳ 예측 모델이 아직 준비 중입니다. 잠시 후 다시 시도해주세요.")
+
+
 def main():
+    # 직접 이 페이지로 진입한 경우에도 모델 워밍업이 시작되도록 보장
+    registry = get_registry()
+    registry.start()
+
     # 사용자 입력 받기
     user_input = get_user_input()
 
@@ -37,6 +107,7 @@ def main():
             st.switch_page("app.py")
 
     
+    show_model_status(registry)
     st.divider()
     
 
@@ -44,35 +115,12 @@ def main():
     if predict_button_clicked:
         if user_input and user_input.get("residence") and user_input.get("work"): # 거주지/직장 정보 확인
             try:
-                # --- 기존 머신러닝 예측 ---
-                ml_prediction = None
-                with st.spinner('🤖 고객 특성 기반 예측 모델을 실행 중입니다...'): # 스피너 메시지 수정
-                    predictor = DepartmentStorePredictor()
-                    ml_prediction = predictor.predict(user_input)
-
-                # --- Snowpark 위치 기반 분석 ---
-                store_score_df = pd.DataFrame() # 기본 빈 데이터프레임
-                location_based_spending = 0 # 기본값 0
-
-                # get_store_score 호출 (Snowpark 캐싱 데코레이터에 스피너 있음)
-                store_score_df = get_store_score(
-                    res_dong=user_input["residence"],
-                    work_dong=user_input["work"]
-                )
-
-                # get_estimated_spending 호출 (Snowpark 캐싱 데코레이터에 스피너 있음)
-                location_based_spending = get_estimated_spending(
-                    res_dong=user_input["residence"]
-                )
-
-                # --- 결과 표시 ---
                 st.divider() # 입력과 결과 구분선
-                # display_prediction_results 함수에 모든 결과 전달
-                display_prediction_results(
-                    ml_prediction=ml_prediction, # 이름 명확화
-                    store_score_df=store_score_df,
-                    location_based_spending=location_based_spending
-                )
+                with span("analyze.request"):
+                    slots = build_result_layout()
+                    # 모델 예측 / 위치 기반 선호도 / 거주지 소비력을 동시에 실행하고 끝나는 순서대로 표시
+                    # (그리드에 있는 조합은 배열 조회로 바로 끝나고, 그리드 갱신은 백그라운드에서 진행)
+                    run_analysis(user_input, registry, lambda result: render_call_result(slots, result))
 
             except Exception as e:
                 st.error(f"예측/분석 중 오류가 발생했습니다: {e}")
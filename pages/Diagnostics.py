@@ -0,0 +1,122 @@
+import streamlit as st
+import pandas as pd
+import single_flight
+from inference_batcher import BATCHING_ENABLED, get_batcher
+from predictor_registry import get_registry
+from retrain_scheduler import read_state
+from tracing import recent_spans, reset, stage_stats
+from snowflake_data_setting.data_sources import get_data_source
+from snowflake_data_setting.query_cache import query_cache
+from snowflake_data_setting.query_layer import query_stats
+
+
+# 운영자용 진단 페이지 (메뉴에 노출하지 않음, /Diagnostics 로 직접 접속)
+st.markdown("""
+    <style>
+        [data-testid="stSidebar"] { display: none !important; }
+        [data-testid="collapsedControl"] { display: none; }
+        [data-testid="stSidebarNav"] { display: none; }
+        footer { visibility: hidden; }
+        header { visibility: hidden; }
+    </style>
+""", unsafe_allow_html=True)
+
+
+def show_stage_latency():
+    st.markdown("### ⏱️ 단계별 지연 시간")
+    stats = stage_stats()
+    if stats.empty:
+        st.info("아직 기록된 요청이 없습니다. 분석 페이지에서 예측을 실행한 뒤 새로고침하세요.")
+        return
+    st.caption("p50/p95/p99 는 단계별 최근 요청 기준(window 개)이며 count/errors 는 프로세스 시작 후 누적입니다.")
+    st.dataframe(
+        stats.style.format({"p50_ms": "{:.1f}", "p95_ms": "{:.1f}", "p99_ms": "{:.1f}", "max_ms": "{:.1f}"}),
+        hide_index=True, use_container_width=True,
+    )
+    st.bar_chart(stats.set_index("stage")[["p50_ms", "p95_ms", "p99_ms"]], stack=False)
+
+
+def show_slow_requests():
+    st.markdown("### 🐢 최근 느린 요청")
+    spans = pd.DataFrame(recent_spans())
+    if spans.empty or "analyze.request" not in set(spans["name"]):
+        st.info("최근 분석 요청이 없습니다.")
+        return
+    requests = spans[spans["name"] == "analyze.request"].sort_values("ms", ascending=False).head(10)
+    trace_id = st.selectbox(
+        "요청(trace) 선택", requests["trace_id"],
+        format_func=lambda t: f"{t} ({requests.loc[requests['trace_id'] == t, 'ms'].iloc[0]:.0f}ms)",
+    )
+    # 선택한 요청의 span 을 시작 순서대로 표시 (같은 trace 의 작업 스레드 span 포함)
+    trace = spans[spans["trace_id"] == trace_id].sort_values("started_at")
+    trace = trace.assign(offset_ms=(trace["started_at"] - trace["started_at"].min()) * 1000)
+    columns = ["name", "offset_ms", "ms", "status"] + [c for c in trace.columns if c not in
+              ("name", "offset_ms", "ms", "status", "trace_id", "span_id", "parent_id", "started_at")]
+    st.dataframe(trace[columns].dropna(axis=1, how="all"), hide_index=True, use_container_width=True)
+
+
+def show_backend_metrics():
+    st.markdown("### 🗄️ 쿼리 / 연결 / 캐시")
+    stats = query_stats()
+    if not stats.empty:
+        st.dataframe(stats, hide_index=True, use_container_width=True)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.json(get_data_source().pool_metrics())
+    with col2:
+        cache = query_cache.stats()
+        st.json({key: cache[key] for key in ("entries", "bytes", "hits", "disk_hits", "misses", "evictions")})
+    flights = single_flight.stats()
+    if not flights.empty:
+        st.markdown("#### 중복 호출 합치기 (single-flight)")
+        st.caption("shared = 이미 실행 중인 같은 호출을 기다려 결과를 나눠 받은(DB/학습을 건너뛴) 호출 수")
+        st.dataframe(flights, hide_index=True, use_container_width=True)
+    if BATCHING_ENABLED:
+        st.markdown("#### 예측 마이크로 배치")
+        st.json(get_batcher().stats())
+
+
+def show_retraining():
+    st.markdown("### 🔁 모델 재학습")
+    status = get_registry().status()
+    st.caption(f"서비스 중인 버전: {status['model_version'] or '(버전 디렉터리 이전 아티팩트)'} · "
+               f"지문 {(status['data_fingerprint'] or '-')[:12]}")
+    state = read_state()
+    if not state.get("history"):
+        st.info("재학습 기록이 없습니다 (python retrain_scheduler.py 로 실행).")
+        return
+    rows = []
+    for run in reversed(state["history"]):
+        rows.append({
+            "finished_at": pd.to_datetime(run.get("finished_at"), unit="s"),
+            "decision": run["decision"],
+            "reason": run.get("reason"),
+            "changes": len(run.get("changes", [])),
+            **{f"candidate_{k}": v for k, v in (run.get("candidate") or {}).items()},
+            **{f"serving_{k}": v for k, v in (run.get("serving") or {}).items()},
+            "promoted_version": run.get("promoted_version"),
+            "seconds": run.get("seconds"),
+        })
+    st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+
+
+def main():
+    st.title("진단 🩺")
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        st.button("🔄 새로고침")
+    with col2:
+        if st.button("🧹 통계 초기화"):
+            reset()
+
+    show_stage_latency()
+    st.divider()
+    show_slow_requests()
+    st.divider()
+    show_backend_metrics()
+    st.divider()
+    show_retraining()
+
+
+if __name__ == "__main__":
+    main()
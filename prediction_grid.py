@@ -0,0 +1,209 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from model_store import ARTIFACT_DIR
+from segment_options import GENDER_OPTIONS, AGE_OPTIONS, CUSTOMER_TYPE_OPTIONS, dong_options
+
+GRID_FILE = "prediction_grid.npz"
+
+# 섹션별 원천 테이블: 해당 테이블 버전이 바뀐 섹션만 다시 계산
+# (model 섹션은 테이블 버전 대신 모델 데이터 지문으로 판단)
+SECTION_SOURCES = {
+    "model": ("DEP_STORE_DATA", "SALES_KOR_LABELING"),
+    "estimated_spending": ("DONG_FEATURES",),
+}
+
+
+class PredictionGrid:
+    """
+    입력 폼의 모든 조합에 대한 예측/조회 결과를 미리 계산해 둔 배열 기반 테이블.
+    - model: 성별 × 연령대 × 고객 형태 → 백화점별 방문 확률, 예상 지출 (거주지/직장은 모델 피처가 아님)
+    - estimated_spending: 거주지 → 평균 백화점 소비액
+    (거주지 × 직장 위치 기반 점수는 가중치를 조회 시점에 적용하도록 store_affinity 에서 관리)
+    """
+
+    def __init__(self, dongs=None):
+        self.genders = list(GENDER_OPTIONS)
+        self.ages = list(AGE_OPTIONS)
+        self.types = list(CUSTOMER_TYPE_OPTIONS)
+        self.dongs = list(dong_options() if dongs is None else dongs)
+        self.model_stores = []
+        self.versions = {} # 섹션 이름 → 계산 당시 원천 버전
+        self.arrays = {}
+        self._build_indexes()
+
+    def _build_indexes(self):
+        self._gender_idx = {v: i for i, v in enumerate(self.genders)}
+        self._age_idx = {v: i for i, v in enumerate(self.ages)}
+        self._type_idx = {v: i for i, v in enumerate(self.types)}
+        self._dong_idx = {v: i for i, v in enumerate(self.dongs)}
+
+    def set_dongs(self, dongs):
+        # 카탈로그의 동 목록이 바뀌면 동 축을 쓰는 섹션은 다시 계산해야 함 (model 섹션은 유지)
+        self.dongs = list(dongs)
+        self.versions.pop("estimated_spending", None)
+        self.arrays.pop("estimated_spending", None)
+        self._build_indexes()
+
+    def has_section(self, section: str, version=None) -> bool:
+        if section not in self.versions:
+            return False
+        return version is None or self.versions[section] == version
+
+    # --- 섹션 계산 ---
+
+    def build_model_section(self, predictor):
+        # 48개 조합을 predict_batch 한 번으로 계산
+        segments = pd.MultiIndex.from_product(
+            [self.genders, self.ages, self.types], names=["gender", "age", "type"]
+        ).to_frame(index=False)
+        result = pd.concat(predictor.predict_batch(segments), ignore_index=True)
+
+        self.model_stores = [str(s) for s in predictor.store_model.classes_]
+        shape = (len(self.genders), len(self.ages), len(self.types))
+        self.arrays["store_probs"] = (
+            result[self.model_stores].to_numpy(dtype=np.float32).reshape(shape + (len(self.model_stores),))
+        )
+        self.arrays["spending"] = result["spending"].to_numpy(dtype=np.int64).reshape(shape)
+        self.versions["model"] = predictor.data_fingerprint
+
+    def build_spending_section(self, spending_fn, version=None):
+        # 전체 동을 쿼리 한 번으로 조회 ({동: 평균 소비액})
+        by_dong = spending_fn(dongs=self.dongs)
+        spending = np.array([by_dong.get(dong, 0) for dong in self.dongs], dtype=np.int64)
+        if not spending.any():
+            print("Skipping prediction grid section estimated_spending: no data returned.")
+            return
+        self.arrays["estimated_spending"] = spending
+        self.versions["estimated_spending"] = version
+
+    # --- 조회 (dict 인덱스 + 배열 인덱싱, 조합에 없으면 None) ---
+
+    def lookup_ml(self, user_input):
+        if "model" not in self.versions:
+            return None
+        try:
+            i = self._gender_idx[user_input["gender"]]
+            j = self._age_idx[user_input["age"]]
+            k = self._type_idx[user_input["type"]]
+        except KeyError:
+            return None
+        probs = self.arrays["store_probs"][i, j, k]
+        return {
+            "store_predictions": {store: float(p) for store, p in zip(self.model_stores, probs)},
+            "spending": int(self.arrays["spending"][i, j, k]),
+        }
+
+    def lookup_spending(self, res_dong):
+        if "estimated_spending" not in self.versions or res_dong not in self._dong_idx:
+            return None
+        return int(self.arrays["estimated_spending"][self._dong_idx[res_dong]])
+
+    # --- 저장/로드 ---
+
+    def save(self, path: str = None) -> str:
+        path = path or os.path.join(ARTIFACT_DIR, GRID_FILE)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        meta = {
+            "genders": self.genders, "ages": self.ages, "types": self.types, "dongs": self.dongs,
+            "model_stores": self.model_stores,
+            "versions": self.versions,
+        }
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, meta=np.array(json.dumps(meta, ensure_ascii=False, default=str)), **self.arrays)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str = None):
+        path = path or os.path.join(ARTIFACT_DIR, GRID_FILE)
+        if not os.path.exists(path):
+            return None
+        grid = cls(dongs=())
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            grid.arrays = {name: data[name] for name in data.files if name != "meta"}
+        grid.genders, grid.ages, grid.types, grid.dongs = meta["genders"], meta["ages"], meta["types"], meta["dongs"]
+        grid.model_stores = meta["model_stores"]
+        grid.versions = meta["versions"]
+        grid._build_indexes()
+        return grid
+
+    def copy(self):
+        grid = PredictionGrid(dongs=self.dongs)
+        grid.__dict__.update({k: (dict(v) if isinstance(v, dict) else v) for k, v in self.__dict__.items()})
+        return grid
+
+
+_grid = None
+_grid_lock = threading.Lock()
+
+
+def get_grid():
+    """프로세스 공유 그리드 (디스크에 저장된 그리드가 있으면 처음 호출 때 로드)."""
+    global _grid
+    if _grid is None:
+        with _grid_lock:
+            if _grid is None:
+                _grid = PredictionGrid.load() or PredictionGrid()
+    return _grid
+
+
+def refresh_grid(predictor=None, table_versions=None, spending_fn=None, save=True):
+    """
+    그리드를 갱신합니다. 원천 버전이 바뀌었거나 아직 없는 섹션만 다시 계산하고 나머지는 재사용합니다.
+    table_versions: {테이블명: 버전} (snowpark_queries.get_table_versions 결과). None이면 없는 섹션만 채웁니다.
+    새 그리드는 완성된 뒤 한 번에 교체되므로 조회 중인 요청에 영향을 주지 않습니다.
+    """
+    global _grid
+    with _grid_lock:
+        current = _grid if _grid is not None else (PredictionGrid.load() or PredictionGrid())
+        if predictor is not None and predictor.is_initialized and not current.has_section("model", predictor.data_fingerprint):
+            # 다른 프로세스(재학습 스케줄러)가 새 모델의 섹션을 이미 저장했으면 다시 계산하지 않고 사용
+            saved = PredictionGrid.load()
+            if saved is not None and saved.has_section("model", predictor.data_fingerprint):
+                current = saved
+        grid = current.copy()
+        dongs = dong_options()
+        if grid.dongs != dongs:
+            print(f"Prediction grid dongs changed ({len(grid.dongs)} -> {len(dongs)}); rebuilding location sections.")
+            grid.set_dongs(dongs)
+
+        if predictor is not None and predictor.is_initialized and not grid.has_section("model", predictor.data_fingerprint):
+            print("Rebuilding prediction grid section: model")
+            grid.build_model_section(predictor)
+
+        section = "estimated_spending"
+        version = None
+        if table_versions is not None:
+            version = "|".join(str(table_versions.get(t)) for t in SECTION_SOURCES[section])
+        if not grid.has_section(section) or (version is not None and not grid.has_section(section, version)):
+            if spending_fn is None:
+                from snowflake_data_setting.snowpark_queries import get_estimated_spendings
+                spending_fn = get_estimated_spendings
+            print(f"Rebuilding prediction grid section: {section}")
+            grid.build_spending_section(spending_fn, version)
+
+        if grid.versions != current.versions or grid.model_stores != current.model_stores or grid.dongs != current.dongs:
+            if save:
+                grid.save()
+        _grid = grid
+        return grid
+
+
+if __name__ == "__main__":
+    # 원천 테이블 변경 후 갱신 작업: python prediction_grid.py
+    from model_store import load_or_train
+    from snowflake_data_setting.catalog import CATALOG_TABLES, refresh_catalog
+    from snowflake_data_setting.snowpark_queries import get_table_versions
+    from store_affinity import AFFINITY_TABLES, RATIO_TABLE as AFFINITY_RATIO_TABLE, refresh_affinity
+
+    # 동/백화점 목록이 바뀌었으면 카탈로그부터 갱신 (그리드의 동 축이 카탈로그를 따름)
+    refresh_catalog(get_table_versions(CATALOG_TABLES))
+    refresh_affinity(get_table_versions(AFFINITY_TABLES + (AFFINITY_RATIO_TABLE,)))
+    tables = [t for sources in SECTION_SOURCES.values() for t in sources]
+    refresh_grid(load_or_train(), table_versions=get_table_versions(tables))
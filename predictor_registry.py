@@ -0,0 +1,168 @@
+import os
+import threading
+import time
+
+from model_store import current_version, load_or_train, load_predictor
+
+# 승격된 새 모델 버전(retrain_scheduler)을 확인하는 간격(초). 0 이면 확인하지 않음
+RELOAD_SECONDS = float(os.getenv("MODEL_RELOAD_SECONDS", "60"))
+# 워밍업이 실패한 뒤 start()가 다시 시도하기까지 기다리는 시간(초). 그 전에는 retry()로만 다시 시도
+RETRY_SECONDS = float(os.getenv("MODEL_WARMUP_RETRY_SECONDS", "300"))
+
+
+class PredictorRegistry:
+    """
+    프로세스 전체(모든 Streamlit 세션)가 공유하는 예측 모델 보관소.
+    백그라운드 스레드에서 아티팩트를 불러오거나 학습하고, 준비되면 바로 예측에 사용합니다.
+    재학습된 모델은 참조 교체 한 번으로 반영되므로 진행 중인 predict() 호출은 기존 모델로 끝까지 실행됩니다.
+    다른 프로세스가 새 버전을 승격하면 감시 스레드가 RELOAD_SECONDS 마다 확인해 불러옵니다 (학습 없음).
+    """
+
+    def __init__(self, artifact_dir: str = None):
+        self.artifact_dir = artifact_dir
+        self._lock = threading.Lock()
+        self._predictor = None
+        self._loaded_at = None
+        self._thread = None
+        self._watcher = None
+        self._version = None # 불러온 아티팩트 버전 (model_store.current_version)
+        self._state = "idle" # idle / loading / ready / failed
+        self._error = None
+        self._failed_at = None # 마지막 워밍업 실패 시각
+
+    def start(self, retrain: bool = False, force: bool = False) -> bool:
+        """
+        백그라운드 워밍업을 시작합니다. 이미 실행 중이면 아무것도 하지 않고 False를 반환합니다.
+        페이지가 다시 그려질 때마다 호출되므로, 실패한 뒤 RETRY_SECONDS 가 지나기 전에는 force 없이 다시 시작하지 않습니다.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            if self._predictor is not None and not retrain:
+                return False
+            if (self._failed_at is not None and not (retrain or force)
+                    and time.time() - self._failed_at < RETRY_SECONDS):
+                return False
+            self._state = "loading" if self._predictor is None else self._state
+            self._thread = threading.Thread(
+                target=self._warm_up, args=(retrain,), name="predictor-warm-up", daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def retrain(self) -> bool:
+        # 서비스 중인 모델은 그대로 두고 새 모델을 학습해 교체
+        return self.start(retrain=True)
+
+    def retry(self) -> bool:
+        # 실패 후 사용자가 직접 다시 시도 (RETRY_SECONDS 무시)
+        return self.start(force=True)
+
+    def _warm_up(self, retrain: bool):
+        try:
+            predictor = load_or_train(self.artifact_dir, retrain=retrain)
+        except Exception as e:
+            print(f"Predictor warm-up failed: {e}")
+            with self._lock:
+                self._error = str(e)
+                self._failed_at = time.time()
+                if self._predictor is None:
+                    self._state = "failed"
+            return
+
+        if predictor.is_initialized:
+            self.swap(predictor, current_version(self.artifact_dir))
+            self._start_watcher()
+        else:
+            with self._lock:
+                self._error = "모델 학습 데이터를 불러오지 못했습니다."
+                self._failed_at = time.time()
+                if self._predictor is None:
+                    self._state = "failed"
+
+    def _start_watcher(self):
+        with self._lock:
+            if RELOAD_SECONDS <= 0 or self._watcher is not None:
+                return
+            self._watcher = threading.Thread(target=self._watch, name="predictor-reload", daemon=True)
+            self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(RELOAD_SECONDS)
+            try:
+                self.reload_if_promoted()
+            except Exception as e:
+                print(f"Predictor reload check failed: {e}")
+
+    def reload_if_promoted(self) -> bool:
+        """
+        아티팩트 디렉터리의 서비스 버전이 불러온 버전과 다르면 새 버전을 불러와 교체합니다.
+        파일을 매핑해 읽기만 하므로 요청 처리에 주는 부담이 작습니다.
+        """
+        version = current_version(self.artifact_dir)
+        if version is None or version == self._version:
+            return False
+        predictor = load_predictor(self.artifact_dir)
+        if predictor is None:
+            return False
+        self.swap(predictor, version)
+        return True
+
+    def swap(self, predictor, version: str = None):
+        """
+        새 모델로 원자적으로 교체합니다. 교체 전 get()으로 받은 참조는 그대로 유효합니다.
+        """
+        with self._lock:
+            self._predictor = predictor
+            self._version = version
+            self._loaded_at = time.time()
+            self._state = "ready"
+            self._error = None
+            self._failed_at = None
+        print(f"Predictor swapped in (fingerprint={(predictor.data_fingerprint or '')[:12]}).")
+
+    def get(self):
+        # 준비되지 않았으면 None
+        return self._predictor
+
+    def is_ready(self) -> bool:
+        return self._predictor is not None
+
+    def wait(self, timeout: float = None):
+        # 스크립트/배치 작업용: 워밍업이 끝날 때까지 대기 후 모델 반환
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return self._predictor
+
+    def status(self) -> dict:
+        with self._lock:
+            predictor = self._predictor
+            trained_at = predictor.trained_at if predictor is not None else None
+            return {
+                "state": self._state,
+                "ready": predictor is not None,
+                "loading": self._thread is not None and self._thread.is_alive(),
+                "trained_at": trained_at,
+                "model_age_seconds": time.time() - trained_at if trained_at else None,
+                "loaded_at": self._loaded_at,
+                "data_fingerprint": predictor.data_fingerprint if predictor is not None else None,
+                "model_version": self._version,
+                "error": self._error,
+                "retry_at": self._failed_at + RETRY_SECONDS if self._failed_at is not None else None,
+            }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> PredictorRegistry:
+    """프로세스 단일 PredictorRegistry 인스턴스를 반환합니다."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = PredictorRegistry()
+    return _registry
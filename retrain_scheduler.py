@@ -0,0 +1,277 @@
+"""
+백그라운드 재학습 스케줄러 (웹 요청 경로 밖에서 학습).
+
+SALES_KOR_LABELING / DEP_STORE_DATA 에 새 STANDARD_YEAR_MONTH 가 생기거나 기존 월의 행 수가 바뀌면
+별도 프로세스(낮은 우선순위)에서 후보 모델을 학습하고, 같은 홀드아웃으로 서비스 중인 모델과 비교(shadow 평가)해
+더 나쁘지 않으면 전체 데이터로 다시 학습해 새 버전으로 승격합니다 (model_store.promote_version).
+
+홀드아웃은 새로 생긴 월의 행에서만 떼어 냅니다 (model_evaluation.partition_holdout).
+서비스 모델은 그 행을 학습한 적이 없고 후보는 나머지 새 월 데이터까지 학습하므로, 비교 결과는
+"새 데이터를 반영해 새 데이터를 더 잘 맞히는가" 를 나타냅니다. 기존 월의 행 수만 바뀐 경우(changed)는 그 월의
+행 대부분을 서비스 모델이 이미 학습했으므로 새 월로 치지 않습니다. 새 월이 없거나, 월 컬럼이 없는 원천이거나,
+이전 확인 기록이 없으면 무작위 홀드아웃을 쓰는데, 이때 서비스 모델 점수는 학습에 쓴 데이터로 잰 것이라
+승격 판단에는 쓰지 않고 기록만 합니다.
+웹 워커는 학습하지 않고 승격된 버전만 다시 불러옵니다 (MODEL_SERVING_MODE=attach + predictor_registry 의 감시 스레드).
+
+    python retrain_scheduler.py                  # RETRAIN_INTERVAL_SECONDS 마다 확인 (기본 1시간)
+    python retrain_scheduler.py --once           # 한 번만 확인
+    python retrain_scheduler.py --once --force   # 바뀐 월이 없어도 후보 학습/평가
+
+    RETRAIN_HOLDOUT      홀드아웃 비율 (기본 0.2)
+    RETRAIN_TOLERANCE    허용하는 상대 악화 (기본 0.01): 후보의 store_logloss / spend_rmse 가
+                         서비스 모델보다 이 비율을 넘게 나쁘면 승격하지 않음
+    RETRAIN_NICE         학습 프로세스의 nice 값 (기본 10)
+
+확인/평가 결과는 <아티팩트 디렉터리>/retrain_state.json 에 남고 진단 페이지에 표시됩니다.
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from model_store import ARTIFACT_DIR, artifact_path
+from snowflake_data_setting.pipeline import PARTITION_COLUMN
+
+# 모델별 학습 원천 테이블 (store: 방문 모델, spending: 지출 모델)
+PARTITION_TABLES = {"store": "DEP_STORE_DATA", "spending": "SALES_KOR_LABELING"}
+STATE_FILE = "retrain_state.json"
+HISTORY_SIZE = 20
+
+INTERVAL_SECONDS = float(os.getenv("RETRAIN_INTERVAL_SECONDS", "3600"))
+HOLDOUT = float(os.getenv("RETRAIN_HOLDOUT", "0.2"))
+TOLERANCE = float(os.getenv("RETRAIN_TOLERANCE", "0.01"))
+NICE = int(os.getenv("RETRAIN_NICE", "10"))
+# 모델별로 후보가 서비스 모델보다 (1 + TOLERANCE) 배를 넘게 나쁘면 승격하지 않는 지표 (낮을수록 좋음)
+GUARDED_METRICS = {"store": "store_logloss", "spending": "spend_rmse"}
+
+
+def partition_signature(source) -> dict:
+    """
+    {테이블: {월: 행 수}}. 월 컬럼이 없는 테이블(예: 월 구분 없이 내보낸 로컬 스냅샷)은 {"*": 테이블 버전} 으로 대신합니다.
+    """
+    signature = {}
+    for table in PARTITION_TABLES.values():
+        try:
+            df = source.query(
+                f"SELECT {PARTITION_COLUMN} AS PARTITION_VALUE, COUNT(*) AS ROW_COUNT FROM {table} GROUP BY 1"
+            )
+            signature[table] = {str(row.PARTITION_VALUE): int(row.ROW_COUNT) for row in df.itertuples(index=False)}
+        except Exception as e:
+            print(f"{table}: partition scan failed ({e}); using table version instead.")
+            signature[table] = {"*": source.table_versions([table]).get(table)}
+    return signature
+
+
+def changed_partitions(signature: dict, previous: dict) -> list:
+    """[(테이블, 월, new / changed / removed)]"""
+    changes = []
+    for table, partitions in signature.items():
+        before = previous.get(table, {})
+        for key, rows in sorted(partitions.items()):
+            if key not in before:
+                changes.append((table, key, "new"))
+            elif before[key] != rows:
+                changes.append((table, key, "changed"))
+        changes += [(table, key, "removed") for key in sorted(before) if key not in partitions]
+    return changes
+
+
+def new_partitions(changes: list, previous: dict) -> dict:
+    """
+    {모델: [새로 생긴 월]}. 이전 기록이 없거나 월 구분이 없는 테이블은 넣지 않습니다
+    (서비스 모델이 어떤 행을 학습했는지 알 수 없으므로 새 월 홀드아웃을 만들 수 없음).
+    행 수만 바뀐 월(changed)은 서비스 모델이 대부분 학습한 행이라 넣지 않습니다 (비교는 기록만 하고 승격 판단에는 안 씀).
+    """
+    partitions = {}
+    for group, table in PARTITION_TABLES.items():
+        if not previous.get(table) or "*" in previous[table]:
+            continue
+        partitions[group] = [key for t, key, change in changes if t == table and change == "new"]
+    return partitions
+
+
+def read_state(artifact_dir: str = None) -> dict:
+    path = os.path.join(artifact_dir or ARTIFACT_DIR, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_state(state: dict, artifact_dir: str = None):
+    artifact_dir = artifact_dir or ARTIFACT_DIR
+    os.makedirs(artifact_dir, exist_ok=True)
+    path = os.path.join(artifact_dir, STATE_FILE)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def should_promote(candidate: dict, serving: dict, unseen: dict, tolerance: float = TOLERANCE):
+    """(승격 여부, 이유). unseen: {모델: 홀드아웃이 서비스 모델이 학습하지 않은 새 월인지}"""
+    if serving is None:
+        return True, "no serving model"
+    guarded = [metric for group, metric in GUARDED_METRICS.items() if unseen.get(group)]
+    if not guarded:
+        return True, "no unseen holdout (serving scores are in-sample)"
+    # 점수가 nan/inf 이면(빈 홀드아웃 등) 비교 결과를 믿을 수 없으므로 승격하지 않음
+    invalid = [metric for metric in guarded
+               if not (math.isfinite(candidate[metric]) and math.isfinite(serving[metric]))]
+    if invalid:
+        return False, f"non-finite holdout scores on {', '.join(invalid)}"
+    worse = [metric for metric in guarded if candidate[metric] > serving[metric] * (1 + tolerance)]
+    if worse:
+        return False, f"candidate worse on {', '.join(worse)}"
+    return True, f"candidate within tolerance on {', '.join(guarded)}"
+
+
+def train_and_evaluate(artifact_dir: str, partitions: dict, holdout: float, tolerance: float, seed: int) -> dict:
+    """
+    (학습 프로세스에서 실행) 후보를 학습해 서비스 모델과 홀드아웃으로 비교하고, 이기면 전체 데이터로 학습해 승격합니다.
+    partitions: new_partitions 결과 ({모델: [새 월]}) — 이 월의 행에서 홀드아웃을 떼어 냄
+    """
+    import numpy as np
+    from model import DepartmentStorePredictor
+    from model_evaluation import (collapse_partitions, load_training_data, partition_holdout, score_predictor,
+                                  split_cells, split_rows)
+    from model_store import load_predictor, read_metadata, save_predictor, training_lock
+    from prediction_grid import refresh_grid
+
+    started = time.time()
+    report = {"started_at": started, "holdout": holdout, "tolerance": tolerance, "seed": seed}
+    dep_data, sales_data = load_training_data(by_partition=True)
+    if dep_data.empty or sales_data.empty:
+        return {**report, "decision": "failed", "reason": "no training data"}
+
+    rng = np.random.default_rng(seed)
+    splits, unseen = {}, {}
+    for group, df, split in (("store", dep_data, split_rows), ("spending", sales_data, split_cells)):
+        parts = partition_holdout(df, partitions.get(group), holdout, rng, split)
+        unseen[group] = parts is not None
+        splits[group] = parts or split(collapse_partitions(df), holdout, rng)
+    (dep_train, dep_test), (sales_train, sales_test) = splits["store"], splits["spending"]
+    report["unseen_holdout"] = unseen
+
+    candidate = DepartmentStorePredictor(train=False)
+    if not candidate.fit(dep_train, sales_train):
+        return {**report, "decision": "failed", "reason": "candidate training failed"}
+    candidate.release_training_data()
+    report["candidate"] = score_predictor(candidate, dep_test, sales_test)
+    del candidate
+
+    serving_version = read_metadata(artifact_dir).get("model_version")
+    serving = load_predictor(artifact_dir)
+    report["serving_version"] = serving_version
+    report["serving"] = score_predictor(serving, dep_test, sales_test) if serving is not None else None
+    del serving
+
+    promote, report["reason"] = should_promote(report["candidate"], report["serving"], unseen, tolerance)
+    if not promote:
+        return {**report, "decision": "rejected", "seconds": time.time() - started}
+
+    # 홀드아웃을 떼어 낸 후보 대신 같은 설정으로 전체 데이터를 학습한 모델을 승격
+    final = DepartmentStorePredictor(train=False)
+    if not final.fit(collapse_partitions(dep_data), collapse_partitions(sales_data)):
+        return {**report, "decision": "failed", "reason": "final training failed"}
+    final.release_training_data()
+    with training_lock(artifact_dir):
+        if read_metadata(artifact_dir).get("model_version") != serving_version:
+            # 평가하는 동안 다른 프로세스가 새 버전을 승격함 → 비교 대상이 바뀌었으므로 다음 확인 때 다시 평가
+            return {**report, "decision": "superseded", "seconds": time.time() - started}
+        save_predictor(final, artifact_dir)
+    report["promoted_version"] = read_metadata(artifact_dir).get("model_version")
+
+    # 워커가 요청 중에 계산하지 않도록 새 모델의 예측 그리드 섹션을 여기서 미리 저장
+    try:
+        refresh_grid(load_predictor(artifact_dir))
+    except Exception as e:
+        print(f"Prediction grid refresh after promotion failed: {e}")
+    return {**report, "decision": "promoted", "seconds": time.time() - started}
+
+
+def _lower_priority():
+    # 같은 호스트의 웹 워커보다 CPU 우선순위를 낮춤
+    if hasattr(os, "nice"):
+        os.nice(NICE)
+
+
+def _run_isolated(func, *args):
+    # 학습은 매번 새 프로세스에서 실행 → 스케줄러에 학습 메모리가 남지 않고 실패해도 스케줄러는 계속 동작
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=_lower_priority) as executor:
+        return executor.submit(func, *args).result()
+
+
+def check_once(artifact_dir: str = None, force: bool = False, holdout: float = HOLDOUT,
+               tolerance: float = TOLERANCE, seed: int = 0):
+    """
+    바뀐 월이 있으면(또는 force / 서비스 모델 없음) 후보를 학습·평가하고 결과 보고(dict)를 반환합니다.
+    바뀐 것이 없으면 None을 반환합니다.
+    """
+    from snowflake_data_setting.data_sources import get_data_source
+
+    artifact_dir = artifact_dir or ARTIFACT_DIR
+    state = read_state(artifact_dir)
+    source = get_data_source()
+    if not source.is_connected:
+        source.connect()
+    signature = partition_signature(source)
+    previous = state.get("partitions", {})
+    changes = changed_partitions(signature, previous)
+    has_model = os.path.exists(artifact_path(artifact_dir))
+    state["checked_at"] = time.time()
+
+    if not changes and not force and has_model:
+        print("No new or changed partitions.")
+        _write_state(state, artifact_dir)
+        return None
+
+    for table, partition, change in changes[:20]:
+        print(f"  {change:8s} {table} {PARTITION_COLUMN}={partition}")
+    report = _run_isolated(train_and_evaluate, artifact_dir, new_partitions(changes, previous), holdout, tolerance, seed)
+    report["changes"] = [list(change) for change in changes[:100]]
+    report["finished_at"] = time.time()
+    print(f"Retrain {report['decision']}: {report.get('reason', '')} "
+          f"(candidate={report.get('candidate')}, serving={report.get('serving')})")
+
+    # 평가를 마친 데이터 상태만 기록 → 실패/중단된 경우 다음 확인 때 다시 시도
+    state = read_state(artifact_dir)
+    if report["decision"] in ("promoted", "rejected"):
+        state["partitions"] = signature
+    state["checked_at"] = report["finished_at"]
+    state["last_run"] = report
+    state["history"] = (state.get("history", []) + [report])[-HISTORY_SIZE:]
+    _write_state(state, artifact_dir)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="한 번만 확인하고 종료")
+    parser.add_argument("--force", action="store_true", help="바뀐 월이 없어도 후보 학습/평가")
+    parser.add_argument("--interval", type=float, default=INTERVAL_SECONDS, help="확인 간격(초)")
+    parser.add_argument("--holdout", type=float, default=HOLDOUT)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    force = args.force
+    while True:
+        try:
+            check_once(force=force, holdout=args.holdout, tolerance=args.tolerance, seed=args.seed)
+        except Exception as e:
+            print(f"Retrain check failed: {e}")
+            if args.once:
+                return 1
+        if args.once:
+            return 0
+        force = False
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+import itertools
+
+import pandas as pd
+
+from snowflake_data_setting.catalog import get_catalog
+
+# 입력 폼 선택지 (input_form.get_user_input 과 배치 예측이 같은 값을 사용)
+GENDER_OPTIONS = ["남성", "여성"]
+AGE_OPTIONS = ["20대", "30대", "40대", "50대 이상"]
+CUSTOMER_TYPE_OPTIONS = ["싱글", "신혼부부", "영유아가족", "청소년가족", "성인자녀가족", "실버"]
+
+# 아직 사용자 입력이 없는 모델 피처의 고정값
+DEFAULT_TIME_SLOT = "00~06"
+DEFAULT_WEEKDAY_WEEKEND = "주중"
+DEFAULT_CARD_TYPE = 1 # 개인=1
+
+# user_input 키 순서 (배치 예측 입력 DataFrame 컬럼명과 동일)
+SEGMENT_COLUMNS = ["gender", "age", "residence", "work", "type"]
+
+
+def dong_options(wait: bool = True) -> list:
+    """
+    거주지/직장 선택지: 카탈로그의 전체 동 목록 (프로세스당 한 번 로드).
+    wait=False 이면 카탈로그가 준비되기 전에는 기본 동 목록을 바로 반환합니다 (입력 폼 그리기 경로).
+    """
+    return get_catalog(wait=wait).dongs
+
+
+def build_segment_grid(dongs=None) -> pd.DataFrame:
+    """
+    성별 × 연령대 × 거주지 × 직장 × 고객 형태 전체 조합을 DataFrame으로 만듭니다.
+    predict_batch 입력으로 바로 사용할 수 있습니다. dongs 를 생략하면 카탈로그의 전체 동을 사용합니다.
+    """
+    dongs = dong_options() if dongs is None else dongs
+    combos = itertools.product(GENDER_OPTIONS, AGE_OPTIONS, dongs, dongs, CUSTOMER_TYPE_OPTIONS)
+    return pd.DataFrame(list(combos), columns=SEGMENT_COLUMNS)
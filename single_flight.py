@@ -0,0 +1,106 @@
+"""
+같은 요청의 동시 실행 합치기 (single-flight).
+
+캐시는 결과가 저장된 뒤에만 도움이 되므로, 캐시가 비어 있을 때 같은 조회가 동시에 여러 번 들어오면
+모두 DB를 칩니다. SingleFlight.do(key, func) 는 같은 key 로 이미 실행 중인 호출이 있으면
+새로 실행하지 않고 그 호출이 끝나기를 기다려 같은 결과(또는 같은 예외)를 받습니다.
+
+    flight = group("store_score")
+    value = flight.do(key, compute)
+
+합쳐진(흡수된) 중복 호출 수는 그룹별로 기록되며 stats() 로 확인합니다 (진단 페이지에 표시).
+"""
+import threading
+
+import pandas as pd
+
+
+class _Call:
+    __slots__ = ("done", "value", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {} # key → 실행 중인 _Call
+
+        self.executions = 0 # 실제로 func 를 실행한 횟수
+        self.shared = 0 # 실행 중인 호출을 기다려 결과를 나눠 받은(흡수된) 호출 수
+        self.errors = 0
+        self.max_waiters = 0 # 한 번의 실행을 함께 기다린 최대 호출 수
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                self.max_waiters = max(self.max_waiters, call.waiters)
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = func(*args, **kwargs)
+            return call.value
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            # 결과를 채운 뒤 목록에서 빼고 깨움 → 이후 호출은 새로 실행(보통은 캐시 적중)
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "group": self.name,
+                "executions": self.executions,
+                "shared": self.shared,
+                "errors": self.errors,
+                "max_waiters": self.max_waiters,
+                "in_flight": len(self._calls),
+            }
+
+
+_groups = {}
+_groups_lock = threading.Lock()
+
+
+def group(name: str) -> SingleFlight:
+    """이름별 프로세스 공유 SingleFlight (조회 네임스페이스, 모델 로드 등)."""
+    flight = _groups.get(name)
+    if flight is None:
+        with _groups_lock:
+            flight = _groups.get(name)
+            if flight is None:
+                flight = _groups[name] = SingleFlight(name)
+    return flight
+
+
+def stats() -> pd.DataFrame:
+    """그룹별 실행/흡수 횟수."""
+    return pd.DataFrame([flight.stats() for flight in list(_groups.values())],
+                        columns=["group", "executions", "shared", "errors", "max_waiters", "in_flight"])
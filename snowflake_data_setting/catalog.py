@@ -0,0 +1,233 @@
+"""
+동(dong)·백화점 메타데이터 카탈로그.
+
+입력 폼 선택지, 학습 쿼리 필터, 위치 기반 점수 쿼리의 이름 매핑, 예측 그리드 축이 모두 이 카탈로그를 사용합니다.
+- 동 목록: LOPLAT 거주지/직장 비율 테이블 + DONG_FEATURES 에 나오는 모든 동 (이름순, 코드 = 0부터의 정수)
+- 백화점 목록: LOPLAT 비율 테이블 + DEP_STORE_DATA 에 나오는 모든 매장 (원본 이름 → 표시 이름)
+- 백화점 소재 동: STORE_METADATA 에 있으면 그 값, 없으면 비율 테이블에서 직장 비율(LOC_TYPE = 2)이 가장 높은 동
+  (지출 모델 학습 대상 동 = 소재 동 목록)
+쿼리 한 번으로 만들어 프로세스당 한 번만 읽고(get_catalog), 디스크(CATALOG_PATH)에 저장해 재시작 시 DB 조회 없이 씁니다.
+원천 테이블이 바뀌면 refresh_catalog(table_versions) 또는 python -m snowflake_data_setting.catalog 로 다시 만듭니다.
+"""
+import json
+import os
+import threading
+import time
+
+from snowflake_data_setting.data_sources import get_data_source
+
+CATALOG_PATH = os.getenv(
+    "CATALOG_PATH", os.path.join(os.getenv("MODEL_ARTIFACT_DIR", "artifacts"), "catalog.json")
+)
+
+RATIO_TABLE = "SNOWFLAKE_STREAMLIT_HACKATHON_LOPLAT_HOME_OFFICE_RATIO"
+CATALOG_TABLES = (RATIO_TABLE, "DONG_FEATURES", "DEP_STORE_DATA")
+
+# 백화점 메타데이터: LOPLAT 원본 이름 → (표시 이름, 소재 동)
+# 목록에 없는 매장은 원본 이름의 '_'를 공백으로 바꿔 표시 이름으로 사용
+STORE_METADATA = {
+    "롯데백화점_본점": ("롯데백화점", "소공동"),
+    "신세계_강남": ("신세계백화점", "반포동"),
+    "더현대서울": ("현대백화점", "여의도동"),
+}
+# DB에 연결할 수 없을 때 사용하는 기본 동 목록 (기존 입력 폼 선택지)
+DEFAULT_DONGS = ("여의도동", "소공동", "반포동")
+# 카탈로그를 만들지 못했을 때 다시 시도하기까지 기다리는 시간(초): 그동안은 기본 목록을 바로 반환
+CATALOG_RETRY_SECONDS = float(os.getenv("CATALOG_RETRY_SECONDS", "60"))
+
+# district 행: 매장별로 방문객의 직장 비율이 가장 높은 동 (소재 동 추정)
+CATALOG_QUERY = f"""
+SELECT 'dong' AS KIND, ADDR_LV3 AS NAME, NULL AS DISTRICT FROM {RATIO_TABLE} GROUP BY ADDR_LV3
+UNION ALL
+SELECT 'dong' AS KIND, DONG AS NAME, NULL AS DISTRICT FROM DONG_FEATURES GROUP BY DONG
+UNION ALL
+SELECT 'store' AS KIND, DEP_NAME AS NAME, NULL AS DISTRICT FROM {RATIO_TABLE} GROUP BY DEP_NAME
+UNION ALL
+SELECT 'store' AS KIND, DEP_NAME AS NAME, NULL AS DISTRICT FROM DEP_STORE_DATA GROUP BY DEP_NAME
+UNION ALL
+SELECT 'district' AS KIND, DEP_NAME AS NAME, ADDR_LV3 AS DISTRICT FROM (
+    SELECT DEP_NAME, ADDR_LV3,
+        ROW_NUMBER() OVER (PARTITION BY DEP_NAME ORDER BY RATIO DESC, ADDR_LV3) AS RANK_IN_STORE
+    FROM {RATIO_TABLE}
+    WHERE LOC_TYPE = 2
+) WHERE RANK_IN_STORE = 1
+"""
+
+
+def _version_strings(table_versions) -> dict:
+    return {table: str(version) for table, version in (table_versions or {}).items()}
+
+
+def canonical_store_name(raw_name: str) -> str:
+    metadata = STORE_METADATA.get(raw_name)
+    if metadata is not None:
+        return metadata[0]
+    return str(raw_name).replace("_", " ").strip()
+
+
+class Catalog:
+    """
+    동/백화점 목록과 조회용 인덱스.
+    - dongs: 동 이름 목록 (이름순), dong_codes: 동 → 정수 코드 (dongs 의 위치)
+    - stores: LOPLAT 원본 매장 이름 목록, store_names: 원본 이름 → 표시 이름
+    - store_districts: 원본 이름 → 소재 동, districts: 소재 동 목록 (지출 모델 학습 대상)
+    """
+
+    def __init__(self, dongs=DEFAULT_DONGS, stores=tuple(STORE_METADATA), versions=None, store_districts=None):
+        self.dongs = sorted(set(dongs))
+        self.stores = sorted(set(stores))
+        self.versions = _version_strings(versions) # 만들 당시 원천 테이블 버전 (JSON 저장을 위해 문자열)
+        self.dong_codes = {dong: code for code, dong in enumerate(self.dongs)}
+        self.store_names = {raw: canonical_store_name(raw) for raw in self.stores}
+        self.display_stores = sorted(set(self.store_names.values()))
+        # 메타데이터의 소재 동이 추정값보다 우선
+        districts = {**(store_districts or {}),
+                     **{raw: dong for raw, (_, dong) in STORE_METADATA.items() if raw in self.store_names}}
+        self.store_districts = {raw: districts[raw] for raw in self.stores if raw in districts}
+        self.districts = sorted(set(self.store_districts.values()))
+
+    def dong_code(self, dong):
+        """동 이름의 코드 (카탈로그에 없으면 None)."""
+        return self.dong_codes.get(dong)
+
+    def has_dong(self, dong) -> bool:
+        return dong in self.dong_codes
+
+    def canonical_store(self, raw_name) -> str:
+        return self.store_names.get(raw_name) or canonical_store_name(raw_name)
+
+    def to_dict(self) -> dict:
+        return {"dongs": self.dongs, "stores": self.stores, "versions": self.versions,
+                "store_districts": self.store_districts}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(data["dongs"], data["stores"], data.get("versions"), data.get("store_districts"))
+
+    def save(self, path: str = None) -> str:
+        path = path or CATALOG_PATH
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(f"{path}.tmp", path)
+        return path
+
+    @classmethod
+    def load(cls, path: str = None):
+        path = path or CATALOG_PATH
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if "store_districts" not in data:
+            # 소재 동이 없던 이전 형식 → 다시 만듦
+            return None
+        return cls.from_dict(data)
+
+
+def build_catalog(source=None, table_versions=None) -> Catalog:
+    """원천 테이블에서 동/백화점 목록을 쿼리 한 번으로 읽어 카탈로그를 만듭니다."""
+    source = source or get_data_source()
+    if not source.is_connected:
+        source.connect()
+    df = source.query(CATALOG_QUERY).dropna(subset=["NAME"])
+    dongs = df.loc[df["KIND"] == "dong", "NAME"].astype(str)
+    stores = df.loc[df["KIND"] == "store", "NAME"].astype(str)
+    if dongs.empty or stores.empty:
+        raise ValueError("카탈로그 원천 테이블에서 동/백화점 목록을 읽지 못했습니다.")
+    located = df[(df["KIND"] == "district") & df["DISTRICT"].notna()]
+    store_districts = dict(zip(located["NAME"].astype(str), located["DISTRICT"].astype(str)))
+    catalog = Catalog(dongs, stores, versions=table_versions, store_districts=store_districts)
+    print(f"Built catalog: {len(catalog.dongs)} dongs, {len(catalog.stores)} stores, "
+          f"{len(catalog.districts)} store districts.")
+    return catalog
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+_failed_at = None
+_builder = None # 백그라운드 카탈로그 생성 스레드
+
+
+def _load_or_build() -> Catalog:
+    # _catalog_lock 을 잡은 상태에서 호출: 디스크 → 원천 테이블 순으로 만들고, 실패하면 None
+    global _catalog, _failed_at
+    catalog = Catalog.load()
+    if catalog is None:
+        try:
+            catalog = build_catalog()
+            catalog.save()
+        except Exception as e:
+            print(f"Catalog unavailable ({e}); using default dong/store lists.")
+            _failed_at = time.time()
+            return None
+    _catalog = catalog
+    return catalog
+
+
+def _build_in_background():
+    with _catalog_lock:
+        if _catalog is None:
+            _load_or_build()
+
+
+def _start_builder():
+    global _builder
+    if _builder is not None and _builder.is_alive():
+        return
+    _builder = threading.Thread(target=_build_in_background, name="catalog-build", daemon=True)
+    _builder.start()
+
+
+def get_catalog(wait: bool = True) -> Catalog:
+    """
+    프로세스 공유 카탈로그. 디스크에 저장된 카탈로그 → 원천 테이블 조회 순으로 처음 한 번만 만듭니다.
+    DB에도 연결할 수 없으면 기본 목록(DEFAULT_DONGS / STORE_METADATA)을 사용하고 CATALOG_RETRY_SECONDS 뒤에 다시 시도합니다.
+    wait=False (화면 그리기 경로): 기다리지 않습니다. 디스크에 저장된 카탈로그가 없거나 다른 스레드가 만드는 중이면
+    기본 목록을 바로 반환하고, 원천 테이블 조회는 백그라운드 스레드에서 한 뒤 교체합니다.
+    """
+    global _catalog
+    if _catalog is not None:
+        return _catalog
+    if _failed_at is not None and time.time() - _failed_at < CATALOG_RETRY_SECONDS:
+        return Catalog()
+    if wait:
+        with _catalog_lock:
+            return _catalog or _load_or_build() or Catalog()
+    if not _catalog_lock.acquire(blocking=False):
+        return Catalog()
+    try:
+        if _catalog is None:
+            catalog = Catalog.load()
+            if catalog is None:
+                _start_builder()
+                return Catalog()
+            _catalog = catalog
+        return _catalog
+    finally:
+        _catalog_lock.release()
+
+
+def refresh_catalog(table_versions: dict = None, save: bool = True) -> Catalog:
+    """
+    원천 테이블 버전이 바뀌었으면(또는 table_versions 가 None 이면) 카탈로그를 다시 만들어 교체합니다.
+    """
+    global _catalog
+    with _catalog_lock:
+        current = _catalog or Catalog.load()
+        if current is not None and table_versions is not None and current.versions == _version_strings(table_versions):
+            _catalog = current
+            return current
+        catalog = build_catalog(table_versions=table_versions)
+        if save:
+            catalog.save()
+        _catalog = catalog
+        return catalog
+
+
+if __name__ == "__main__":
+    # 배포 전/원천 테이블 변경 후 카탈로그 갱신: python -m snowflake_data_setting.catalog
+    source = get_data_source()
+    source.connect()
+    refresh_catalog(source.table_versions(CATALOG_TABLES))
+    print(f"Saved catalog to {CATALOG_PATH}.")
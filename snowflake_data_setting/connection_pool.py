@@ -0,0 +1,182 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    """checkout_timeout 안에 사용 가능한 연결을 얻지 못함."""
+
+
+class ConnectionPool:
+    """
+    Snowflake 세션(연결) 풀.
+    - min_size 개를 미리 만들고, 부족하면 max_size 까지 늘림
+    - checkout 시 health_check_after 초 이상 쉬었던 연결은 health_check 로 확인 후 불량이면 교체
+    - idle_timeout 초 이상 쓰이지 않은 연결은 min_size 를 넘는 만큼 백그라운드에서 정리
+    - 대기 시간/사용률 등 지표는 metrics() 로 확인
+    """
+
+    def __init__(self, factory, close=None, health_check=None, min_size: int = 1, max_size: int = 4,
+                 idle_timeout: float = 300, health_check_after: float = 60, checkout_timeout: float = 30):
+        self._factory = factory
+        self._close = close or (lambda conn: conn.close())
+        self._health_check = health_check
+        self.min_size = min_size
+        self.max_size = max(max_size, min_size, 1)
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.checkout_timeout = checkout_timeout
+
+        self._cond = threading.Condition()
+        self._idle = [] # [(conn, last_used, suspect)] — 마지막이 가장 최근에 반납된 연결
+        self._size = 0 # 열려 있는 연결 수 (사용 중 + 유휴)
+        self._closed = False
+
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+        self.created = 0
+        self.reaped = 0
+        self.health_check_failures = 0
+
+        for _ in range(min_size):
+            self._idle.append((self._create(), time.time(), False))
+
+        self._reaper = threading.Thread(target=self._reap_loop, name="snowflake-pool-reaper", daemon=True)
+        self._reaper.start()
+
+    def _create(self):
+        conn = self._factory()
+        with self._cond:
+            self._size += 1
+            self.created += 1
+        return conn
+
+    def _discard(self, conn):
+        try:
+            self._close(conn)
+        except Exception as e:
+            print(f"Error closing pooled connection: {e}")
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """요청 단위로 연결을 빌려 쓰고 반납합니다."""
+        conn = self.checkout()
+        clean = False
+        try:
+            yield conn
+            clean = True
+        finally:
+            # 어떤 이유로 끝나도(GeneratorExit/KeyboardInterrupt 포함) 반드시 반납
+            # 정상 종료가 아니면 다음 checkout 때 health check 를 받도록 suspect 로 반납
+            self.checkin(conn, suspect=not clean)
+
+    def checkout(self):
+        started = time.perf_counter()
+        deadline = time.time() + self.checkout_timeout
+        while True:
+            conn, last_used, suspect, create = None, None, False, False
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("연결 풀이 이미 닫혔습니다.")
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(f"{self.checkout_timeout}초 안에 Snowflake 연결을 얻지 못했습니다.")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    conn, last_used, suspect = self._idle.pop()
+                else:
+                    self._size += 1 # 자리 예약 후 잠금 밖에서 생성
+                    create = True
+
+            if create:
+                try:
+                    conn = self._factory()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self.created += 1
+            elif self._health_check and (suspect or time.time() - last_used >= self.health_check_after):
+                try:
+                    self._health_check(conn)
+                except Exception as e:
+                    print(f"Pooled connection failed health check, replacing: {e}")
+                    with self._cond:
+                        self.health_check_failures += 1
+                    self._discard(conn)
+                    continue
+
+            waited = time.perf_counter() - started
+            with self._cond:
+                self.checkouts += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            return conn
+
+    def checkin(self, conn, suspect: bool = False):
+        with self._cond:
+            if not self._closed:
+                self._idle.append((conn, time.time(), suspect))
+                self._cond.notify()
+                return
+        self._discard(conn)
+
+    def _reap_loop(self):
+        interval = max(1.0, self.idle_timeout / 2)
+        while True:
+            time.sleep(interval)
+            if self._closed:
+                return
+            self.reap_idle()
+
+    def reap_idle(self):
+        """idle_timeout 을 넘긴 유휴 연결을 min_size 까지 정리합니다."""
+        now = time.time()
+        expired = []
+        with self._cond:
+            keep = []
+            # 오래된 것부터 검사 (리스트 앞쪽)
+            for conn, last_used, suspect in self._idle:
+                if self._size - len(expired) > self.min_size and now - last_used >= self.idle_timeout:
+                    expired.append(conn)
+                else:
+                    keep.append((conn, last_used, suspect))
+            self._idle = keep
+            self.reaped += len(expired)
+        for conn in expired:
+            self._discard(conn)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+    def metrics(self) -> dict:
+        with self._cond:
+            in_use = self._size - len(self._idle)
+            return {
+                "size": self._size,
+                "in_use": in_use,
+                "idle": len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "utilization": in_use / self.max_size,
+                "checkouts": self.checkouts,
+                "wait_ms_avg": self.wait_seconds_total * 1000 / self.checkouts if self.checkouts else 0.0,
+                "wait_ms_max": self.wait_seconds_max * 1000,
+                "timeouts": self.timeouts,
+                "created": self.created,
+                "reaped": self.reaped,
+                "health_check_failures": self.health_check_failures,
+            }
@@ -1,3 +1,7 @@
+-- 아래 스크립트는 전체 재생성(CREATE OR REPLACE)용 원본입니다.
+-- 월 단위 증분·멱등 갱신은 snowflake_data_setting/pipeline.py 를 사용하세요:
+--   python -m snowflake_data_setting.pipeline --dry-run
+
 -- 사용할 데이터베이스 설정
 USE DATABASE MY_HACKATHON_DB;
 -- 사용할 스키마 설정
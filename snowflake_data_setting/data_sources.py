@@ -0,0 +1,402 @@
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from snowflake_data_setting.connection_pool import ConnectionPool
+from tracing import current_span, span
+
+# 앱/학습에서 조회하는 테이블 (로컬 백엔드는 <테이블명>.parquet 파일로 제공)
+APP_TABLES = (
+    "DEP_STORE_DATA",
+    "SALES_KOR_LABELING",
+    "SNOWFLAKE_STREAMLIT_HACKATHON_LOPLAT_HOME_OFFICE_RATIO",
+    "DONG_FEATURES",
+    "DEPT_HOME_RATIO",
+    "DEPT_WORK_RATIO",
+)
+
+CONNECTION_ENV_KEYS = {
+    "user": "DB_USER",
+    "password": "DB_PASSWORD",
+    "account": "DB_ACCOUNT",
+    "warehouse": "DB_WAREHOUSE",
+    "database": "DB_DATABASE",
+    "schema": "DB_SCHEMA",
+    "role": "DB_ROLE",
+}
+
+
+class DataSource:
+    """
+    SQL 조회 백엔드 공통 인터페이스.
+    query()는 '?' 바인드 파라미터를 받고 pandas DataFrame을 반환합니다 (컬럼명은 Snowflake와 같은 대문자).
+    """
+
+    name = "base"
+    # prepare() 가 실제로 바인딩/계획을 확인하는지. False 이면 클라이언트에서 잰 컴파일 시간은 의미가 없으므로
+    # query_stats 는 server_timings() 로 받은 서버 측 컴파일/실행 시간을 씁니다.
+    compiles_on_prepare = True
+
+    def connect(self) -> str:
+        """연결을 준비하고 연결 방식 설명 문자열을 반환합니다."""
+        raise NotImplementedError
+
+    @property
+    def is_connected(self) -> bool:
+        raise NotImplementedError
+
+    def query(self, sql: str, params=None) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def iter_arrow_batches(self, sql: str, params=None, batch_rows: int = 100_000):
+        """
+        결과를 pyarrow.RecordBatch/Table 단위로 나눠 내보냅니다 (전체 결과를 한 번에 메모리에 올리지 않음).
+        """
+        raise NotImplementedError
+
+    def execute(self, statements, transactional: bool = True):
+        """
+        DDL/DML 문장들을 한 연결에서 순서대로 실행합니다 (transactional=True 이면 BEGIN/COMMIT 으로 묶음).
+        statements: [(sql, params)] 목록
+        """
+        raise NotImplementedError
+
+    def prepare(self, sql: str, params=None):
+        """
+        SQL을 실행하지 않고 재사용 가능한 핸들을 반환합니다 (필요하면 바인딩/계획을 미리 확인).
+        핸들은 여러 스레드에서 동시에 execute_prepared 로 실행할 수 있어야 합니다.
+        """
+        raise NotImplementedError
+
+    def execute_prepared(self, handle, params=None) -> pd.DataFrame:
+        """
+        prepare() 핸들을 실행합니다. 서버 쿼리 ID 가 있는 백엔드는 결과 df.attrs["query_id"] 에 담습니다.
+        """
+        raise NotImplementedError
+
+    def server_timings(self, query_ids) -> dict:
+        """
+        서버가 기록한 쿼리별 시간 {query_id: (컴파일 ms, 실행 ms)}. 아직 기록되지 않은 쿼리는 빠집니다.
+        서버 쿼리 기록이 없는 백엔드는 빈 dict.
+        """
+        return {}
+
+    def table_versions(self, table_names) -> dict:
+        """테이블별 버전(마지막 변경 시각)을 반환합니다."""
+        raise NotImplementedError
+
+    def pool_metrics(self) -> dict:
+        """연결 풀 지표 (대기 시간, 사용률 등). 풀이 없는 백엔드는 빈 지표."""
+        return {"mode": self.name, "pooled": False}
+
+
+class SnowflakeDataSource(DataSource):
+    """
+    Snowpark 세션 기반 백엔드.
+    SiS 환경에서는 활성 세션 하나를 그대로 쓰고, 그 외에는 .env 설정으로 만든 세션을 ConnectionPool로 공유합니다.
+    예측 모델 학습과 위치 기반 조회가 모두 이 풀을 통해 요청 단위로 세션을 빌립니다.
+    """
+
+    name = "snowflake"
+    # 핸들은 SQL 텍스트뿐이고 컴파일은 서버가 실행 때 함 → 컴파일 시간은 QUERY_HISTORY 에서 읽음
+    compiles_on_prepare = False
+
+    def __init__(self, session=None, min_size: int = None, max_size: int = None, idle_timeout: float = None):
+        self.session = session # SiS 활성 세션 또는 외부에서 전달된 세션 (풀 미사용)
+        self.pool = None
+        self.mode = "provided" if session is not None else None
+        self.min_size = min_size if min_size is not None else int(os.getenv("SNOWFLAKE_POOL_MIN", "1"))
+        self.max_size = max_size if max_size is not None else int(os.getenv("SNOWFLAKE_POOL_MAX", "4"))
+        self.idle_timeout = idle_timeout if idle_timeout is not None else float(os.getenv("SNOWFLAKE_POOL_IDLE_SECONDS", "300"))
+        self._connect_lock = threading.Lock()
+
+    def connect(self) -> str:
+        if self.session is not None or self.pool is not None:
+            return self.mode
+
+        with self._connect_lock:
+            if self.session is not None or self.pool is not None:
+                return self.mode
+
+            from snowflake.snowpark import Session
+            from snowflake.snowpark.context import get_active_session
+
+            try:
+                # 1. Streamlit in Snowflake 환경 시도
+                self.session = get_active_session()
+                self.mode = "sis"
+                return self.mode
+            except Exception:
+                pass
+
+            # 2. SiS 실패 시 로컬 환경 설정으로 세션 풀 생성
+            load_dotenv()
+            connection_parameters = {key: os.getenv(env) for key, env in CONNECTION_ENV_KEYS.items()}
+            missing = [k for k, v in connection_parameters.items() if not v]
+            if missing:
+                raise ValueError(
+                    f".env 파일 또는 환경 변수에 다음 Snowflake 연결 정보가 누락되었습니다: {', '.join(missing)}"
+                )
+            self.pool = ConnectionPool(
+                factory=lambda: Session.builder.configs(connection_parameters).create(),
+                health_check=lambda session: session.sql("SELECT 1").collect(),
+                min_size=self.min_size,
+                max_size=self.max_size,
+                idle_timeout=self.idle_timeout,
+            )
+            self.mode = "env"
+            return self.mode
+
+    @property
+    def is_connected(self) -> bool:
+        return self.session is not None or self.pool is not None
+
+    @contextmanager
+    def checkout(self):
+        """요청 단위 세션 대여 (SiS/외부 세션이면 그 세션을 그대로 사용)."""
+        self.connect()
+        if self.pool is None:
+            yield self.session
+            return
+        with ExitStack() as stack:
+            # 풀에서 세션을 얻기까지(대기 + 생성/health check)만 db.connection 으로 기록
+            with span("db.connection", backend=self.name):
+                session = stack.enter_context(self.pool.connection())
+            yield session
+
+    def query(self, sql: str, params=None) -> pd.DataFrame:
+        with self.checkout() as session:
+            return session.sql(sql, params=params).to_pandas()
+
+    def iter_arrow_batches(self, sql: str, params=None, batch_rows: int = 100_000):
+        # 커넥터가 결과 청크 단위로 받아 오는 Arrow 테이블을 그대로 전달 (batch_rows 는 서버 청크 크기를 따름)
+        with self.checkout() as session:
+            cursor = session.connection.cursor()
+            try:
+                cursor.execute(sql, params)
+                yield from cursor.fetch_arrow_batches()
+            finally:
+                cursor.close()
+
+    def execute(self, statements, transactional: bool = True):
+        with self.checkout() as session:
+            if transactional:
+                session.sql("BEGIN").collect()
+            try:
+                for sql, params in statements:
+                    session.sql(sql, params=params).collect()
+            except Exception:
+                if transactional:
+                    session.sql("ROLLBACK").collect()
+                raise
+            if transactional:
+                session.sql("COMMIT").collect()
+
+    def prepare(self, sql: str, params=None):
+        # 풀의 어느 세션에서 실행해도 되도록 핸들은 SQL 텍스트만 보관
+        # (SQL 텍스트가 고정이라 서버의 컴파일 결과 재사용은 Snowflake가 처리 → 미리 describe 하지 않음)
+        return sql
+
+    def execute_prepared(self, handle, params=None) -> pd.DataFrame:
+        with self.checkout() as session:
+            cursor = session.connection.cursor()
+            try:
+                # execute 는 웨어하우스 실행이 끝날 때 반환 → 실행/전송 시간을 나눠 기록 (query_id 로 QUERY_HISTORY 조회 가능)
+                started = time.perf_counter()
+                cursor.execute(handle, params)
+                executed = time.perf_counter()
+                df = cursor.fetch_pandas_all()
+                current_span().set(query_id=cursor.sfqid, warehouse_ms=(executed - started) * 1000,
+                                   fetch_ms=(time.perf_counter() - executed) * 1000)
+                df.attrs["query_id"] = cursor.sfqid
+                return df
+            finally:
+                cursor.close()
+
+    def server_timings(self, query_ids) -> dict:
+        # QUERY_HISTORY 는 풀의 모든 세션(같은 사용자)의 쿼리를 보여 줌. 기록은 실행 후 몇 초 늦게 나타날 수 있음
+        query_ids = list(query_ids)
+        if not query_ids:
+            return {}
+        placeholders = ", ".join("?" for _ in query_ids)
+        df = self.query(
+            f"""
+            SELECT QUERY_ID, COMPILATION_TIME, EXECUTION_TIME
+            FROM TABLE(INFORMATION_SCHEMA.QUERY_HISTORY(RESULT_LIMIT => 10000))
+            WHERE QUERY_ID IN ({placeholders})
+            """,
+            query_ids,
+        )
+        return {row.QUERY_ID: (float(row.COMPILATION_TIME or 0), float(row.EXECUTION_TIME or 0))
+                for row in df.itertuples(index=False)}
+
+    def pool_metrics(self) -> dict:
+        if self.pool is None:
+            return {"mode": self.mode, "pooled": False}
+        return {"mode": self.mode, "pooled": True, **self.pool.metrics()}
+
+    def table_versions(self, table_names) -> dict:
+        placeholders = ", ".join("?" for _ in table_names)
+        df = self.query(
+            f"""
+            SELECT TABLE_NAME, LAST_ALTERED
+            FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = CURRENT_SCHEMA() AND TABLE_NAME IN ({placeholders})
+            """,
+            [name.upper() for name in table_names],
+        )
+        return {row["TABLE_NAME"]: str(row["LAST_ALTERED"]) for _, row in df.iterrows()}
+
+
+class LocalDataSource(DataSource):
+    """
+    로컬 Parquet 파일 + DuckDB 백엔드 (네트워크/자격 증명 없이 실행, 벤치마크, 부하 테스트용).
+    data_dir 안의 <테이블명>.parquet 파일을 같은 이름의 뷰로 등록하므로 앱의 SQL을 그대로 실행할 수 있습니다.
+    """
+
+    name = "local"
+
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+        self._con = None
+        self._lock = threading.Lock()
+
+    def connect(self) -> str:
+        if self._con is not None:
+            return self.data_dir
+
+        import duckdb
+
+        if not os.path.isdir(self.data_dir):
+            raise FileNotFoundError(f"로컬 데이터 디렉터리를 찾을 수 없습니다: {self.data_dir}")
+
+        con = duckdb.connect(database=":memory:")
+        for file_name in sorted(os.listdir(self.data_dir)):
+            if not file_name.endswith(".parquet"):
+                continue
+            table = file_name[: -len(".parquet")].upper()
+            path = os.path.join(self.data_dir, file_name).replace("'", "''")
+            con.execute(f"CREATE OR REPLACE VIEW {table} AS SELECT * FROM read_parquet('{path}')")
+        self._con = con
+        return self.data_dir
+
+    @property
+    def is_connected(self) -> bool:
+        return self._con is not None
+
+    def _cursor(self):
+        # DuckDB 연결은 스레드 간 공유 불가 → 요청마다 커서(독립 연결) 사용
+        with span("db.connection", backend=self.name):
+            with self._lock:
+                return self._con.cursor()
+
+    def query(self, sql: str, params=None) -> pd.DataFrame:
+        self.connect()
+        cursor = self._cursor()
+        try:
+            return cursor.execute(sql, params or []).df()
+        finally:
+            cursor.close()
+
+    def iter_arrow_batches(self, sql: str, params=None, batch_rows: int = 100_000):
+        self.connect()
+        cursor = self._cursor()
+        try:
+            reader = cursor.execute(sql, params or []).fetch_record_batch(batch_rows)
+            yield from reader
+        finally:
+            cursor.close()
+
+    def execute(self, statements, transactional: bool = True):
+        self.connect()
+        cursor = self._cursor()
+        try:
+            if transactional:
+                cursor.execute("BEGIN TRANSACTION")
+            try:
+                for sql, params in statements:
+                    cursor.execute(sql, params or [])
+            except Exception:
+                if transactional:
+                    cursor.execute("ROLLBACK")
+                raise
+            if transactional:
+                cursor.execute("COMMIT")
+        finally:
+            cursor.close()
+
+    def prepare(self, sql: str, params=None):
+        # EXPLAIN 으로 바인딩/계획 수립만 확인하고 핸들은 SQL 텍스트만 보관 (실행은 호출마다 별도 커서)
+        self.connect()
+        cursor = self._cursor()
+        try:
+            cursor.execute(f"EXPLAIN {sql}", params or [])
+        finally:
+            cursor.close()
+        return sql
+
+    def execute_prepared(self, handle, params=None) -> pd.DataFrame:
+        self.connect()
+        cursor = self._cursor()
+        try:
+            started = time.perf_counter()
+            result = cursor.execute(handle, params or [])
+            executed = time.perf_counter()
+            df = result.df()
+        finally:
+            cursor.close()
+        # Snowflake 백엔드와 같은 키로 기록 (로컬은 DuckDB 실행 시간)
+        current_span().set(warehouse_ms=(executed - started) * 1000, fetch_ms=(time.perf_counter() - executed) * 1000)
+        return df
+
+    def table_versions(self, table_names) -> dict:
+        versions = {}
+        for name in table_names:
+            path = os.path.join(self.data_dir, f"{name.upper()}.parquet")
+            if os.path.exists(path):
+                versions[name.upper()] = str(os.path.getmtime(path))
+        return versions
+
+
+def export_tables(source: DataSource, data_dir: str, tables=APP_TABLES):
+    """
+    현재 백엔드(보통 Snowflake)의 테이블을 로컬 Parquet 스냅샷으로 저장합니다.
+    저장한 디렉터리를 LOCAL_DATA_DIR로 지정하면 LocalDataSource로 같은 데이터를 조회할 수 있습니다.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    for table in tables:
+        df = source.query(f"SELECT * FROM {table}")
+        df.to_parquet(os.path.join(data_dir, f"{table.upper()}.parquet"), index=False)
+        print(f"Exported {len(df)} rows from {table}.")
+
+
+_source = None
+_source_lock = threading.Lock()
+
+
+def get_data_source() -> DataSource:
+    """
+    프로세스 공유 데이터 소스를 반환합니다.
+    DATA_SOURCE=local 이면 LOCAL_DATA_DIR(기본 local_data)의 Parquet 파일을, 그 외에는 Snowflake를 사용합니다.
+    """
+    global _source
+    if _source is None:
+        with _source_lock:
+            if _source is None:
+                load_dotenv()
+                if os.getenv("DATA_SOURCE", "snowflake").lower() == "local":
+                    _source = LocalDataSource(os.getenv("LOCAL_DATA_DIR", "local_data"))
+                else:
+                    _source = SnowflakeDataSource()
+    return _source
+
+
+if __name__ == "__main__":
+    # Snowflake 테이블을 로컬 스냅샷으로 내보내기: python -m snowflake_data_setting.data_sources <디렉터리>
+    import sys
+
+    export_tables(SnowflakeDataSource(), sys.argv[1] if len(sys.argv) > 1 else "local_data")
@@ -0,0 +1,384 @@
+"""
+data_preprocessing.sql 의 테이블 생성 단계를 증분·멱등으로 실행하는 파이프라인 드라이버.
+
+- 월 단위(STANDARD_YEAR_MONTH) 테이블은 원천의 월별 행 수/HASH_AGG 지문을 PIPELINE_PARTITION_STATE 에 기록하고,
+  새로 생기거나 내용이 바뀐 월만 DELETE + INSERT 로 다시 적재합니다 (사라진 월은 삭제).
+- 코드/지역/비율 같은 작은 차원 테이블은 전체 지문이 바뀐 경우에만 CREATE OR REPLACE 합니다.
+- 차원 테이블이 바뀌면 그것을 조인하는 라벨링 테이블은 전체 재생성합니다.
+- --steps 로 일부 단계만 골라도 그 단계가 읽는 앞 단계(reads / depends_on)는 계획에 함께 포함합니다
+  (앞 단계가 이미 최신이면 skip). 앞 단계 결과가 오래된 채로 뒤 단계만 최신으로 기록되지 않도록 하기 위함입니다.
+
+    python -m snowflake_data_setting.pipeline --dry-run        # 실행 계획(대상 월, SQL)만 출력
+    python -m snowflake_data_setting.pipeline                  # 실행
+    python -m snowflake_data_setting.pipeline --steps SALES_KOR_LABELING
+"""
+import argparse
+import os
+
+from snowflake_data_setting.data_sources import get_data_source
+
+# 결과 테이블을 만들 데이터베이스.스키마
+TARGET_SCHEMA = os.getenv("PIPELINE_DATABASE", "MY_HACKATHON_DB.PUBLIC")
+STATE_TABLE = f"{TARGET_SCHEMA}.PIPELINE_PARTITION_STATE"
+
+GRANDATA = "SEOUL_DISTRICTLEVEL_DATA_FLOATING_POPULATION_CONSUMPTION_AND_ASSETS.GRANDATA"
+HOME_OFFICE_RATIO_SOURCE = (
+    "RESIDENTIAL__WORKPLACE_TRAFFIC_PATTERNS_FOR_SNOWFLAKE_STREAMLIT_HACKATHON"
+    ".PUBLIC.SNOWFLAKE_STREAMLIT_HACKATHON_LOPLAT_HOME_OFFICE_RATIO"
+)
+
+PARTITION_COLUMN = "STANDARD_YEAR_MONTH"
+
+# 카드 소비 데이터 업종별 금액/건수 컬럼 (SALES_KOR_LABELING 컬럼 순서 그대로)
+SALES_COLUMNS = [
+    "TOTAL_SALES", "FOOD_SALES", "COFFEE_SALES", "ENTERTAINMENT_SALES", "DEPARTMENT_STORE_SALES",
+    "LARGE_DISCOUNT_STORE_SALES", "SMALL_RETAIL_STORE_SALES", "CLOTHING_ACCESSORIES_SALES",
+    "SPORTS_CULTURE_LEISURE_SALES", "ACCOMMODATION_SALES", "TRAVEL_SALES", "BEAUTY_SALES",
+    "HOME_LIFE_SERVICE_SALES", "EDUCATION_ACADEMY_SALES", "MEDICAL_SALES", "ELECTRONICS_FURNITURE_SALES",
+    "CAR_SALES", "CAR_SERVICE_SUPPLIES_SALES", "GAS_STATION_SALES", "E_COMMERCE_SALES",
+]
+COUNT_COLUMNS = [
+    "TOTAL_COUNT", "FOOD_COUNT", "COFFEE_COUNT", "ENTERTAINMENT_COUNT", "DEPARTMENT_STORE_COUNT",
+    "LARGE_DISCOUNT_STORE_COUNT", "SMALL_RETAIL_STORE_COUNT", "CLOTHING_ACCESSORIES_COUNT",
+    "SPORTS_CULTURE_LEISURE_COUNT", "ACCOMMODATION_COUNT", "TRAVEL_COUNT", "BEAUTY_COUNT",
+    "HOME_LIFE_SERVICE_COUNT", "EDUCATION_ACADEMY_COUNT", "MEDICAL_COUNT", "ELECTRONICS_FURNITURE_COUNT",
+    "CAR_SALES_COUNT", "CAR_SERVICE_SUPPLIES_COUNT", "GAS_STATION_COUNT", "E_COMMERCE_COUNT",
+]
+
+
+def _code_map(name: str, code_id: str, code_alias: str, name_alias: str) -> str:
+    return f"""{name} AS (
+        SELECT SUB_CODE AS {code_alias}, SUB_CODE_NAME AS {name_alias}
+        FROM {TARGET_SCHEMA}.CARD_CODE_DATA
+        WHERE CODE_ID = '{code_id}'
+    )"""
+
+
+REGION_MAP = f"""REGION_MAP AS (
+        SELECT
+            PROVINCE_CODE, CITY_CODE, DISTRICT_CODE,
+            PROVINCE_KOR_NAME AS PROVINCE_NAME,
+            CITY_KOR_NAME AS CITY_NAME,
+            DISTRICT_KOR_NAME AS DISTRICT_NAME
+        FROM {TARGET_SCHEMA}.REGION_DATA
+    )"""
+
+SALES_KOR_LABELING_SELECT = f"""
+    WITH
+    {_code_map("CARD_TYPE_MAP", "M08", "CARD_TYPE_CODE", "CARD_TYPE_NAME")},
+    {_code_map("LIFESTYLE_MAP", "M06", "LIFESTYLE_CODE", "LIFESTYLE_NAME")},
+    {_code_map("TIME_SLOT_MAP", "M03", "TIME_SLOT_CODE", "TIME_SLOT_NAME")},
+    {REGION_MAP}
+    SELECT
+        S.PROVINCE_CODE, R.PROVINCE_NAME, S.CITY_CODE, R.CITY_NAME, S.DISTRICT_CODE, R.DISTRICT_NAME,
+        S.STANDARD_YEAR_MONTH,
+        S.CARD_TYPE, C.CARD_TYPE_NAME,
+        S.WEEKDAY_WEEKEND, S.GENDER, S.AGE_GROUP,
+        S.TIME_SLOT, T.TIME_SLOT_NAME,
+        S.LIFESTYLE, L.LIFESTYLE_NAME,
+        {", ".join("S." + c for c in SALES_COLUMNS + COUNT_COLUMNS)}
+    FROM {TARGET_SCHEMA}.SEOUL_CARD_SALES_DATA S
+    LEFT JOIN CARD_TYPE_MAP C ON S.CARD_TYPE = C.CARD_TYPE_CODE
+    LEFT JOIN LIFESTYLE_MAP L ON S.LIFESTYLE = L.LIFESTYLE_CODE
+    LEFT JOIN TIME_SLOT_MAP T ON S.TIME_SLOT = T.TIME_SLOT_CODE
+    LEFT JOIN REGION_MAP R
+        ON S.PROVINCE_CODE = R.PROVINCE_CODE
+        AND S.CITY_CODE = R.CITY_CODE
+        AND S.DISTRICT_CODE = R.DISTRICT_CODE
+    {{where}}
+"""
+
+POPULATION_KOR_LABELING_SELECT = f"""
+    WITH
+    {_code_map("TIME_SLOT_MAP", "M03", "TIME_SLOT_CODE", "TIME_SLOT_NAME")},
+    {REGION_MAP}
+    SELECT
+        P.PROVINCE_CODE, R.PROVINCE_NAME, P.CITY_CODE, R.CITY_NAME, P.DISTRICT_CODE, R.DISTRICT_NAME,
+        P.STANDARD_YEAR_MONTH, P.WEEKDAY_WEEKEND, P.GENDER, P.AGE_GROUP,
+        P.TIME_SLOT, T.TIME_SLOT_NAME,
+        P.RESIDENTIAL_POPULATION, P.WORKING_POPULATION, P.VISITING_POPULATION
+    FROM {TARGET_SCHEMA}.SEOUL_POPULATION_DATA P
+    LEFT JOIN REGION_MAP R
+        ON P.PROVINCE_CODE = R.PROVINCE_CODE
+        AND P.CITY_CODE = R.CITY_CODE
+        AND P.DISTRICT_CODE = R.DISTRICT_CODE
+    LEFT JOIN TIME_SLOT_MAP T ON P.TIME_SLOT = T.TIME_SLOT_CODE
+    {{where}}
+"""
+
+# 모델 학습용 집계 테이블 (피처 조합 × 월 단위). 모델은 월을 합산한 가중치 행으로 학습합니다.
+FEATURE_KEYS = "AGE_GROUP, GENDER, TIME_SLOT, WEEKDAY_WEEKEND, LIFESTYLE"
+DEP_STORE_FEATURE_CUBE_SELECT = f"""
+    SELECT D.STANDARD_YEAR_MONTH, {FEATURE_KEYS}, DEP_NAME, COUNT(*) AS ROW_COUNT
+    FROM {TARGET_SCHEMA}.DEP_STORE_DATA D
+    {{where}}
+    GROUP BY D.STANDARD_YEAR_MONTH, {FEATURE_KEYS}, DEP_NAME
+"""
+
+# 지출 집계는 동(DISTRICT_NAME)별로 남기고, 학습 대상 동(카탈로그의 백화점 소재 동)은 모델이 읽을 때 고름
+# → 새 매장의 소재 동이 카탈로그에 추가되어도 집계 테이블을 다시 만들 필요가 없음
+SALES_DISTRICT_FEATURE_CUBE_SELECT = f"""
+    SELECT
+        S.STANDARD_YEAR_MONTH, DISTRICT_NAME, {FEATURE_KEYS}, CARD_TYPE,
+        COUNT(*) AS ROW_COUNT,
+        SUM(COALESCE(DEPARTMENT_STORE_SALES, 0)) AS SALES_SUM,
+        SUM(COALESCE(DEPARTMENT_STORE_SALES, 0) * COALESCE(DEPARTMENT_STORE_SALES, 0)) AS SALES_SUM_SQ
+    FROM {TARGET_SCHEMA}.SALES_KOR_LABELING S
+    {{where}}
+    GROUP BY S.STANDARD_YEAR_MONTH, DISTRICT_NAME, {FEATURE_KEYS}, CARD_TYPE
+"""
+
+
+class Step:
+    """
+    파이프라인 한 단계: target 테이블을 select_sql 로 채웁니다.
+    - fingerprint_source: 변경 감지에 쓰는 원천 테이블 (파생 테이블도 최초 원천 기준으로 추적)
+    - partition_expr: select_sql 안에서 월 필터에 쓰는 식. None 이면 전체 재생성 단계
+    - depends_on: 이 단계가 조인하는 차원 단계. 차원이 바뀌면 전체 재생성
+    - reads: 이 단계가 읽는 월 단위 앞 단계 (fingerprint_source 의 적재본). 앞 단계가 전체 재생성되면 함께 재생성
+    select_sql 의 {where} 자리에 월 필터(WHERE ... IN (...))가 들어갑니다.
+    """
+
+    def __init__(self, name, select_sql, fingerprint_source, partition_expr=None, depends_on=(), reads=()):
+        self.name = name
+        self.target = f"{TARGET_SCHEMA}.{name}"
+        self.select_sql = select_sql
+        self.fingerprint_source = fingerprint_source
+        self.partition_expr = partition_expr
+        self.depends_on = tuple(depends_on)
+        self.reads = tuple(reads)
+
+    @property
+    def partitioned(self) -> bool:
+        return self.partition_expr is not None
+
+    def select(self, where: str = "") -> str:
+        return self.select_sql.format(where=where)
+
+
+def _copy_step(name, source, partitioned=True, select_list="*", where=""):
+    partition_expr = PARTITION_COLUMN if partitioned else None
+    return Step(name, f"SELECT {select_list} FROM {source} {where}{{where}}", source, partition_expr)
+
+
+# data_preprocessing.sql 과 같은 순서 (차원 테이블이 라벨링 테이블보다 먼저)
+# LOPLAT 백화점 방문 데이터도 STANDARD_YEAR_MONTH 로 월 단위 적재된다고 가정
+STEPS = [
+    _copy_step("DEP_STORE_DATA", "LOPLAT_DB.PUBLIC.SNOWFLAKE_STREAMLIT_HACKATHON_LOPLAT_DEPARTMENT_STORE_DATA"),
+    _copy_step("SEOUL_POPULATION_DATA", f"{GRANDATA}.FLOATING_POPULATION_INFO"),
+    _copy_step("SEOUL_CARD_SALES_DATA", f"{GRANDATA}.CARD_SALES_INFO"),
+    # 영문 지명/지역 위치 정보 컬럼은 적재 시점에 제외 (원본 스크립트의 ALTER TABLE DROP COLUMN 대체)
+    _copy_step("REGION_DATA", f"{GRANDATA}.M_SCCO_MST", partitioned=False,
+               select_list="* EXCLUDE (PROVINCE_ENG_NAME, CITY_ENG_NAME, DISTRICT_ENG_NAME, DISTRICT_GEOM)"),
+    _copy_step("CARD_CODE_DATA", f"{GRANDATA}.CODE_MASTER", partitioned=False),
+    Step("SALES_KOR_LABELING", SALES_KOR_LABELING_SELECT, f"{GRANDATA}.CARD_SALES_INFO",
+         partition_expr=f"S.{PARTITION_COLUMN}", depends_on=("CARD_CODE_DATA", "REGION_DATA"),
+         reads=("SEOUL_CARD_SALES_DATA",)),
+    Step("POPULATION_KOR_LABELING", POPULATION_KOR_LABELING_SELECT, f"{GRANDATA}.FLOATING_POPULATION_INFO",
+         partition_expr=f"P.{PARTITION_COLUMN}", depends_on=("CARD_CODE_DATA", "REGION_DATA"),
+         reads=("SEOUL_POPULATION_DATA",)),
+    _copy_step("DEPT_HOME_RATIO", HOME_OFFICE_RATIO_SOURCE, partitioned=False, where="WHERE LOC_TYPE = 1 "),
+    _copy_step("DEPT_WORK_RATIO", HOME_OFFICE_RATIO_SOURCE, partitioned=False, where="WHERE LOC_TYPE = 2 "),
+    # 집계 테이블은 위 테이블들과 같은 원천 월 지문을 따라 증분 갱신
+    Step("DEP_STORE_FEATURE_CUBE", DEP_STORE_FEATURE_CUBE_SELECT,
+         "LOPLAT_DB.PUBLIC.SNOWFLAKE_STREAMLIT_HACKATHON_LOPLAT_DEPARTMENT_STORE_DATA",
+         partition_expr=f"D.{PARTITION_COLUMN}", reads=("DEP_STORE_DATA",)),
+    Step("SALES_DISTRICT_FEATURE_CUBE", SALES_DISTRICT_FEATURE_CUBE_SELECT, f"{GRANDATA}.CARD_SALES_INFO",
+         partition_expr=f"S.{PARTITION_COLUMN}", depends_on=("REGION_DATA",), reads=("SALES_KOR_LABELING",)),
+]
+
+
+def select_steps(step_names=None, steps=STEPS) -> list:
+    """
+    이름으로 고른 단계와 그 단계가 읽는 앞 단계(depends_on, reads)를 재귀적으로 모아 실행 순서대로 반환합니다.
+    """
+    if not step_names:
+        return list(steps)
+    by_name = {step.name: step for step in steps}
+    unknown = [name for name in step_names if name not in by_name]
+    if unknown:
+        raise ValueError(f"알 수 없는 파이프라인 단계: {', '.join(unknown)}")
+    selected, pending = set(), list(step_names)
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending += by_name[name].depends_on + by_name[name].reads
+    return [step for step in steps if step.name in selected]
+
+
+class StepPlan:
+    def __init__(self, step, mode, partitions=(), removed=(), fingerprints=None):
+        self.step = step
+        self.mode = mode # skip / incremental / rebuild
+        self.partitions = list(partitions) # 다시 적재할 월 (원본 값)
+        self.removed = list(removed) # 원천에서 사라진 월 (상태 테이블 문자열 값)
+        self.fingerprints = fingerprints or {} # 월(문자열) → (원본 값, 행 수, 해시)
+
+    def statements(self):
+        """
+        (ddl, dml) 문장 목록을 반환합니다. DDL은 Snowflake에서 암묵적 커밋이므로 트랜잭션 밖에서 실행합니다.
+        """
+        step = self.step
+        ddl, dml = [], []
+        if self.mode == "skip":
+            return ddl, dml
+
+        if self.mode == "rebuild":
+            ddl.append((f"CREATE OR REPLACE TABLE {step.target} AS {step.select()}", None))
+            dml.append((f"DELETE FROM {STATE_TABLE} WHERE STEP_NAME = ?", [step.name]))
+        else:
+            ddl.append((f"CREATE TABLE IF NOT EXISTS {step.target} AS {step.select('WHERE 1 = 0')}", None))
+            stale = self.partitions + self.removed
+            if stale:
+                placeholders = ", ".join("?" for _ in stale)
+                dml.append((f"DELETE FROM {step.target} WHERE {PARTITION_COLUMN} IN ({placeholders})", stale))
+                dml.append((
+                    f"DELETE FROM {STATE_TABLE} WHERE STEP_NAME = ? AND PARTITION_VALUE IN ({placeholders})",
+                    [step.name] + [str(p) for p in stale],
+                ))
+            if self.partitions:
+                placeholders = ", ".join("?" for _ in self.partitions)
+                where = f"WHERE {step.partition_expr} IN ({placeholders})"
+                dml.append((f"INSERT INTO {step.target} {step.select(where)}", list(self.partitions)))
+
+        refreshed = self.fingerprints if self.mode == "rebuild" else {
+            str(p): self.fingerprints[str(p)] for p in self.partitions
+        }
+        if refreshed:
+            values = ", ".join("(?, ?, ?, ?, CURRENT_TIMESTAMP())" for _ in refreshed)
+            params = []
+            for key, (_, row_count, content_hash) in refreshed.items():
+                params += [step.name, key, int(row_count), int(content_hash)]
+            dml.append((f"INSERT INTO {STATE_TABLE} VALUES {values}", params))
+        return ddl, dml
+
+
+def ensure_state_table(source, dry_run: bool = False):
+    sql = f"""
+    CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+        STEP_NAME VARCHAR,
+        PARTITION_VALUE VARCHAR,
+        ROW_COUNT NUMBER,
+        CONTENT_HASH NUMBER,
+        MATERIALIZED_AT TIMESTAMP_NTZ
+    )
+    """
+    if not dry_run:
+        source.execute([(sql, None)], transactional=False)
+
+
+def source_fingerprints(source, step) -> dict:
+    # 원천의 월별(또는 전체) 행 수와 HASH_AGG(*) 지문
+    partition = PARTITION_COLUMN if step.partitioned else "'*'"
+    group_by = "GROUP BY 1" if step.partitioned else ""
+    df = source.query(f"""
+        SELECT {partition} AS PARTITION_VALUE, COUNT(*) AS ROW_COUNT, HASH_AGG(*) AS CONTENT_HASH
+        FROM {step.fingerprint_source}
+        {group_by}
+    """)
+    fingerprints = {}
+    for row in df.itertuples(index=False):
+        # numpy 스칼라는 커넥터 바인딩이 안 되므로 파이썬 값으로 변환
+        value = row.PARTITION_VALUE.item() if hasattr(row.PARTITION_VALUE, "item") else row.PARTITION_VALUE
+        fingerprints[str(value)] = (value, int(row.ROW_COUNT), int(row.CONTENT_HASH or 0))
+    return fingerprints
+
+
+def materialized_state(source, step) -> dict:
+    try:
+        df = source.query(
+            f"SELECT PARTITION_VALUE, ROW_COUNT, CONTENT_HASH FROM {STATE_TABLE} WHERE STEP_NAME = ?",
+            [step.name],
+        )
+    except Exception:
+        # 상태 테이블이 아직 없음 (dry-run 첫 실행)
+        return {}
+    return {str(row.PARTITION_VALUE): (int(row.ROW_COUNT), int(row.CONTENT_HASH)) for row in df.itertuples(index=False)}
+
+
+def plan(source, steps=STEPS) -> list:
+    """각 단계가 다시 적재해야 할 월(또는 전체 재생성 여부)을 계산합니다. 읽기 쿼리만 실행합니다."""
+    plans = {}
+    for step in steps:
+        fingerprints = source_fingerprints(source, step)
+        state = materialized_state(source, step)
+        changed = [fp[0] for key, fp in fingerprints.items() if state.get(key) != fp[1:]]
+        removed = [key for key in state if key not in fingerprints]
+        dimension_changed = any(plans[d].mode != "skip" for d in step.depends_on if d in plans) \
+            or any(plans[d].mode == "rebuild" for d in step.reads if d in plans)
+
+        if not step.partitioned:
+            mode = "rebuild" if changed or removed else "skip"
+            plans[step.name] = StepPlan(step, mode, fingerprints=fingerprints)
+        elif dimension_changed or not state:
+            # 조인 대상 차원이 바뀌었거나, 읽는 앞 단계가 전체 재생성되었거나, 처음 적재 → 전체 재생성
+            plans[step.name] = StepPlan(step, "rebuild", fingerprints=fingerprints)
+        elif changed or removed:
+            plans[step.name] = StepPlan(step, "incremental", changed, removed, fingerprints)
+        else:
+            plans[step.name] = StepPlan(step, "skip")
+    return [plans[step.name] for step in steps]
+
+
+def print_plan(plans):
+    for step_plan in plans:
+        step = step_plan.step
+        if step_plan.mode == "skip":
+            print(f"[skip]        {step.name}")
+            continue
+        detail = ""
+        if step_plan.mode == "incremental":
+            detail = f" months={sorted(map(str, step_plan.partitions))} removed={sorted(step_plan.removed)}"
+        print(f"[{step_plan.mode:11s}] {step.name}{detail}")
+        ddl, dml = step_plan.statements()
+        for sql, params in ddl + dml:
+            print("    " + " ".join(sql.split())[:200] + (" ..." if len(" ".join(sql.split())) > 200 else ""))
+            if params:
+                print(f"      params={params[:8]}{' ...' if len(params) > 8 else ''}")
+
+
+def run(dry_run: bool = False, step_names=None, source=None) -> list:
+    """
+    파이프라인을 실행하고 내용이 바뀐 대상 테이블 이름 목록을 반환합니다.
+    각 단계의 DML(삭제/적재/상태 기록)은 한 트랜잭션으로 묶여 있어 중간에 실패해도 다시 실행하면 같은 결과가 됩니다.
+    """
+    source = source or get_data_source()
+    steps = select_steps(step_names)
+    added = [s.name for s in steps if step_names and s.name not in step_names]
+    if added:
+        print(f"Including upstream steps: {', '.join(added)}")
+
+    ensure_state_table(source, dry_run)
+    plans = plan(source, steps)
+    print_plan(plans)
+    if dry_run:
+        return []
+
+    changed_tables = []
+    for step_plan in plans:
+        if step_plan.mode == "skip":
+            continue
+        ddl, dml = step_plan.statements()
+        source.execute(ddl, transactional=False)
+        source.execute(dml, transactional=True)
+        changed_tables.append(step_plan.step.name)
+        print(f"Materialized {step_plan.step.name} ({step_plan.mode}).")
+
+    if changed_tables:
+        # 같은 프로세스의 조회 캐시 무효화 (앱 프로세스에서 실행한 경우)
+        from snowflake_data_setting.query_cache import invalidate_tables
+        invalidate_tables(changed_tables)
+    return changed_tables
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="실행 계획만 출력")
+    parser.add_argument("--steps", help="실행할 단계 이름 (쉼표 구분, 기본 전체)")
+    args = parser.parse_args()
+    run(dry_run=args.dry_run, step_names=args.steps.split(",") if args.steps else None)
+
+
+if __name__ == "__main__":
+    main()
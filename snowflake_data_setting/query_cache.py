@@ -0,0 +1,333 @@
+import functools
+import hashlib
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+import single_flight
+
+# 네임스페이스(캐시 대상 함수 묶음) → 원천 테이블: 테이블 갱신 시 해당 네임스페이스만 무효화
+NAMESPACE_TABLES = {
+    "store_score": ("SNOWFLAKE_STREAMLIT_HACKATHON_LOPLAT_HOME_OFFICE_RATIO",),
+    "estimated_spending": ("DONG_FEATURES",),
+}
+
+
+def estimate_size(value, _seen=None) -> int:
+    # DataFrame/Series 는 실제 메모리 사용량, dict/list/tuple/set 은 담긴 값까지 재귀로 합산
+    # (sys.getsizeof 는 컨테이너 자신의 크기만 세므로 큰 dict 결과도 수백 바이트로 잡힘)
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    size = sys.getsizeof(value)
+    if isinstance(value, (dict, list, tuple, set, frozenset)):
+        _seen = set() if _seen is None else _seen
+        if id(value) in _seen:
+            return 0
+        _seen.add(id(value))
+        items = value.items() if isinstance(value, dict) else ((item,) for item in value)
+        for item in items:
+            size += sum(estimate_size(part, _seen) for part in item)
+    return size
+
+
+class QueryCache:
+    """
+    쿼리 결과용 LRU + TTL 캐시.
+    - max_entries / max_bytes 중 하나라도 넘으면 가장 오래 안 쓴 항목부터 제거
+    - 키에 네임스페이스별 데이터 버전이 포함되므로 invalidate() 후에는 이전 결과가 절대 반환되지 않음
+    - disk_dir 를 지정하면 메모리에서 밀려난/재시작 전 결과를 디스크에서 다시 읽음 (2단계 캐시)
+    - version_check_seconds 마다 원천 테이블 버전을 확인하므로(check_table_versions) 다른 프로세스가
+      테이블을 갱신해도(pipeline 등) 이 프로세스의 결과가 버려짐
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024,
+                 ttl_seconds: float = 3600, disk_dir: str = None, version_check_seconds: float = 60):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self.version_check_seconds = version_check_seconds
+        self._versions_checked_at = 0.0
+        self._version_check_lock = threading.Lock()
+        self._entries = OrderedDict() # key → (expires_at, size, value)
+        self._bytes = 0
+        self._versions = {} # namespace → 원천 데이터 버전 (set_data_version)
+        self._generations = {} # namespace → 무효화 횟수 (invalidate)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # --- 데이터 버전 / 무효화 ---
+
+    def data_version(self, namespace: str):
+        return (self._versions.get(namespace), self._generations.get(namespace, 0))
+
+    def set_data_version(self, namespace: str, version):
+        """원천 테이블 버전을 알고 있으면 그대로 키에 사용 (바뀌면 자동으로 새 키)."""
+        with self._lock:
+            previous = self._versions.get(namespace)
+            if previous != version:
+                self._versions[namespace] = version
+                # 처음 버전을 알게 된 경우 디스크의 결과는 다른 프로세스가 같은 버전으로 저장한 것일 수 있으므로 유지
+                self._drop_namespace(namespace, disk=previous is not None)
+
+    def invalidate(self, namespace: str = None):
+        """
+        갱신 작업에서 호출하는 무효화 훅. namespace가 None이면 전체를 비웁니다.
+        데이터 버전을 올리므로 디스크에 남은 이전 결과도 더 이상 사용되지 않습니다.
+        """
+        with self._lock:
+            namespaces = [namespace] if namespace else list(set(self._generations) | set(NAMESPACE_TABLES))
+            for ns in namespaces:
+                self._generations[ns] = self._generations.get(ns, 0) + 1
+                self._drop_namespace(ns)
+        print(f"Query cache invalidated: {namespace or 'all'}")
+
+    def invalidate_tables(self, table_names):
+        # 바뀐 테이블을 사용하는 네임스페이스만 무효화
+        changed = {name.upper() for name in table_names}
+        for namespace, tables in NAMESPACE_TABLES.items():
+            if changed.intersection(tables):
+                self.invalidate(namespace)
+
+    def sync_table_versions(self, table_versions: dict):
+        """
+        {테이블명: 버전} (snowpark_queries.get_table_versions 결과)으로 네임스페이스 데이터 버전을 맞춥니다.
+        버전이 바뀐 네임스페이스의 기존 결과는 버려집니다.
+        """
+        for namespace, tables in NAMESPACE_TABLES.items():
+            self.set_data_version(namespace, "|".join(str(table_versions.get(t)) for t in tables))
+
+    def check_table_versions(self, version_fn, force: bool = False) -> bool:
+        """
+        version_check_seconds 마다 version_fn(테이블 목록) → {테이블명: 버전} 으로 원천 테이블 버전을 확인해 맞춥니다.
+        cached_query 가 조회 때마다 호출하며, 다른 스레드가 확인 중이면 기다리지 않고 넘어갑니다 (force 이면 기다림).
+        버전을 얻지 못하면({} 또는 오류) 기존 버전을 유지합니다.
+        """
+        if not force and (self.version_check_seconds <= 0
+                          or time.time() - self._versions_checked_at < self.version_check_seconds):
+            return False
+        if not self._version_check_lock.acquire(blocking=force):
+            return False
+        try:
+            if not force and time.time() - self._versions_checked_at < self.version_check_seconds:
+                return False
+            tables = sorted({t for tables in NAMESPACE_TABLES.values() for t in tables})
+            try:
+                versions = version_fn(tables)
+            except Exception as e:
+                print(f"Query cache version check failed: {e}")
+                versions = None
+            self._versions_checked_at = time.time()
+            if not versions:
+                return False
+            self.sync_table_versions(versions)
+            return True
+        finally:
+            self._version_check_lock.release()
+
+    def _drop_namespace(self, namespace: str, disk: bool = True):
+        for key in [k for k in self._entries if k[0] == namespace]:
+            _, size, _ = self._entries.pop(key)
+            self._bytes -= size
+        if self.disk_dir and disk:
+            ns_dir = os.path.join(self.disk_dir, namespace)
+            if os.path.isdir(ns_dir):
+                for file_name in os.listdir(ns_dir):
+                    os.remove(os.path.join(ns_dir, file_name))
+
+    # --- 조회 / 저장 ---
+
+    def make_key(self, namespace: str, args: tuple):
+        return (namespace, self.data_version(namespace), args)
+
+    def get(self, key):
+        """(hit 여부, 값)을 반환합니다."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, size, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                self._entries.pop(key)
+                self._bytes -= size
+
+        if self.disk_dir:
+            found, expires_at, value = self._read_disk(key)
+            if found and expires_at > now:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._store(key, value, expires_at)
+                return True, value
+
+        with self._lock:
+            self.misses += 1
+        return False, None
+
+    def set(self, key, value, ttl_seconds: float = None):
+        expires_at = time.time() + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        with self._lock:
+            if key[1] != self.data_version(key[0]):
+                return # 계산 도중 무효화됨 → 저장하지 않음
+            self._store(key, value, expires_at)
+        if self.disk_dir:
+            self._write_disk(key, value, expires_at)
+
+    def _store(self, key, value, expires_at):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        self._entries[key] = (expires_at, size, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def _disk_path(self, key):
+        digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_dir, key[0], f"{digest}.pkl")
+
+    def _read_disk(self, key):
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                stored_key, expires_at, value = pickle.load(f)
+        except (OSError, pickle.PickleError, EOFError, ValueError):
+            return False, 0, None
+        if stored_key != key:
+            return False, 0, None
+        return True, expires_at, value
+
+    def _write_disk(self, key, value, expires_at):
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(f"{path}.tmp", "wb") as f:
+                pickle.dump((key, expires_at, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            print(f"Query cache disk write failed: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "versions": dict(self._versions),
+                "generations": dict(self._generations),
+            }
+
+
+# 프로세스 공유 캐시 (환경 변수로 크기/TTL/디스크 계층 설정)
+query_cache = QueryCache(
+    max_entries=int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "1024")),
+    max_bytes=int(os.getenv("QUERY_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    ttl_seconds=float(os.getenv("QUERY_CACHE_TTL_SECONDS", "3600")),
+    disk_dir=os.getenv("QUERY_CACHE_DIR") or None,
+    version_check_seconds=float(os.getenv("QUERY_CACHE_VERSION_CHECK_SECONDS", "60")),
+)
+
+
+def _freeze(value):
+    # 리스트 인자(예: 여러 쌍)도 키로 쓸 수 있도록 튜플로 변환
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def source_table_versions(table_names):
+    # 이미 연결된 데이터 소스의 테이블 버전 (캐시 확인 때문에 새로 연결하지는 않음)
+    from snowflake_data_setting.data_sources import get_data_source
+
+    source = get_data_source()
+    if not source.is_connected:
+        return None
+    return source.table_versions(table_names)
+
+
+class uncached:
+    """
+    조회 함수가 이 값으로 감싸서 반환하면 캐시에 저장하지 않고 value만 돌려줍니다.
+    (연결 실패·쿼리 오류 결과가 TTL 동안 남지 않도록)
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+
+def _has_script_context() -> bool:
+    # 작업 스레드(analysis_tasks 등)에는 Streamlit 스크립트 컨텍스트가 없어 스피너를 그릴 수 없음
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return False
+    return get_script_run_ctx(suppress_warning=True) is not None
+
+
+def cached_query(namespace: str, spinner: str = None, ttl_seconds: float = None, cache: QueryCache = None):
+    """
+    조회 함수용 캐시 데코레이터 (st.cache_data 대체).
+    캐시 미스일 때만 spinner 메시지를 보여주며, DataFrame은 복사본을 반환해 호출 측 수정이 캐시에 번지지 않게 합니다.
+    캐시 미스인 같은 호출이 동시에 여러 번 들어오면 single_flight 로 한 번만 실행하고 결과를 나눠 받습니다.
+    원천 테이블 버전은 QUERY_CACHE_VERSION_CHECK_SECONDS 마다 확인해 바뀐 네임스페이스의 결과를 버립니다.
+    """
+    def decorator(func):
+        flight = single_flight.group(namespace)
+
+        def load(target, key, args, kwargs):
+            value = func(*args, **kwargs)
+            # 실행이 끝나기 전에 캐시에 넣어, 이 실행을 기다리지 않은 뒤이은 호출도 캐시에 적중하도록 함
+            if not isinstance(value, uncached):
+                target.set(key, value, ttl_seconds)
+            return value
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            target = cache or query_cache
+            target.check_table_versions(source_table_versions)
+            call_args = (func.__qualname__, _freeze(args), _freeze(tuple(sorted(kwargs.items()))))
+            key = target.make_key(namespace, call_args)
+            hit, value = target.get(key)
+            if not hit:
+                if spinner and _has_script_context():
+                    import streamlit as st
+                    with st.spinner(spinner):
+                        value = flight.do(key, load, target, key, args, kwargs)
+                else:
+                    value = flight.do(key, load, target, key, args, kwargs)
+                if isinstance(value, uncached):
+                    value = value.value # 저장하지 않은 결과도 기다린 호출들과 나눠 가지므로 아래에서 복사
+            return value.copy() if isinstance(value, pd.DataFrame) else value
+        wrapper.cache_namespace = namespace
+        return wrapper
+    return decorator
+
+
+def invalidate(namespace: str = None):
+    """갱신 작업용 무효화 훅 (예: data_preprocessing 재실행 후 호출)."""
+    query_cache.invalidate(namespace)
+
+
+def invalidate_tables(table_names):
+    # 호출한 프로세스의 캐시와 디스크 계층만 비움 (다른 프로세스는 check_table_versions 로 변경을 감지)
+    query_cache.invalidate_tables(table_names)
@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from collections import deque
+
+import pandas as pd
+
+from snowflake_data_setting.data_sources import get_data_source
+from tracing import span
+
+# 서버 측 컴파일/실행 시간(Snowflake QUERY_HISTORY)을 모아 오는 간격(초)과 기다리는 최대 시간(초)
+SERVER_TIMING_SECONDS = float(os.getenv("QUERY_SERVER_TIMING_SECONDS", "30"))
+SERVER_TIMING_MAX_AGE = 600
+# 서버 시간을 기다리는 쿼리 ID 최대 개수 (넘치면 오래된 것부터 버림 → 표본)
+SERVER_TIMING_PENDING = 1000
+
+
+class PreparedQuery:
+    """
+    이름이 붙은 고정 SQL(바인드 파라미터 '?' 사용) 하나와 그 컴파일 핸들, 실행 통계를 보관합니다.
+    SQL 텍스트가 값과 무관하게 항상 같으므로 동(dong)이 달라도 같은 핸들을 재사용합니다.
+    핸들은 여러 스레드가 동시에 실행할 수 있으므로 잠금은 컴파일/통계 갱신에만 사용하고 실행은 병렬로 합니다.
+    prepare 가 아무 일도 하지 않는 백엔드(Snowflake)는 실행 결과의 쿼리 ID 를 모아 두었다가
+    백그라운드에서 서버가 기록한 컴파일/실행 시간을 읽어 옵니다 (collect_server_timings).
+    """
+
+    def __init__(self, name: str, sql: str):
+        self.name = name
+        self.sql = sql
+        self._handle = None
+        self._handle_source = None
+        self._lock = threading.Lock()
+        self.compile_count = 0
+        self.compile_seconds = 0.0
+        self.execute_count = 0
+        self.execute_seconds = 0.0
+        self.rows = 0
+        self.errors = 0
+        self._pending = deque(maxlen=SERVER_TIMING_PENDING) # 서버 시간을 기다리는 (쿼리 ID, 실행 시각)
+        self.server_timed = 0
+        self.server_compile_ms = 0.0
+        self.server_execute_ms = 0.0
+
+    def _prepared_handle(self, source, params):
+        with self._lock:
+            if self._handle is None or self._handle_source is not source:
+                started = time.perf_counter()
+                with span("sql.compile", query=self.name):
+                    self._handle = source.prepare(self.sql, params)
+                self._handle_source = source
+                self.compile_seconds += time.perf_counter() - started
+                self.compile_count += 1
+            return self._handle
+
+    def run(self, params=None, source=None) -> pd.DataFrame:
+        source = source or get_data_source()
+        handle = None
+        try:
+            handle = self._prepared_handle(source, params)
+            started = time.perf_counter()
+            with span("sql.query", query=self.name) as current:
+                df = source.execute_prepared(handle, params)
+                current.set(rows=len(df), bytes=int(df.memory_usage(index=False, deep=True).sum()))
+            query_id = df.attrs.get("query_id")
+            with self._lock:
+                self.execute_seconds += time.perf_counter() - started
+                self.execute_count += 1
+                self.rows += len(df)
+                if query_id:
+                    self._pending.append((query_id, time.time()))
+            if query_id:
+                _start_timing_sampler()
+            return df
+        except Exception:
+            with self._lock:
+                # 연결이 끊겼을 수 있으므로 다음 호출에서 다시 컴파일 (그 사이 다른 스레드가 새로 만든 핸들은 유지)
+                if handle is None or self._handle is handle:
+                    self._handle = None
+                self.errors += 1
+            raise
+
+    def collect_server_timings(self) -> int:
+        """서버에 기록된 쿼리의 컴파일/실행 시간을 합산하고 반영한 쿼리 수를 반환합니다."""
+        source = self._handle_source
+        with self._lock:
+            pending = list(self._pending)
+            self._pending.clear()
+        if not pending or source is None:
+            return 0
+        try:
+            timings = source.server_timings([query_id for query_id, _ in pending])
+        except Exception as e:
+            print(f"Server timing lookup failed for {self.name}: {e}")
+            timings = {}
+        now = time.time()
+        with self._lock:
+            for query_id, executed_at in pending:
+                timing = timings.get(query_id)
+                if timing is not None:
+                    self.server_timed += 1
+                    self.server_compile_ms += timing[0]
+                    self.server_execute_ms += timing[1]
+                elif now - executed_at < SERVER_TIMING_MAX_AGE:
+                    # 아직 기록되지 않음 → 다음에 다시 확인
+                    self._pending.append((query_id, executed_at))
+        return len(timings)
+
+    def stats(self) -> dict:
+        # 클라이언트 컴파일 시간은 prepare 가 실제로 컴파일하는 백엔드에서만 (그 외에는 비워서 표시하지 않음)
+        client_compile = self._handle_source is None or getattr(self._handle_source, "compiles_on_prepare", True)
+        return {
+            "query": self.name,
+            "compile_count": self.compile_count if client_compile else None,
+            "compile_ms_total": self.compile_seconds * 1000 if client_compile else None,
+            "execute_count": self.execute_count,
+            "execute_ms_total": self.execute_seconds * 1000,
+            "execute_ms_avg": self.execute_seconds * 1000 / self.execute_count if self.execute_count else 0.0,
+            "server_timed": self.server_timed if self.server_timed else None,
+            "server_compile_ms_avg": self.server_compile_ms / self.server_timed if self.server_timed else None,
+            "server_execute_ms_avg": self.server_execute_ms / self.server_timed if self.server_timed else None,
+            "rows": self.rows,
+            "errors": self.errors,
+        }
+
+
+_queries = {}
+_queries_lock = threading.Lock()
+_sampler = None
+
+
+def collect_server_timings() -> int:
+    """모든 쿼리 모양의 대기 중인 쿼리 ID 로 서버 측 시간을 읽어 옵니다."""
+    return sum(query.collect_server_timings() for query in list(_queries.values()))
+
+
+def _sample_loop():
+    while True:
+        time.sleep(SERVER_TIMING_SECONDS)
+        collect_server_timings()
+
+
+def _start_timing_sampler():
+    global _sampler
+    if _sampler is not None or SERVER_TIMING_SECONDS <= 0:
+        return
+    with _queries_lock:
+        if _sampler is None:
+            _sampler = threading.Thread(target=_sample_loop, name="query-server-timings", daemon=True)
+            _sampler.start()
+
+
+def prepared(name: str, sql: str) -> PreparedQuery:
+    """
+    (이름, SQL) 모양별 PreparedQuery를 프로세스 전체에서 공유합니다 (세션/호출 간 재사용).
+    """
+    key = (name, sql)
+    query = _queries.get(key)
+    if query is None:
+        with _queries_lock:
+            query = _queries.get(key)
+            if query is None:
+                query = PreparedQuery(name, sql)
+                _queries[key] = query
+    return query
+
+
+def run_query(name: str, sql: str, params=None) -> pd.DataFrame:
+    return prepared(name, sql).run(params)
+
+
+def query_stats() -> pd.DataFrame:
+    """
+    쿼리 모양별 컴파일/실행 시간 통계. 값이 없는 열(Snowflake 의 클라이언트 컴파일 시간,
+    로컬 백엔드의 서버 시간)은 빼고 반환합니다.
+    """
+    return pd.DataFrame([query.stats() for query in list(_queries.values())]).dropna(axis=1, how="all")
@@ -1,131 +1,182 @@
-from snowflake.snowpark.context import get_active_session
-from snowflake.snowpark import Session
+import os
+from functools import lru_cache
+
 import pandas as pd
 import streamlit as st
-import os
-from dotenv import load_dotenv
-
-# 🔌 세션 연결: SiS 우선, 실패 시 로컬 설정 시도
-session = None
-try:
-    # 1. Streamlit in Snowflake 환경 시도
-    session = get_active_session()
-    st.success("❄️ Streamlit in Snowflake 환경에서 활성 Snowpark 세션을 가져왔습니다.")
-except Exception:
-    # 2. SiS 실패 시 로컬 환경 설정 시도
-    st.warning("Streamlit in Snowflake 활성 세션을 찾을 수 없습니다. 로컬 설정으로 세션 생성을 시도합니다...")
-    try:
-        load_dotenv()
-        connection_parameters = {
-            "user": os.getenv("DB_USER"),
-            "password": os.getenv("DB_PASSWORD"),
-            "account": os.getenv("DB_ACCOUNT"),
-            "warehouse": os.getenv("DB_WAREHOUSE"),
-            "database": os.getenv("DB_DATABASE"),
-            "schema": os.getenv("DB_SCHEMA"),
-            "role": os.getenv("DB_ROLE"),
-        }
-        if not all(connection_parameters.values()):
-            missing = [k for k, v in connection_parameters.items() if not v]
-            st.error(f".env 파일 또는 환경 변수에 다음 Snowflake 연결 정보가 누락되었습니다: {', '.join(missing)}")
-            st.stop()
-
-        session = Session.builder.configs(connection_parameters).create()
-        st.success("✅ 로컬 설정(.env)으로 Snowpark 세션을 성공적으로 생성했습니다.")
-    except Exception as e:
-        st.error(f"로컬 설정으로 Snowpark 세션 생성에 실패했습니다: {e}")
-        st.exception(e)
-        st.stop()
+from snowflake_data_setting.data_sources import get_data_source
+from snowflake_data_setting.catalog import get_catalog
+from snowflake_data_setting.query_layer import run_query
+from snowflake_data_setting.query_cache import cached_query, uncached
+
+# 🔌 데이터 소스 연결: 임포트 시점이 아니라 첫 조회 시점에 연결 (페이지 첫 렌더링을 막지 않음)
+# DATA_SOURCE=local 이면 로컬 Parquet(DuckDB), 아니면 Snowflake (SiS 우선, 실패 시 로컬 설정)
+def get_source():
+    """
+    연결된 데이터 소스를 반환합니다. 연결에 실패하면 오류를 표시하고 None을 반환합니다.
+    """
+    source = get_data_source()
+    if not source.is_connected:
+        try:
+            source.connect()
+        except Exception as e:
+            print(f"Data source connection failed: {e}")
+            st.error(f"데이터 소스 연결에 실패했습니다: {e}")
+            return None
+    return source
+
+
+# ⚖️ 위치 기반 점수 가중치 (환경 변수로 조정 가능)
+HOME_WEIGHT = float(os.getenv("STORE_SCORE_HOME_WEIGHT", "0.6"))
+WORK_WEIGHT = float(os.getenv("STORE_SCORE_WORK_WEIGHT", "0.4"))
+
+
+def store_name_map() -> dict:
+    """백화점 이름 매핑 (LOPLAT 원본 이름 → 표시 이름, 카탈로그 기준)."""
+    return get_catalog().store_names
+
+
+@lru_cache(maxsize=64)
+def build_store_score_query(n_pairs: int, n_names: int) -> str:
+    """
+    (거주지, 직장) 쌍 n_pairs개를 한 번에 점수화하는 SQL을 만듭니다.
+    가중치 계산, FULL OUTER JOIN, 백화점 이름 매핑을 모두 엔진에서 처리합니다.
+    바인드 순서: 쌍(거주지, 직장) × n_pairs → 거주지 가중치 → 직장 가중치 → 이름 매핑(원본, 표시) × n_names
+    """
+    pair_values = ", ".join(["(?, ?)"] * n_pairs)
+    pairs_cte = f"""PAIRS AS (
+        SELECT * FROM (VALUES {pair_values}) AS P(RES_DONG, WORK_DONG)
+    )"""
+    if n_names:
+        name_map = f"(VALUES {', '.join(['(?, ?)'] * n_names)}) AS M(RAW_NAME, STORE_NAME)"
+    else:
+        # 매핑할 이름이 없으면 빈 매핑 테이블 (VALUES 는 행이 하나 이상 필요)
+        name_map = "(SELECT CAST(NULL AS VARCHAR) AS RAW_NAME, CAST(NULL AS VARCHAR) AS STORE_NAME) M"
+    return f"""
+    WITH {pairs_cte},
+    HOME AS (
+        SELECT P.RES_DONG, P.WORK_DONG, R.DEP_NAME, R.RATIO
+        FROM PAIRS P
+        JOIN SNOWFLAKE_STREAMLIT_HACKATHON_LOPLAT_HOME_OFFICE_RATIO R
+          ON R.ADDR_LV3 = P.RES_DONG AND R.LOC_TYPE = 1
+    ),
+    WORK AS (
+        SELECT P.RES_DONG, P.WORK_DONG, R.DEP_NAME, R.RATIO
+        FROM PAIRS P
+        JOIN SNOWFLAKE_STREAMLIT_HACKATHON_LOPLAT_HOME_OFFICE_RATIO R
+          ON R.ADDR_LV3 = P.WORK_DONG AND R.LOC_TYPE = 2
+    ),
+    SCORED AS (
+        SELECT
+            COALESCE(H.RES_DONG, W.RES_DONG) AS RES_DONG,
+            COALESCE(H.WORK_DONG, W.WORK_DONG) AS WORK_DONG,
+            COALESCE(H.DEP_NAME, W.DEP_NAME) AS DEP_NAME,
+            COALESCE(H.RATIO, 0) * ? + COALESCE(W.RATIO, 0) * ? AS SCORE
+        FROM HOME H
+        FULL OUTER JOIN WORK W
+          ON H.RES_DONG = W.RES_DONG AND H.WORK_DONG = W.WORK_DONG AND H.DEP_NAME = W.DEP_NAME
+    )
+    SELECT S.RES_DONG, S.WORK_DONG, COALESCE(M.STORE_NAME, S.DEP_NAME) AS DEP_NAME, S.SCORE
+    FROM SCORED S
+    LEFT JOIN {name_map}
+      ON S.DEP_NAME = M.RAW_NAME
+    ORDER BY S.RES_DONG, S.WORK_DONG, S.SCORE DESC
+    """
+
+
+def _bucket(n: int) -> int:
+    # 쌍/이름 개수를 2의 거듭제곱으로 올림 → 입력 개수가 달라도 쿼리 모양(SQL 텍스트)은 몇 개뿐
+    return 1 << (n - 1).bit_length() if n > 0 else 0
+
+
+def _padded(items, size: int) -> list:
+    # 남는 자리는 (NULL, NULL) — NULL 키는 어떤 조인에도 걸리지 않으므로 결과가 같음
+    items = list(items) + [(None, None)] * (size - len(items))
+    return [value for item in items for value in item]
+
+
+def _name_params():
+    # 원본 이름과 표시 이름이 다른 매장만 매핑 (나머지는 원본 이름 그대로)
+    names = [(raw, name) for raw, name in store_name_map().items() if raw != name]
+    n_names = _bucket(len(names))
+    return n_names, _padded(names, n_names)
+
+
+def _query_store_scores(pairs, home_weight: float, work_weight: float) -> pd.DataFrame:
+    # 중복 쌍 제거 (FULL OUTER JOIN 키 중복 방지)
+    pairs = list(dict.fromkeys((res, work) for res, work in pairs))
+    n_pairs = _bucket(len(pairs))
+    n_names, name_params = _name_params()
+    params = _padded(pairs, n_pairs) + [home_weight, work_weight] + name_params
+    df = run_query(f"store_scores[{n_pairs}x{n_names}]", build_store_score_query(n_pairs, n_names), params)
+    return df.rename(columns={'SCORE': 'score'})
 
-# 세션 최종 확인
-if not session:
-    st.error("Snowpark 세션을 초기화할 수 없습니다. 앱을 중지합니다.")
-    st.stop()
 
 # 🧠 데이터 처리 함수 (캐싱)
-@st.cache_data(show_spinner="🌀 [위치 기반] 백화점 선호도 점수를 계산 중입니다...")
-def get_store_score(res_dong: str, work_dong: str) -> pd.DataFrame:
+@cached_query("store_score", spinner="🌀 [위치 기반] 백화점 선호도 점수를 계산 중입니다...")
+def get_store_score(res_dong: str, work_dong: str, home_weight: float = None, work_weight: float = None) -> pd.DataFrame:
     """
     거주지와 직장지 정보를 바탕으로 백화점별 선호도 점수를 계산합니다.
     LOC_TYPE: 1=거주지 기준, 2=직장지 기준
-    점수 = 거주지 비율 * 0.6 + 직장지 비율 * 0.4
-    """
-    if not session:
-        st.error("Snowpark 세션이 활성화되지 않았습니다.")
-        return pd.DataFrame({'DEP_NAME': [], 'score': []})
-
-    # 주거지 기준 쿼리
-    query_home = f"""
-    SELECT DEP_NAME, RATIO
-    FROM SNOWFLAKE_STREAMLIT_HACKATHON_LOPLAT_HOME_OFFICE_RATIO
-    WHERE ADDR_LV3 = '{res_dong}' AND LOC_TYPE = 1
+    점수 = 거주지 비율 * HOME_WEIGHT(0.6) + 직장지 비율 * WORK_WEIGHT(0.4), 쿼리 한 번으로 계산
     """
+    if get_source() is None:
+        return uncached(pd.DataFrame({'DEP_NAME': [], 'score': []}))
+
     try:
-        home_df = session.sql(query_home).to_pandas()
+        df = _query_store_scores(
+            [(res_dong, work_dong)],
+            HOME_WEIGHT if home_weight is None else home_weight,
+            WORK_WEIGHT if work_weight is None else work_weight,
+        )
     except Exception as e:
-        st.error(f"거주지 기반 데이터 조회 중 오류 발생: {e}")
-        home_df = pd.DataFrame({'DEP_NAME': [], 'RATIO': []})
-
-    # 직장지 기준 쿼리
-    query_work = f"""
-    SELECT DEP_NAME, RATIO
-    FROM SNOWFLAKE_STREAMLIT_HACKATHON_LOPLAT_HOME_OFFICE_RATIO
-    WHERE ADDR_LV3 = '{work_dong}' AND LOC_TYPE = 2
+        st.error(f"위치 기반 데이터 조회 중 오류 발생: {e}")
+        return uncached(pd.DataFrame({'DEP_NAME': [], 'score': []}))
+
+    return df[['DEP_NAME', 'score']].reset_index(drop=True)
+
+
+@cached_query("store_score", spinner="🌀 [위치 기반] 백화점 선호도 점수를 일괄 계산 중입니다...")
+def get_store_scores(pairs, home_weight: float = None, work_weight: float = None) -> pd.DataFrame:
+    """
+    여러 (거주지, 직장) 쌍의 백화점별 선호도 점수를 쿼리 한 번으로 계산합니다.
+    반환 컬럼: RES_DONG, WORK_DONG, DEP_NAME, score (쌍별 점수 내림차순)
     """
+    empty = pd.DataFrame({'RES_DONG': [], 'WORK_DONG': [], 'DEP_NAME': [], 'score': []})
+    if get_source() is None:
+        return uncached(empty)
+    if not pairs:
+        return empty
+
     try:
-        work_df = session.sql(query_work).to_pandas()
+        return _query_store_scores(
+            pairs,
+            HOME_WEIGHT if home_weight is None else home_weight,
+            WORK_WEIGHT if work_weight is None else work_weight,
+        )
     except Exception as e:
-        st.error(f"직장지 기반 데이터 조회 중 오류 발생: {e}")
-        work_df = pd.DataFrame({'DEP_NAME': [], 'RATIO': []})
-
-    # 점수 결합 계산
-    if home_df.empty and work_df.empty:
-        return pd.DataFrame({'DEP_NAME': [], 'score': []})
-    elif home_df.empty:
-        merged = work_df.rename(columns={'RATIO': 'RATIO_work'})
-        merged['RATIO_home'] = 0
-    elif work_df.empty:
-        merged = home_df.rename(columns={'RATIO': 'RATIO_home'})
-        merged['RATIO_work'] = 0
-    else:
-        merged = pd.merge(home_df, work_df, on="DEP_NAME", how="outer", suffixes=("_home", "_work")).fillna(0)
-
-    # 점수 계산 (RATIO_home 또는 RATIO_work가 없을 경우 대비)
-    merged["score"] = merged.get("RATIO_home", 0) * 0.6 + merged.get("RATIO_work", 0) * 0.4
-    merged = merged.sort_values("score", ascending=False)
-
-    # 백화점 이름 매핑
-    store_name_map = {
-        '롯데백화점_본점': '롯데백화점',
-        '신세계_강남': '신세계백화점',
-        '더현대서울': '현대백화점'
-    }
-    if 'DEP_NAME' in merged.columns:
-        merged['DEP_NAME'] = merged['DEP_NAME'].replace(store_name_map)
-    else:
-        st.warning("결과에 DEP_NAME 컬럼이 없어 백화점 이름을 변환할 수 없습니다.")
-        return pd.DataFrame({'DEP_NAME': [], 'score': []})
+        st.error(f"위치 기반 데이터 일괄 조회 중 오류 발생: {e}")
+        return uncached(empty)
 
-    return merged[['DEP_NAME', 'score']]
+
+# 거주지 평균 소비액 조회 (값은 바인드 파라미터로 전달 → SQL 텍스트 고정)
+ESTIMATED_SPENDING_QUERY = """
+    SELECT AVG_DEPARTMENT_STORE_SALES
+    FROM dong_features
+    WHERE DONG = ?
+"""
 
 # 🧠 소비력 추정 함수 (캐싱)
-@st.cache_data(show_spinner="💳 [위치 기반] 평균 소비력을 추정 중입니다...")
+@cached_query("estimated_spending", spinner="💳 [위치 기반] 평균 소비력을 추정 중입니다...")
 def get_estimated_spending(res_dong: str) -> int:
     """
     거주지 동(dong)을 기준으로 'dong_features' 테이블에서
     평균 백화점 소비액(AVG_DEPARTMENT_STORE_SALES)을 조회합니다.
     """
-    if not session:
-        st.error("Snowpark 세션이 활성화되지 않았습니다.")
-        return 0
+    if get_source() is None:
+        return uncached(0)
 
-    query = f"""
-    SELECT AVG_DEPARTMENT_STORE_SALES
-    FROM dong_features
-    WHERE DONG = '{res_dong}'
-    """
     try:
-        df = session.sql(query).to_pandas()
+        df = run_query("estimated_spending", ESTIMATED_SPENDING_QUERY, [res_dong])
         if df.empty or pd.isna(df.iloc[0, 0]):
             st.warning(f"'{res_dong}'에 대한 소비력 데이터가 없습니다.")
             return 0
@@ -137,4 +188,43 @@ def get_estimated_spending(res_dong: str) -> int:
             return 0
     except Exception as e:
         st.error(f"소비력 데이터 조회 중 오류 발생: {e}")
-        return 0 
\ No newline at end of file
+        return uncached(0)
+
+ALL_ESTIMATED_SPENDING_QUERY = """
+    SELECT DONG, AVG_DEPARTMENT_STORE_SALES
+    FROM dong_features
+"""
+
+
+@cached_query("estimated_spending", spinner="💳 [위치 기반] 동별 평균 소비력을 불러오는 중입니다...")
+def get_estimated_spendings(dongs) -> dict:
+    """
+    dongs 의 평균 백화점 소비액을 쿼리 한 번으로 조회합니다. 데이터가 없는 동은 0입니다.
+    """
+    if get_source() is None:
+        return uncached({})
+
+    try:
+        df = run_query("estimated_spendings", ALL_ESTIMATED_SPENDING_QUERY)
+    except Exception as e:
+        st.error(f"소비력 데이터 일괄 조회 중 오류 발생: {e}")
+        return uncached({})
+    values = pd.to_numeric(df["AVG_DEPARTMENT_STORE_SALES"], errors="coerce")
+    spending = dict(zip(df["DONG"], values.fillna(0).astype("int64")))
+    return {dong: int(spending.get(dong, 0)) for dong in dongs}
+
+# 🧾 원천 테이블 버전 조회 (캐싱하지 않음: 변경 감지용)
+def get_table_versions(table_names) -> dict:
+    """
+    Snowflake는 INFORMATION_SCHEMA.TABLES 의 LAST_ALTERED, 로컬 백엔드는 Parquet 파일 수정 시각을 버전으로 사용합니다.
+    미리 계산된 결과(예: prediction_grid)를 어떤 테이블 변경 때 다시 만들지 판단하는 데 씁니다.
+    """
+    source = get_source()
+    if source is None:
+        return {}
+
+    try:
+        return source.table_versions(table_names)
+    except Exception as e:
+        print(f"Error loading table versions: {e}")
+        return {}
@@ -0,0 +1,199 @@
+"""
+거주지 × 직장 × 백화점 위치 기반 선호도(affinity) 사전 계산.
+
+점수 = 거주지 비율 × 거주지 가중치 + 직장 비율 × 직장 가중치 는 (거주지, 백화점) 항과 (직장, 백화점) 항의 합이므로
+DEPT_HOME_RATIO / DEPT_WORK_RATIO 를 동 × 백화점 배열 두 장(거주지 층, 직장 층)으로 저장하면
+모든 (거주지, 직장) 쌍의 점수를 그대로 복원할 수 있습니다 (dense() 가 거주지 × 직장 × 백화점 배열을 만듦).
+- 배열은 .npy 하나(2 × 동 × 백화점, float32, 없음은 NaN)로 저장하고 np.load(mmap_mode="r") 로 메모리 매핑
+- 조회는 배열 인덱싱만 하므로 쿼리가 없고, 가중치는 조회 시점에 적용 → 가중치를 바꿔도 다시 만들 필요 없음
+- 만들기(배치 작업): python store_affinity.py  (원천 테이블 버전이 같으면 건너뜀)
+"""
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from model_store import ARTIFACT_DIR
+
+AFFINITY_FILE = "store_affinity.npy"
+AFFINITY_META_FILE = "store_affinity.json"
+
+HOME, WORK = 0, 1 # 층 번호 (LOC_TYPE 1 = 거주지, 2 = 직장)
+AFFINITY_TABLES = ("DEPT_HOME_RATIO", "DEPT_WORK_RATIO")
+RATIO_TABLE = "SNOWFLAKE_STREAMLIT_HACKATHON_LOPLAT_HOME_OFFICE_RATIO"
+
+AFFINITY_QUERY = """
+SELECT 1 AS LOC_TYPE, ADDR_LV3, DEP_NAME, RATIO FROM DEPT_HOME_RATIO
+UNION ALL
+SELECT 2 AS LOC_TYPE, ADDR_LV3, DEP_NAME, RATIO FROM DEPT_WORK_RATIO
+"""
+# 파이프라인의 DEPT_*_RATIO 테이블이 없으면(예: 로컬 스냅샷) 같은 내용을 원본 비율 테이블에서 읽음
+AFFINITY_FALLBACK_QUERY = f"""
+SELECT LOC_TYPE, ADDR_LV3, DEP_NAME, RATIO FROM {RATIO_TABLE}
+WHERE LOC_TYPE IN (1, 2)
+"""
+
+
+class StoreAffinity:
+    """
+    ratios: (2, 동 수, 백화점 수) 배열 — [HOME] 거주지 비율, [WORK] 직장 비율 (해당 없음은 NaN)
+    dongs / stores(원본 이름) / store_names(표시 이름) 는 각 축의 이름입니다.
+    """
+
+    def __init__(self, ratios, dongs, stores, store_names, versions=None):
+        self.ratios = ratios
+        self.dongs = list(dongs)
+        self.stores = list(stores)
+        self.store_names = np.asarray(store_names, dtype=object)
+        self.versions = versions or {}
+        self._dong_idx = {dong: i for i, dong in enumerate(self.dongs)}
+
+    @classmethod
+    def from_ratios(cls, df: pd.DataFrame, catalog, versions=None):
+        """LOC_TYPE, ADDR_LV3, DEP_NAME, RATIO 행으로 배열을 만듭니다. 축 순서는 카탈로그를 따릅니다."""
+        df = df.dropna(subset=["ADDR_LV3", "DEP_NAME"])
+        dongs = list(catalog.dongs) + sorted(set(df["ADDR_LV3"].astype(str)) - set(catalog.dongs))
+        stores = list(catalog.stores) + sorted(set(df["DEP_NAME"].astype(str)) - set(catalog.stores))
+
+        layer = df["LOC_TYPE"].astype(int).to_numpy() - 1
+        dong = pd.Index(dongs).get_indexer(df["ADDR_LV3"].astype(str))
+        store = pd.Index(stores).get_indexer(df["DEP_NAME"].astype(str))
+        valid = (layer >= 0) & (layer <= 1)
+
+        ratios = np.full((2, len(dongs), len(stores)), np.nan, dtype=np.float32)
+        # (층, 동, 백화점)이 중복되면 마지막 행 값 사용
+        ratios[layer[valid], dong[valid], store[valid]] = df["RATIO"].to_numpy(dtype=np.float32)[valid]
+        return cls(ratios, dongs, stores, [catalog.canonical_store(s) for s in stores], versions)
+
+    def lookup(self, res_dong, work_dong, home_weight: float = None, work_weight: float = None):
+        """
+        (거주지, 직장)의 백화점별 점수 DataFrame(DEP_NAME, score, 점수 내림차순). 동을 모르면 None.
+        get_store_score 와 같은 결과이며, 가중치를 생략하면 STORE_SCORE_*_WEIGHT 설정값을 사용합니다.
+        """
+        from snowflake_data_setting.snowpark_queries import HOME_WEIGHT, WORK_WEIGHT
+
+        r = self._dong_idx.get(res_dong)
+        w = self._dong_idx.get(work_dong)
+        if r is None or w is None:
+            return None
+        home = self.ratios[HOME, r]
+        work = self.ratios[WORK, w]
+        # 거주지/직장 중 한쪽에만 있는 백화점은 다른 쪽 비율을 0으로 계산 (쿼리의 FULL OUTER JOIN 과 같음)
+        present = ~(np.isnan(home) & np.isnan(work))
+        score = (np.nan_to_num(home) * (HOME_WEIGHT if home_weight is None else home_weight)
+                 + np.nan_to_num(work) * (WORK_WEIGHT if work_weight is None else work_weight))
+        df = pd.DataFrame({"DEP_NAME": self.store_names[present], "score": score[present].astype(float)})
+        return df.sort_values("score", ascending=False, kind="stable").reset_index(drop=True)
+
+    def dense(self, home_weight: float = None, work_weight: float = None) -> np.ndarray:
+        """거주지 × 직장 × 백화점 점수 배열 (분석용, 메모리에 새로 만듦). 두 동 모두 비율이 없는 칸은 NaN."""
+        from snowflake_data_setting.snowpark_queries import HOME_WEIGHT, WORK_WEIGHT
+
+        home = self.ratios[HOME][:, np.newaxis, :]
+        work = self.ratios[WORK][np.newaxis, :, :]
+        score = (np.nan_to_num(home) * (HOME_WEIGHT if home_weight is None else home_weight)
+                 + np.nan_to_num(work) * (WORK_WEIGHT if work_weight is None else work_weight))
+        return np.where(np.isnan(home) & np.isnan(work), np.nan, score).astype(np.float32)
+
+    # --- 저장/로드 ---
+
+    def save(self, artifact_dir: str = None) -> str:
+        artifact_dir = artifact_dir or ARTIFACT_DIR
+        os.makedirs(artifact_dir, exist_ok=True)
+        path = os.path.join(artifact_dir, AFFINITY_FILE)
+        meta_path = os.path.join(artifact_dir, AFFINITY_META_FILE)
+        meta = {
+            "dongs": self.dongs, "stores": self.stores, "store_names": self.store_names.tolist(),
+            "shape": list(self.ratios.shape), "versions": self.versions,
+        }
+        # 배열 → 메타데이터 순으로 교체 (읽는 쪽은 메타데이터의 shape 로 짝이 맞는지 확인)
+        with open(f"{path}.tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(self.ratios, dtype=np.float32))
+        os.replace(f"{path}.tmp", path)
+        with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(f"{meta_path}.tmp", meta_path)
+        return path
+
+    @classmethod
+    def load(cls, artifact_dir: str = None, mmap_mode: str = "r"):
+        artifact_dir = artifact_dir or ARTIFACT_DIR
+        path = os.path.join(artifact_dir, AFFINITY_FILE)
+        meta_path = os.path.join(artifact_dir, AFFINITY_META_FILE)
+        if not os.path.exists(path) or not os.path.exists(meta_path):
+            return None
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        ratios = np.load(path, mmap_mode=mmap_mode)
+        if list(ratios.shape) != meta["shape"]:
+            print(f"Store affinity metadata does not match array ({list(ratios.shape)} != {meta['shape']}).")
+            return None
+        return cls(ratios, meta["dongs"], meta["stores"], meta["store_names"], meta.get("versions"))
+
+
+def load_ratios(source) -> pd.DataFrame:
+    """DEPT_HOME_RATIO / DEPT_WORK_RATIO 를 쿼리 한 번으로 읽습니다 (없으면 원본 비율 테이블)."""
+    try:
+        return source.query(AFFINITY_QUERY)
+    except Exception as e:
+        print(f"DEPT_*_RATIO tables unavailable ({e}); reading {RATIO_TABLE} instead.")
+        return source.query(AFFINITY_FALLBACK_QUERY)
+
+
+_affinity = None
+_affinity_lock = threading.Lock()
+
+
+def get_affinity():
+    """프로세스 공유 affinity 배열 (처음 호출 때 메모리 매핑). 아직 만들지 않았으면 None."""
+    global _affinity
+    if _affinity is None:
+        with _affinity_lock:
+            if _affinity is None:
+                _affinity = StoreAffinity.load()
+    return _affinity
+
+
+def refresh_affinity(table_versions: dict = None, source=None, save: bool = True):
+    """
+    affinity 배열을 다시 만들어 교체합니다. table_versions 가 저장된 버전과 같으면 기존 배열을 그대로 씁니다.
+    """
+    global _affinity
+    from snowflake_data_setting.catalog import get_catalog
+    from snowflake_data_setting.data_sources import get_data_source
+
+    with _affinity_lock:
+        current = _affinity or StoreAffinity.load()
+        versions = {table: str(version) for table, version in (table_versions or {}).items()}
+        if current is not None and versions and current.versions == versions:
+            _affinity = current
+            return current
+
+        source = source or get_data_source()
+        if not source.is_connected:
+            source.connect()
+        df = load_ratios(source)
+        if df.empty:
+            # 조회 실패(또는 데이터 없음)를 굳히지 않음 → 다음 갱신 때 다시 시도
+            print("Skipping store affinity rebuild: no ratio rows returned.")
+            return current
+
+        affinity = StoreAffinity.from_ratios(df, get_catalog(), versions)
+        if save:
+            affinity.save()
+            # 저장한 파일을 메모리 매핑으로 다시 열어 프로세스 간 페이지 캐시를 공유
+            affinity = StoreAffinity.load() or affinity
+        print(f"Built store affinity: {len(affinity.dongs)} dongs x {len(affinity.stores)} stores.")
+        _affinity = affinity
+        return affinity
+
+
+if __name__ == "__main__":
+    # 비율 테이블 갱신 후 배치 작업: python store_affinity.py
+    from snowflake_data_setting.data_sources import get_data_source
+
+    source = get_data_source()
+    source.connect()
+    refresh_affinity(source.table_versions(AFFINITY_TABLES + (RATIO_TABLE,)), source=source)
@@ -0,0 +1,77 @@
+import os
+import sys
+
+# 저장소 루트의 평면 모듈(model, prediction_grid, ...)과 snowflake_data_setting 패키지를 import 하기 위함
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from segment_options import AGE_OPTIONS, CUSTOMER_TYPE_OPTIONS, GENDER_OPTIONS
+
+
+def synthetic_cubes(seed=0):
+    """입력 폼 선택지로 만든 작은 방문/지출 집계 데이터 (DEP_STORE_FEATURE_CUBE / SALES_DISTRICT_FEATURE_CUBE 모양)."""
+    from snowflake_data_setting.catalog import STORE_METADATA
+
+    rng = np.random.default_rng(seed)
+    keys = pd.MultiIndex.from_product(
+        [AGE_OPTIONS, GENDER_OPTIONS, ["00~06", "12~18"], ["주중", "주말"], CUSTOMER_TYPE_OPTIONS],
+        names=["AGE_GROUP", "GENDER", "TIME_SLOT", "WEEKDAY_WEEKEND", "LIFESTYLE"],
+    ).to_frame(index=False)
+    dep = keys.merge(pd.DataFrame({"DEP_NAME": list(STORE_METADATA)}), how="cross")
+    dep["ROW_COUNT"] = rng.integers(1, 20, len(dep))
+    sales = keys.merge(pd.DataFrame({"CARD_TYPE": [1, 2]}), how="cross")
+    sales["ROW_COUNT"] = rng.integers(1, 20, len(sales))
+    sales["SALES_SUM"] = sales["ROW_COUNT"] * rng.gamma(2.0, 100_000, len(sales))
+    sales["SALES_SUM_SQ"] = sales["SALES_SUM"] ** 2 / sales["ROW_COUNT"]
+    return dep, sales
+
+
+@pytest.fixture(scope="session")
+def trained_predictor():
+    """합성 집계 데이터로 학습한 DepartmentStorePredictor (기본 엔진, 카탈로그는 기본 목록)."""
+    from model import DepartmentStorePredictor
+    from snowflake_data_setting import catalog as catalog_module
+    from snowflake_data_setting.catalog import Catalog
+
+    saved, catalog_module._catalog = catalog_module._catalog, Catalog()
+    try:
+        predictor = DepartmentStorePredictor(train=False)
+        assert predictor.fit(*synthetic_cubes())
+        predictor.release_training_data()
+    finally:
+        catalog_module._catalog = saved
+    return predictor
+
+
+def user_inputs():
+    """입력 폼의 모든 (성별, 연령대, 고객 형태) 조합 (거주지/직장은 모델 피처가 아님)."""
+    return [{"gender": g, "age": a, "type": t, "residence": "여의도동", "work": "반포동"}
+            for g in GENDER_OPTIONS for a in AGE_OPTIONS for t in CUSTOMER_TYPE_OPTIONS]
+
+
+# 위치 기반 점수 테스트용 LOPLAT 비율 (동 3개 × 백화점 2개, 일부 조합은 비율 없음)
+RATIOS = pd.DataFrame({
+    "ADDR_LV3": ["가동", "가동", "나동", "나동", "다동", "가동"],
+    "LOC_TYPE": [1, 1, 1, 2, 2, 2],
+    "DEP_NAME": ["더현대서울", "신세계_강남", "더현대서울", "더현대서울", "신세계_강남", "신세계_강남"],
+    "RATIO": [0.5, 0.2, 0.3, 0.4, 0.6, 0.1],
+})
+
+
+@pytest.fixture
+def local_source(tmp_path, monkeypatch):
+    """RATIOS 를 읽는 로컬 DuckDB 데이터 소스를 프로세스 공유 데이터 소스로 사용."""
+    from snowflake_data_setting import catalog as catalog_module
+    from snowflake_data_setting import data_sources
+    from snowflake_data_setting.catalog import RATIO_TABLE, Catalog
+    from snowflake_data_setting.data_sources import LocalDataSource
+
+    RATIOS.to_parquet(tmp_path / f"{RATIO_TABLE}.parquet")
+    source = LocalDataSource(str(tmp_path))
+    source.connect()
+    monkeypatch.setattr(data_sources, "_source", source)
+    monkeypatch.setattr(catalog_module, "_catalog", Catalog(["가동", "나동", "다동"], ["더현대서울", "신세계_강남"]))
+    return source
@@ -0,0 +1,64 @@
+import threading
+import time
+
+import pytest
+
+from snowflake_data_setting import catalog as catalog_module
+from snowflake_data_setting.catalog import DEFAULT_DONGS, Catalog, get_catalog
+
+
+@pytest.fixture
+def fresh_catalog(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog_module, "CATALOG_PATH", str(tmp_path / "catalog.json"))
+    monkeypatch.setattr(catalog_module, "_catalog", None)
+    monkeypatch.setattr(catalog_module, "_failed_at", None)
+    monkeypatch.setattr(catalog_module, "_builder", None)
+    release = threading.Event()
+
+    def slow_build(source=None, table_versions=None):
+        release.wait(5) # DB 연결 + 조회
+        return Catalog(["가동", "나동", "다동"], ["더현대서울"])
+
+    monkeypatch.setattr(catalog_module, "build_catalog", slow_build)
+    return release
+
+
+def test_render_path_does_not_wait_for_the_build(fresh_catalog):
+    started = time.perf_counter()
+    assert get_catalog(wait=False).dongs == sorted(DEFAULT_DONGS)
+    # 백그라운드 스레드가 잠금을 잡고 만드는 중에도 기다리지 않음
+    assert get_catalog(wait=False).dongs == sorted(DEFAULT_DONGS)
+    assert time.perf_counter() - started < 1
+
+    fresh_catalog.set()
+    catalog_module._builder.join(5)
+    assert get_catalog(wait=False).dongs == ["가동", "나동", "다동"]
+    assert Catalog.load().dongs == ["가동", "나동", "다동"] # 다음 프로세스는 디스크에서 바로 읽음
+
+
+def test_saved_catalog_is_read_without_a_build(fresh_catalog):
+    Catalog(["라동"], ["더현대서울"]).save()
+    assert get_catalog(wait=False).dongs == ["라동"]
+    assert catalog_module._builder is None
+
+
+def test_store_districts_follow_the_source_tables(tmp_path):
+    import pandas as pd
+
+    from snowflake_data_setting.catalog import RATIO_TABLE, build_catalog
+    from snowflake_data_setting.data_sources import LocalDataSource
+
+    pd.DataFrame({
+        "ADDR_LV3": ["가동", "나동", "가동", "나동", "다동"],
+        "LOC_TYPE": [2, 2, 1, 2, 2],
+        "DEP_NAME": ["새백화점", "새백화점", "새백화점", "더현대서울", "더현대서울"],
+        "RATIO": [0.2, 0.5, 0.9, 0.7, 0.1],
+    }).to_parquet(tmp_path / f"{RATIO_TABLE}.parquet")
+    pd.DataFrame({"DONG": ["라동"], "AVG_DEPARTMENT_STORE_SALES": [1.0]}).to_parquet(tmp_path / "DONG_FEATURES.parquet")
+    pd.DataFrame({"DEP_NAME": ["새백화점"]}).to_parquet(tmp_path / "DEP_STORE_DATA.parquet")
+
+    built = build_catalog(LocalDataSource(str(tmp_path)))
+    # 메타데이터에 없는 매장은 직장 비율이 가장 높은 동, 메타데이터에 있는 매장은 메타데이터의 동
+    assert built.store_districts == {"새백화점": "나동", "더현대서울": "여의도동"}
+    assert built.districts == ["나동", "여의도동"]
+    assert Catalog.from_dict(built.to_dict()).store_districts == built.store_districts
@@ -0,0 +1,93 @@
+import pytest
+
+from snowflake_data_setting.connection_pool import ConnectionPool, PoolTimeout
+from snowflake_data_setting.data_sources import SnowflakeDataSource
+
+
+class FakeCursor:
+    def __init__(self):
+        self.closed = False
+
+    def execute(self, sql, params=None):
+        pass
+
+    def fetch_arrow_batches(self):
+        for i in range(3):
+            yield i
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    def __init__(self):
+        self.connection = self
+        self.cursors = []
+
+    def cursor(self):
+        self.cursors.append(FakeCursor())
+        return self.cursors[-1]
+
+    def close(self):
+        pass
+
+
+def make_pool(max_size=1, health_checks=None):
+    return ConnectionPool(
+        factory=FakeSession,
+        health_check=(lambda conn: health_checks.append(conn)) if health_checks is not None else None,
+        min_size=1, max_size=max_size, idle_timeout=3600, checkout_timeout=0.2,
+    )
+
+
+def test_connection_checked_in_after_clean_exit_and_error():
+    pool = make_pool()
+    with pool.connection():
+        pass
+    with pytest.raises(ValueError):
+        with pool.connection():
+            raise ValueError("query failed")
+    metrics = pool.metrics()
+    assert metrics["in_use"] == 0 and metrics["idle"] == 1
+
+
+def test_abandoned_batch_generator_returns_connection():
+    # 소비자가 배치 제너레이터를 중간에 버리면(GeneratorExit) 연결이 반납되어야 함
+    health_checks = []
+    pool = make_pool(max_size=1, health_checks=health_checks)
+    source = SnowflakeDataSource()
+    source.pool = pool
+    source.mode = "env"
+
+    batches = source.iter_arrow_batches("SELECT 1")
+    assert next(batches) == 0
+    assert pool.metrics()["in_use"] == 1
+    batches.close()
+
+    metrics = pool.metrics()
+    assert metrics["in_use"] == 0 and metrics["idle"] == 1 and metrics["size"] == 1
+    # 중간에 끊긴 연결은 다음 checkout 때 health check 를 거침
+    with pool.connection() as session:
+        assert session.cursors[0].closed
+    assert len(health_checks) == 1
+
+
+def test_exhausted_pool_times_out():
+    pool = make_pool(max_size=1)
+    conn = pool.checkout()
+    with pytest.raises(PoolTimeout):
+        pool.checkout()
+    pool.checkin(conn)
+    assert pool.metrics()["timeouts"] == 1
+
+
+def test_suspect_idle_connections_are_reaped():
+    pool = ConnectionPool(factory=FakeSession, health_check=lambda conn: None,
+                          min_size=1, max_size=2, idle_timeout=0, checkout_timeout=0.2)
+    first, second = pool.checkout(), pool.checkout()
+    pool.checkin(first, suspect=True)
+    pool.checkin(second, suspect=True)
+    pool.reap_idle()
+    metrics = pool.metrics()
+    assert metrics["size"] == 1 and metrics["reaped"] == 1
+    pool.close()
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+from feature_encoder import CategoricalEncoder
+
+FEATURES = ["AGE_GROUP", "GENDER", "TIME_SLOT", "WEEKDAY_WEEKEND", "LIFESTYLE"]
+
+
+def _raw_rows(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    raw = pd.DataFrame({
+        "AGE_GROUP": rng.choice([20, 30, 40, 50, 60], n),
+        "GENDER": rng.choice(["M", "F"], n),
+        "TIME_SLOT": rng.choice(["T1", "T2", "T3", "T4"], n),
+        "WEEKDAY_WEEKEND": rng.choice(["W", "H"], n),
+        "LIFESTYLE": rng.choice(["L01", "L02", "L03"], n),
+    })
+    # 피처에 약하게 의존하는 라벨/매출 (셀 안에서도 값이 갈림)
+    raw["DEP_NAME"] = np.where(rng.random(n) < 0.3 + 0.2 * (raw["GENDER"] == "F"), "A", rng.choice(["B", "C"], n))
+    raw["SALES"] = rng.gamma(2.0, 1000 + 10 * raw["AGE_GROUP"].to_numpy(), n).round()
+    return raw
+
+
+def test_store_cube_matches_raw_rows():
+    # 집계 셀을 행 수 가중치로 학습하면 원본 행으로 학습한 것과 같은 트리 (bootstrap 없이 비교)
+    raw = _raw_rows()
+    cube = raw.groupby(FEATURES + ["DEP_NAME"], as_index=False).size().rename(columns={"size": "ROW_COUNT"})
+    encoder = CategoricalEncoder().fit([raw], FEATURES)
+
+    params = {"n_estimators": 10, "bootstrap": False, "random_state": 0}
+    raw_model = RandomForestClassifier(**params).fit(encoder.transform(raw, FEATURES), raw["DEP_NAME"])
+    cube_model = RandomForestClassifier(**params).fit(
+        encoder.transform(cube, FEATURES), cube["DEP_NAME"], sample_weight=cube["ROW_COUNT"].astype(float)
+    )
+
+    X = encoder.transform(cube, FEATURES)
+    np.testing.assert_allclose(cube_model.predict_proba(X), raw_model.predict_proba(X), atol=1e-9)
+
+
+def test_spending_cube_matches_raw_rows():
+    # 셀 평균 매출을 행 수 가중치로 학습 = 원본 행 학습 (제곱오차 기준에서 셀 내부 분산은 분할과 무관)
+    raw = _raw_rows(seed=1)
+    cube = raw.groupby(FEATURES, as_index=False).agg(ROW_COUNT=("SALES", "size"), SALES_SUM=("SALES", "sum"))
+    encoder = CategoricalEncoder().fit([raw], FEATURES)
+
+    params = {"n_estimators": 5, "bootstrap": False, "max_features": 2, "random_state": 0}
+    raw_model = RandomForestRegressor(**params).fit(encoder.transform(raw, FEATURES), raw["SALES"])
+    weights = cube["ROW_COUNT"].astype(float)
+    cube_model = RandomForestRegressor(**params).fit(
+        encoder.transform(cube, FEATURES), cube["SALES_SUM"] / weights, sample_weight=weights
+    )
+
+    X = encoder.transform(cube, FEATURES)
+    np.testing.assert_allclose(cube_model.predict(X), raw_model.predict(X), rtol=1e-9)
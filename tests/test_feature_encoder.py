@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from feature_encoder import UNKNOWN_CODE, CategoricalEncoder
+
+COLUMNS = ["AGE_GROUP", "GENDER"]
+
+
+def _frames():
+    dep = pd.DataFrame({"AGE_GROUP": [20, 30, 40, 30], "GENDER": ["M", "F", "F", "M"]})
+    # 다른 백엔드에서 읽은 프레임: 같은 코드가 문자열/실수(결측 포함)로 들어옴
+    sales = pd.DataFrame({"AGE_GROUP": ["30", "50", None], "GENDER": pd.Categorical(["F", "M", "F"])})
+    return dep, sales
+
+
+def test_mixed_dtypes_share_one_vocabulary():
+    dep, sales = _frames()
+    encoder = CategoricalEncoder().fit([dep, sales], COLUMNS)
+    assert encoder.vocabularies["AGE_GROUP"].tolist() == ["20", "30", "40", "50"]
+
+    codes = encoder.transform(pd.DataFrame({"AGE_GROUP": [30.0, np.nan, 50.0], "GENDER": ["F", "F", "M"]}), COLUMNS)
+    assert codes[:, 0].tolist() == [2, UNKNOWN_CODE, 4]
+    assert encoder.transform(dep, ["AGE_GROUP"])[:, 0].tolist() == [1, 2, 3, 2]
+    assert encoder.transform(sales, ["AGE_GROUP"])[:, 0].tolist() == [2, 4, UNKNOWN_CODE]
+    assert encoder.encode_value("AGE_GROUP", 30) == encoder.encode_value("AGE_GROUP", "30") == 2
+
+
+def test_unknown_values_get_code_zero():
+    dep, sales = _frames()
+    encoder = CategoricalEncoder().fit([dep, sales], COLUMNS)
+    data = pd.DataFrame({"AGE_GROUP": [70, 20], "GENDER": pd.Categorical(["X", "M"])})
+    assert encoder.transform(data, COLUMNS).tolist() == [[UNKNOWN_CODE, UNKNOWN_CODE], [1, 2]]
+    assert encoder.transform_row({"AGE_GROUP": 70, "GENDER": "F"}, COLUMNS) == [UNKNOWN_CODE, 1]
+    assert encoder.unknown_values({"AGE_GROUP": 70, "GENDER": "F"}, COLUMNS) == [("AGE_GROUP", 70)]
+
+
+def test_round_trip_keeps_codes():
+    dep, sales = _frames()
+    encoder = CategoricalEncoder().fit([dep, sales], COLUMNS)
+    restored = CategoricalEncoder.from_dict(encoder.to_dict())
+    np.testing.assert_array_equal(restored.transform(dep, COLUMNS), encoder.transform(dep, COLUMNS))
+    np.testing.assert_array_equal(restored.transform(sales, COLUMNS), encoder.transform(sales, COLUMNS))
+
+
+def test_saved_vocabulary_order_is_kept():
+    # 이전 아티팩트의 어휘(숫자, 숫자 순 정렬)도 같은 코드로 읽혀야 함
+    encoder = CategoricalEncoder.from_dict({"AGE_GROUP": [20, 30, 100]})
+    assert encoder.transform_row({"AGE_GROUP": 100}, ["AGE_GROUP"]) == [3]
+    assert encoder.transform(pd.DataFrame({"AGE_GROUP": ["100", 20]}), ["AGE_GROUP"])[:, 0].tolist() == [3, 1]
+
+
+def test_numeric_columns_keep_numeric_order():
+    frames = [pd.DataFrame({"CARD_TYPE": [20, 100]}), pd.DataFrame({"CARD_TYPE": ["3", 20.0]})]
+    encoder = CategoricalEncoder().fit(frames, ["CARD_TYPE"])
+    assert encoder.vocabularies["CARD_TYPE"].tolist() == ["3", "20", "100"]
+    assert encoder.transform_row({"CARD_TYPE": 100}, ["CARD_TYPE"]) == [3]
+
+    labels = CategoricalEncoder().fit([pd.DataFrame({"AGE_GROUP": ["30대", "20대", "100"]})], ["AGE_GROUP"])
+    assert labels.vocabularies["AGE_GROUP"].tolist() == ["100", "20대", "30대"]
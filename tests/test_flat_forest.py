@@ -0,0 +1,31 @@
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+from flat_forest import FlatForest
+
+
+def _data(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.integers(0, 8, size=(n, 5)).astype(np.int32) # CategoricalEncoder 코드
+    y_class = np.array(["A", "B", "C"])[(X[:, 0] + X[:, 1] + rng.integers(0, 3, n)) % 3]
+    y_value = X[:, 2] * 1000 + rng.normal(0, 100, n)
+    weights = rng.integers(1, 5, n).astype(np.float64)
+    return X, y_class, y_value, weights
+
+
+def test_classifier_matches_sklearn_bit_for_bit():
+    X, y, _, weights = _data()
+    forest = RandomForestClassifier(n_estimators=20, random_state=42).fit(X, y, sample_weight=weights)
+    flat = FlatForest.from_sklearn(forest)
+    # 학습에 없던 코드(9)까지 포함
+    X_test = np.vstack([X[:100], np.full((3, 5), 9, dtype=np.int32)])
+    assert np.array_equal(flat.predict_proba(X_test), forest.predict_proba(X_test))
+    assert np.array_equal(flat.predict(X_test), forest.predict(X_test))
+    assert np.array_equal(flat.classes_, forest.classes_)
+
+
+def test_regressor_matches_sklearn_bit_for_bit():
+    X, _, y, weights = _data(seed=1)
+    forest = RandomForestRegressor(n_estimators=20, random_state=42).fit(X, y, sample_weight=weights)
+    flat = FlatForest.from_sklearn(forest)
+    assert np.array_equal(flat.predict(X), forest.predict(X))
@@ -0,0 +1,70 @@
+import threading
+
+import pytest
+
+from conftest import user_inputs
+from inference_batcher import MicroBatcher
+
+
+def test_batched_predictions_equal_predict(trained_predictor):
+    batcher = MicroBatcher(max_batch_size=16, max_wait_ms=20)
+    inputs = user_inputs()
+    results = {}
+
+    def run(i):
+        results[i] = batcher.predict(trained_predictor, inputs[i], timeout=10)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(inputs))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    for i, user_input in enumerate(inputs):
+        assert results[i] == trained_predictor.predict(user_input)
+    stats = batcher.stats()
+    assert stats["requests"] == len(inputs) and stats["batches"] < len(inputs) # 여러 요청이 한 배치로 묶임
+
+
+class FailingPredictor:
+    def predict_many(self, user_inputs):
+        raise ValueError("inference failed")
+
+
+def test_batch_error_reaches_every_request():
+    batcher = MicroBatcher(max_batch_size=8, max_wait_ms=200)
+    futures = [batcher.submit(FailingPredictor(), {"i": i}) for i in range(3)]
+    for future in futures:
+        with pytest.raises(ValueError, match="inference failed"):
+            future.result(5)
+    assert batcher.stats()["errors"] >= 1
+
+
+class BlockingPredictor:
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def predict_many(self, user_inputs):
+        self.started.set()
+        self.release.wait(5)
+        return [{"batched": user_input} for user_input in user_inputs]
+
+    def predict(self, user_input):
+        return {"direct": user_input}
+
+
+def test_full_queue_falls_back_to_direct_predict():
+    predictor = BlockingPredictor()
+    batcher = MicroBatcher(max_batch_size=1, max_wait_ms=0, max_queue=1)
+    first = batcher.submit(predictor, 1)
+    assert predictor.started.wait(5) # 배치 스레드가 첫 요청을 처리하는 중
+    second = batcher.submit(predictor, 2) # 대기열을 채움
+
+    # 대기열이 가득 차면 기다리지 않고 바로 predict
+    assert batcher.predict(predictor, 3) == {"direct": 3}
+    assert batcher.stats()["overflows"] == 1
+
+    predictor.release.set()
+    assert first.result(5) == {"batched": 1}
+    assert second.result(5) == {"batched": 2}
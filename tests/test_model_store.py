@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+import model_store
+from conftest import user_inputs
+from model_store import (current_version, load_compiled, load_predictor, promote_version, read_metadata,
+                         save_predictor)
+
+
+def _batch(predictor):
+    segments = pd.DataFrame(user_inputs())
+    return pd.concat(predictor.predict_batch(segments), ignore_index=True)
+
+
+def test_save_promote_load_round_trip(trained_predictor, tmp_path):
+    path = save_predictor(trained_predictor, str(tmp_path))
+    version = current_version(str(tmp_path))
+    assert version is not None and version in path
+    assert read_metadata(str(tmp_path))["data_fingerprint"] == trained_predictor.data_fingerprint
+
+    loaded = load_predictor(str(tmp_path), prefer_compiled=False)
+    assert loaded.data_fingerprint == trained_predictor.data_fingerprint
+    pd.testing.assert_frame_equal(_batch(loaded), _batch(trained_predictor))
+    for user_input in user_inputs()[:5]:
+        assert loaded.predict(user_input) == trained_predictor.predict(user_input)
+
+
+def test_unpromoted_version_is_not_served_until_promoted(trained_predictor, tmp_path):
+    save_predictor(trained_predictor, str(tmp_path))
+    first = current_version(str(tmp_path))
+    trained_predictor.data_fingerprint, fingerprint = "f" * 64, trained_predictor.data_fingerprint
+    try:
+        path = save_predictor(trained_predictor, str(tmp_path), promote=False)
+    finally:
+        trained_predictor.data_fingerprint = fingerprint
+    assert current_version(str(tmp_path)) == first
+    second = path.split("/versions/")[1].split("/")[0]
+    promote_version(str(tmp_path), second)
+    assert read_metadata(str(tmp_path))["data_fingerprint"] == "f" * 64
+
+
+def test_version_mismatch_is_rejected(trained_predictor, tmp_path, monkeypatch):
+    save_predictor(trained_predictor, str(tmp_path))
+    monkeypatch.setattr(model_store, "MODEL_VERSION", model_store.MODEL_VERSION + 1)
+    assert load_compiled(str(tmp_path)) is None
+    assert load_predictor(str(tmp_path)) is None
+
+
+def test_memory_mapped_compiled_model_matches_in_memory(trained_predictor, tmp_path):
+    save_predictor(trained_predictor, str(tmp_path))
+    compiled = load_compiled(str(tmp_path), mmap_mode="r")
+    forest = compiled.store_model.compiled
+    assert isinstance(forest.feature.base, np.memmap) or isinstance(forest.feature, np.memmap)
+    assert not forest.threshold.flags.writeable
+    pd.testing.assert_frame_equal(_batch(compiled), _batch(trained_predictor))
+    # load_predictor 는 같은 학습 결과의 펼친 포레스트 파일을 먼저 사용
+    assert load_predictor(str(tmp_path)).store_model.compiled is not None
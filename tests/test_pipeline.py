@@ -0,0 +1,110 @@
+import re
+
+import pandas as pd
+import pytest
+
+from snowflake_data_setting import pipeline
+from snowflake_data_setting.pipeline import STATE_TABLE, STEPS, run, select_steps
+
+
+class FakeWarehouse:
+    """
+    파이프라인이 보내는 SQL 중 지문 조회/상태 테이블만 흉내 내는 가짜 데이터 소스.
+    원천 테이블은 {원천 테이블: {월: (행 수, 해시)}} 로 표현하고, 대상 테이블에 실행된 적재 문장을 기록합니다.
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.state = {} # (단계, 월 문자열) → (행 수, 해시)
+        self.loads = [] # (대상 테이블, 문장 종류, 월 목록)
+
+    def query(self, sql, params=None):
+        if STATE_TABLE in sql:
+            rows = [(key, *fp) for (step, key), fp in self.state.items() if step == params[0]]
+            return pd.DataFrame(rows, columns=["PARTITION_VALUE", "ROW_COUNT", "CONTENT_HASH"])
+        table = re.search(r"FROM (\S+)", sql).group(1)
+        partitions = self.raw[table]
+        if "GROUP BY" not in sql:
+            # 차원 테이블: 전체 지문 하나
+            rows = [("*", sum(r for r, _ in partitions.values()), hash(tuple(sorted(partitions.items()))))]
+        else:
+            rows = [(month, r, h) for month, (r, h) in partitions.items()]
+        return pd.DataFrame(rows, columns=["PARTITION_VALUE", "ROW_COUNT", "CONTENT_HASH"])
+
+    def execute(self, statements, transactional=True):
+        for sql, params in statements:
+            if sql.startswith(f"DELETE FROM {STATE_TABLE}"):
+                step, months = params[0], params[1:]
+                for key in [k for k in self.state if k[0] == step and (not months or k[1] in months)]:
+                    del self.state[key]
+            elif sql.startswith(f"INSERT INTO {STATE_TABLE}"):
+                for i in range(0, len(params), 4):
+                    step, key, row_count, content_hash = params[i:i + 4]
+                    self.state[(step, key)] = (row_count, content_hash)
+            elif sql.startswith("CREATE OR REPLACE TABLE"):
+                self.loads.append((sql.split()[4], "rebuild", []))
+            elif sql.startswith("INSERT INTO"):
+                self.loads.append((sql.split()[2], "insert", list(params)))
+
+
+def _raw():
+    months = {202401: (100, 11), 202402: (120, 12)}
+    raw = {step.fingerprint_source: dict(months) for step in STEPS if step.partitioned}
+    raw.update({step.fingerprint_source: {"*": (10, 1)} for step in STEPS if not step.partitioned})
+    return raw
+
+
+@pytest.fixture
+def warehouse(monkeypatch):
+    monkeypatch.setattr(pipeline, "print_plan", lambda plans: None)
+    return FakeWarehouse(_raw())
+
+
+def test_rerun_without_changes_is_a_no_op(warehouse):
+    assert run(source=warehouse) == [step.name for step in STEPS]
+    warehouse.loads.clear()
+    assert run(source=warehouse) == []
+    assert warehouse.loads == []
+
+
+def test_changed_month_reloads_only_that_month(warehouse):
+    run(source=warehouse)
+    warehouse.loads.clear()
+    sales_source = f"{pipeline.GRANDATA}.CARD_SALES_INFO"
+    warehouse.raw[sales_source][202402] = (130, 99)
+
+    changed = run(source=warehouse)
+    assert changed == ["SEOUL_CARD_SALES_DATA", "SALES_KOR_LABELING", "SALES_DISTRICT_FEATURE_CUBE"]
+    assert all(kind == "insert" and months == [202402] for _, kind, months in warehouse.loads)
+
+    warehouse.loads.clear()
+    assert run(source=warehouse) == []
+
+
+def test_removed_month_is_deleted_and_forgotten(warehouse):
+    run(source=warehouse)
+    source = pipeline.STEPS[0].fingerprint_source
+    del warehouse.raw[source][202401]
+
+    assert run(source=warehouse) == ["DEP_STORE_DATA", "DEP_STORE_FEATURE_CUBE"]
+    assert ("DEP_STORE_DATA", "202401") not in warehouse.state
+    assert run(source=warehouse) == []
+
+
+def test_selected_step_pulls_in_upstream_steps():
+    names = [step.name for step in select_steps(["SALES_DISTRICT_FEATURE_CUBE"])]
+    assert names == ["SEOUL_CARD_SALES_DATA", "REGION_DATA", "CARD_CODE_DATA", "SALES_KOR_LABELING",
+                     "SALES_DISTRICT_FEATURE_CUBE"]
+    with pytest.raises(ValueError):
+        select_steps(["NO_SUCH_STEP"])
+
+
+def test_dimension_change_rebuilds_downstream_even_with_steps(warehouse):
+    run(source=warehouse)
+    warehouse.loads.clear()
+    warehouse.raw[f"{pipeline.GRANDATA}.M_SCCO_MST"]["*"] = (11, 2)
+
+    changed = run(step_names=["SALES_DISTRICT_FEATURE_CUBE"], source=warehouse)
+    assert changed == ["REGION_DATA", "SALES_KOR_LABELING", "SALES_DISTRICT_FEATURE_CUBE"]
+    assert all(kind == "rebuild" for _, kind, _ in warehouse.loads)
+    assert run(step_names=["SALES_DISTRICT_FEATURE_CUBE"], source=warehouse) == []
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+import prediction_grid
+from conftest import user_inputs
+from prediction_grid import PredictionGrid, refresh_grid
+from snowflake_data_setting import catalog as catalog_module
+from snowflake_data_setting.catalog import Catalog
+
+DONGS = ["가동", "나동", "다동"]
+
+
+def _assert_matches_predict(grid, predictor):
+    for user_input in user_inputs():
+        expected = predictor.predict(user_input)
+        got = grid.lookup_ml(user_input)
+        assert got["spending"] == expected["spending"]
+        # 그리드는 확률을 float32 로 보관
+        assert got["store_predictions"] == {
+            store: float(np.float32(p)) for store, p in expected["store_predictions"].items()}
+
+
+def test_grid_lookup_equals_predict_for_every_cell(trained_predictor, tmp_path):
+    grid = PredictionGrid(dongs=DONGS)
+    grid.build_model_section(trained_predictor)
+    _assert_matches_predict(grid, trained_predictor)
+    assert grid.lookup_ml({"gender": "기타", "age": "20대", "type": "싱글"}) is None
+
+    loaded = PredictionGrid.load(grid.save(str(tmp_path / "grid.npz")))
+    _assert_matches_predict(loaded, trained_predictor)
+
+
+@pytest.fixture
+def isolated_grid(tmp_path, monkeypatch):
+    monkeypatch.setattr(prediction_grid, "ARTIFACT_DIR", str(tmp_path))
+    monkeypatch.setattr(prediction_grid, "_grid", None)
+    monkeypatch.setattr(catalog_module, "_catalog", Catalog(DONGS))
+
+
+def test_refresh_rebuilds_only_changed_sections(trained_predictor, isolated_grid):
+    calls = []
+
+    def spending(dongs):
+        calls.append(list(dongs))
+        return {dong: 1000 * len(calls) for dong in dongs}
+
+    grid = refresh_grid(trained_predictor, {"DONG_FEATURES": "v1"}, spending_fn=spending)
+    assert grid.lookup_spending("나동") == 1000 and len(calls) == 1
+
+    # 버전이 같으면 다시 조회하지 않고, 바뀌면 해당 섹션만 다시 계산
+    refresh_grid(trained_predictor, {"DONG_FEATURES": "v1"}, spending_fn=spending)
+    assert len(calls) == 1
+    grid = refresh_grid(trained_predictor, {"DONG_FEATURES": "v2"}, spending_fn=spending)
+    assert grid.lookup_spending("나동") == 2000 and len(calls) == 2
+    _assert_matches_predict(grid, trained_predictor)
+    # 새 프로세스는 저장된 그리드를 그대로 사용
+    assert PredictionGrid.load().has_section("estimated_spending", "v2")
@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+import predictor_registry
+from predictor_registry import PredictorRegistry
+
+
+class FakePredictor:
+    is_initialized = True
+    trained_at = 1.0
+
+    def __init__(self, name):
+        self.data_fingerprint = name
+
+
+@pytest.fixture
+def registry(monkeypatch, tmp_path):
+    monkeypatch.setattr(predictor_registry, "RELOAD_SECONDS", 0) # 감시 스레드 없이
+    return PredictorRegistry(str(tmp_path))
+
+
+def test_start_wait_and_swap(registry, monkeypatch):
+    release = threading.Event()
+
+    def load_or_train(artifact_dir, retrain=False):
+        release.wait(5)
+        return FakePredictor("first")
+
+    monkeypatch.setattr(predictor_registry, "load_or_train", load_or_train)
+    assert registry.start()
+    assert not registry.start() # 이미 실행 중
+    assert registry.get() is None and registry.status()["state"] == "loading"
+
+    release.set()
+    first = registry.wait(5)
+    assert first.data_fingerprint == "first" and registry.status()["state"] == "ready"
+
+    # 교체 전에 받은 참조는 그대로 유효하고, 이후 get() 은 새 모델
+    held = registry.get()
+    registry.swap(FakePredictor("second"), "v2")
+    assert held is first
+    assert registry.get().data_fingerprint == "second"
+    assert registry.status()["model_version"] == "v2"
+
+
+def test_failed_warm_up_backs_off_until_retry(registry, monkeypatch):
+    attempts = []
+
+    def failing(artifact_dir, retrain=False):
+        attempts.append(1)
+        raise RuntimeError("warehouse unavailable")
+
+    monkeypatch.setattr(predictor_registry, "load_or_train", failing)
+    monkeypatch.setattr(predictor_registry, "RETRY_SECONDS", 3600)
+    assert registry.start()
+    registry.wait(5)
+    status = registry.status()
+    assert status["state"] == "failed" and "warehouse" in status["error"] and status["retry_at"] is not None
+
+    # 페이지가 다시 그려져도 대기 시간 안에는 다시 시작하지 않음
+    assert not registry.start()
+    assert len(attempts) == 1
+
+    # 사용자가 직접 다시 시도하면 바로 시작하고, 성공하면 실패 기록이 지워짐
+    monkeypatch.setattr(predictor_registry, "load_or_train", lambda artifact_dir, retrain=False: FakePredictor("ok"))
+    assert registry.retry()
+    assert registry.wait(5).data_fingerprint == "ok"
+    status = registry.status()
+    assert status["state"] == "ready" and status["error"] is None and status["retry_at"] is None
+
+
+def test_restart_allowed_after_backoff(registry, monkeypatch):
+    def failing(artifact_dir, retrain=False):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(predictor_registry, "load_or_train", failing)
+    monkeypatch.setattr(predictor_registry, "RETRY_SECONDS", 0)
+    assert registry.start()
+    registry.wait(5)
+    assert registry.start()
+    registry.wait(5)
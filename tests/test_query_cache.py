@@ -0,0 +1,64 @@
+import pandas as pd
+
+from snowflake_data_setting.query_cache import QueryCache, cached_query, uncached
+
+
+def test_failed_lookup_is_not_cached():
+    cache = QueryCache(version_check_seconds=0)
+    calls = []
+
+    @cached_query("estimated_spending", cache=cache)
+    def lookup(dong):
+        calls.append(dong)
+        return uncached(0) if len(calls) == 1 else 100
+
+    assert lookup("반포동") == 0
+    assert lookup("반포동") == 100
+    assert lookup("반포동") == 100
+    assert len(calls) == 2
+
+
+def test_table_version_change_drops_entries():
+    # 다른 프로세스가 테이블을 갱신한 경우: 버전 확인으로 이 프로세스의 결과가 버려짐
+    versions = {"DONG_FEATURES": "1"}
+    cache = QueryCache(version_check_seconds=60)
+    cache.check_table_versions(lambda tables: dict(versions), force=True)
+    values = iter([pd.DataFrame({"v": [1]}), pd.DataFrame({"v": [2]})])
+
+    @cached_query("estimated_spending", cache=cache)
+    def lookup():
+        return next(values)
+
+    assert lookup()["v"][0] == 1
+    assert lookup()["v"][0] == 1
+    versions["DONG_FEATURES"] = "2"
+    assert not cache.check_table_versions(lambda tables: dict(versions))  # 확인 간격 전에는 확인하지 않음
+    assert cache.check_table_versions(lambda tables: dict(versions), force=True)
+    assert lookup()["v"][0] == 2
+
+
+def test_version_check_failure_keeps_versions():
+    cache = QueryCache(version_check_seconds=60)
+    cache.check_table_versions(lambda tables: {"DONG_FEATURES": "1"}, force=True)
+    before = cache.data_version("estimated_spending")
+
+    def fail(tables):
+        raise RuntimeError("backend down")
+
+    assert not cache.check_table_versions(fail, force=True)
+    assert not cache.check_table_versions(lambda tables: {}, force=True)
+    assert cache.data_version("estimated_spending") == before
+
+
+def test_estimate_size_counts_container_contents():
+    import pandas as pd
+
+    from snowflake_data_setting.query_cache import estimate_size
+
+    small = {"반포동": 1}
+    large = {f"테스트{i:03d}동": i * 1000 for i in range(400)}
+    assert estimate_size(large) > 20 * estimate_size(small)
+    frame = pd.DataFrame({"V": range(10_000)})
+    assert estimate_size({"a": frame}) > estimate_size(frame)
+    shared = ["x" * 1000]
+    assert estimate_size([shared, shared]) < 2 * estimate_size(shared) + 100
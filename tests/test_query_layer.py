@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pandas as pd
+
+from snowflake_data_setting.query_layer import PreparedQuery
+
+
+class SlowSource:
+    """execute_prepared 가 동시에 몇 개까지 실행되는지 기록하는 가짜 데이터 소스."""
+
+    def __init__(self):
+        self.prepared = 0
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, sql, params=None):
+        self.prepared += 1
+        return sql
+
+    def execute_prepared(self, handle, params=None):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.05)
+        with self._lock:
+            self.running -= 1
+        return pd.DataFrame({"V": [params[0]]})
+
+
+def test_same_query_runs_concurrently_and_compiles_once():
+    source = SlowSource()
+    query = PreparedQuery("estimated_spending", "SELECT ? AS V")
+    results = {}
+
+    def run(i):
+        results[i] = query.run([i], source=source)["V"][0]
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {i: i for i in range(8)}
+    assert source.prepared == 1
+    assert source.max_running > 1
+    assert query.stats()["execute_count"] == 8
+
+
+def test_local_source_runs_each_call_on_its_own_cursor(tmp_path):
+    from snowflake_data_setting.data_sources import LocalDataSource
+
+    pd.DataFrame({"DONG": ["반포동", "역삼동"], "V": [1, 2]}).to_parquet(tmp_path / "DONG_FEATURES.parquet")
+    source = LocalDataSource(str(tmp_path))
+    query = PreparedQuery("estimated_spending", "SELECT V FROM DONG_FEATURES WHERE DONG = ?")
+    results = {}
+
+    def run(dong):
+        results[dong] = int(query.run([dong], source=source)["V"][0])
+
+    threads = [threading.Thread(target=run, args=(dong,)) for dong in ("반포동", "역삼동") * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {"반포동": 1, "역삼동": 2}
+    assert query.stats()["errors"] == 0
+
+
+class ServerTimedSource(SlowSource):
+    """prepare 가 SQL 텍스트만 보관하고 시간은 서버 쿼리 기록에서 읽는 (Snowflake 같은) 가짜 데이터 소스."""
+
+    compiles_on_prepare = False
+
+    def __init__(self):
+        super().__init__()
+        self.history = {}
+        self.next_id = 0
+
+    def execute_prepared(self, handle, params=None):
+        df = pd.DataFrame({"V": [params[0]]})
+        self.next_id += 1
+        df.attrs["query_id"] = f"q{self.next_id}"
+        return df
+
+    def server_timings(self, query_ids):
+        return {query_id: self.history[query_id] for query_id in query_ids if query_id in self.history}
+
+
+def test_server_timings_replace_client_compile_time():
+    source = ServerTimedSource()
+    query = PreparedQuery("store_scores", "SELECT ? AS V")
+    query.run([1], source=source)
+    query.run([2], source=source)
+
+    # 서버 기록이 아직 없는 쿼리는 다음 수집 때 다시 확인
+    source.history["q1"] = (4.0, 10.0)
+    assert query.collect_server_timings() == 1
+    source.history["q2"] = (2.0, 20.0)
+    assert query.collect_server_timings() == 1
+
+    stats = query.stats()
+    assert stats["compile_count"] is None and stats["compile_ms_total"] is None
+    assert stats["server_timed"] == 2
+    assert stats["server_compile_ms_avg"] == 3.0 and stats["server_execute_ms_avg"] == 15.0
@@ -0,0 +1,47 @@
+from retrain_scheduler import changed_partitions, new_partitions, should_promote
+
+PREVIOUS = {"DEP_STORE_DATA": {"202401": 10, "202402": 10}, "SALES_KOR_LABELING": {"202401": 5}}
+
+
+def test_only_new_partitions_form_unseen_holdout():
+    signature = {"DEP_STORE_DATA": {"202401": 10, "202402": 12, "202403": 4},
+                 "SALES_KOR_LABELING": {"202401": 6}}
+    changes = changed_partitions(signature, PREVIOUS)
+    assert ("DEP_STORE_DATA", "202402", "changed") in changes
+    assert new_partitions(changes, PREVIOUS) == {"store": ["202403"], "spending": []}
+
+
+def test_changed_partitions_do_not_gate_promotion():
+    candidate = {"store_logloss": 2.0, "spend_rmse": 2.0}
+    serving = {"store_logloss": 1.0, "spend_rmse": 1.0}
+    # 행 수만 바뀐 월뿐이면 unseen 이 아니므로 후보가 나빠 보여도 승격 (기록만 함)
+    promote, reason = should_promote(candidate, serving, {"store": False, "spending": False})
+    assert promote and "no unseen holdout" in reason
+    promote, _ = should_promote(candidate, serving, {"store": True, "spending": False})
+    assert not promote
+
+
+def test_non_finite_scores_are_rejected():
+    nan = float("nan")
+    candidate = {"store_logloss": 1.0, "spend_rmse": nan}
+    serving = {"store_logloss": 1.0, "spend_rmse": nan}
+    promote, reason = should_promote(candidate, serving, {"store": True, "spending": True})
+    assert not promote and "spend_rmse" in reason
+
+
+def test_empty_new_partition_holdout_falls_back():
+    import numpy as np
+    import pandas as pd
+
+    from model_evaluation import partition_holdout, split_cells
+
+    df = pd.DataFrame({"STANDARD_YEAR_MONTH": ["202401"] * 5 + ["202402"],
+                       "AGE_GROUP": list("abcdef"), "ROW_COUNT": [1] * 6,
+                       "SALES_SUM": [1.0] * 6, "SALES_SUM_SQ": [1.0] * 6})
+
+    class NoHoldout:
+        # 새 월의 셀 하나가 모두 학습 쪽으로 간 경우
+        def random(self, n):
+            return np.ones(n)
+
+    assert partition_holdout(df, ["202402"], 0.2, NoHoldout(), split_cells) is None
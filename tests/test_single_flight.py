@@ -0,0 +1,61 @@
+import threading
+import time
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def _run_concurrently(flight, key, func, n=8):
+    results, errors = [], []
+    start = threading.Barrier(n)
+
+    def worker():
+        start.wait()
+        try:
+            results.append(flight.do(key, func))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results, errors
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test")
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2) # 나머지 호출이 모두 들어올 때까지 실행 중 유지
+        return object()
+
+    results, errors = _run_concurrently(flight, "key", compute)
+    assert not errors
+    assert len(calls) == 1
+    assert len(results) == 8 and all(result is results[0] for result in results)
+    stats = flight.stats()
+    assert stats["executions"] == 1 and stats["shared"] == 7 and stats["in_flight"] == 0
+
+    # 끝난 뒤의 호출은 새로 실행
+    flight.do("key", compute)
+    assert len(calls) == 2
+
+
+def test_waiters_receive_the_same_error():
+    flight = SingleFlight("test")
+
+    def fail():
+        time.sleep(0.2)
+        raise ValueError("boom")
+
+    results, errors = _run_concurrently(flight, "key", fail)
+    assert not results and len(errors) == 8
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert flight.stats()["errors"] == 1
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
@@ -0,0 +1,28 @@
+from snowflake_data_setting import query_cache
+from snowflake_data_setting.catalog import get_catalog
+from snowflake_data_setting.snowpark_queries import get_store_score
+from store_affinity import StoreAffinity, load_ratios
+
+
+def _rows(df):
+    # affinity 는 float32 로 보관하므로 소수 5자리까지 비교 (같은 점수의 순서는 구분하지 않음)
+    return sorted((name, round(score, 5)) for name, score in zip(df["DEP_NAME"], df["score"]))
+
+
+def test_lookup_matches_store_score_query(local_source, tmp_path):
+    query_cache.invalidate("store_score")
+    affinity = StoreAffinity.from_ratios(load_ratios(local_source), get_catalog())
+    affinity.save(str(tmp_path))
+    loaded = StoreAffinity.load(str(tmp_path)) # 메모리 매핑한 배열
+    try:
+        for res in affinity.dongs:
+            for work in affinity.dongs:
+                for weights in ((None, None), (0.9, 0.1)):
+                    expected = get_store_score(res, work, *weights)
+                    for table in (affinity, loaded):
+                        got = table.lookup(res, work, *weights)
+                        assert _rows(got) == _rows(expected)
+                        assert list(got["score"]) == sorted(got["score"], reverse=True)
+    finally:
+        query_cache.invalidate("store_score")
+    assert affinity.lookup("없는동", "가동") is None
@@ -0,0 +1,33 @@
+from conftest import RATIOS
+from snowflake_data_setting import query_layer
+from snowflake_data_setting.catalog import Catalog
+from snowflake_data_setting.snowpark_queries import _query_store_scores
+
+def _expected(pairs, home_weight=0.6, work_weight=0.4):
+    names = Catalog(["가동"], ["더현대서울", "신세계_강남"]).store_names
+    rows = []
+    for res, work in dict.fromkeys(pairs):
+        home = RATIOS[(RATIOS.LOC_TYPE == 1) & (RATIOS.ADDR_LV3 == res)].set_index("DEP_NAME").RATIO
+        office = RATIOS[(RATIOS.LOC_TYPE == 2) & (RATIOS.ADDR_LV3 == work)].set_index("DEP_NAME").RATIO
+        for store in sorted(set(home.index) | set(office.index)):
+            score = home.get(store, 0) * home_weight + office.get(store, 0) * work_weight
+            rows.append((res, work, names[store], round(score, 9)))
+    return sorted(rows)
+
+
+def test_padded_query_shapes_return_the_same_scores(local_source, monkeypatch):
+    monkeypatch.setattr(query_layer, "_queries", {})
+    dongs = ["가동", "나동", "다동"]
+    all_pairs = [(res, work) for res in dongs for work in dongs]
+    for n in (1, 2, 3, 5, 9):
+        pairs = all_pairs[:n]
+        df = _query_store_scores(pairs, 0.6, 0.4)
+        got = sorted((r.RES_DONG, r.WORK_DONG, r.DEP_NAME, round(r.score, 9)) for r in df.itertuples(index=False))
+        assert got == _expected(pairs)
+    # 쌍 개수 1, 2, 3~4, 5~8, 9~16 → 쿼리 모양 5개 (이름 매핑 2개 → 2)
+    assert sorted(key[0] for key in query_layer._queries) == [
+        "store_scores[16x2]", "store_scores[1x2]", "store_scores[2x2]", "store_scores[4x2]", "store_scores[8x2]"]
+
+    _query_store_scores(all_pairs[:6], 0.6, 0.4)
+    _query_store_scores(all_pairs[:7], 0.6, 0.4)
+    assert len(query_layer._queries) == 5
@@ -0,0 +1,180 @@
+"""
+요청 단위 추적(span)과 단계별 지연 시간 통계.
+
+    with span("sql.query", query=name) as s:
+        df = ...
+        s.set(rows=len(df))
+
+- span 은 contextvars 로 부모/자식 관계와 trace_id 를 이어 받습니다. 스레드 풀로 넘길 때는
+  contextvars.copy_context().run 으로 실행해야 같은 trace 로 묶입니다 (analysis_tasks.run_calls 참고).
+- 끝난 span 은 단계(이름)별 최근 TRACE_WINDOW 개의 소요 시간으로 p50/p95/p99 를 계산하고 (stage_stats),
+  최근 TRACE_RECENT 개는 그대로 보관합니다 (recent_spans). 진단 페이지(pages/Diagnostics.py)가 이 값을 보여줍니다.
+- TRACE_LOG_PATH 를 지정하면 span 하나당 JSON 한 줄로 파일에 추가 기록합니다 (외부 도구로 분석용).
+"""
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+TRACE_WINDOW = int(os.getenv("TRACE_WINDOW", "2048")) # 단계별 백분위 계산에 쓰는 최근 표본 수
+TRACE_RECENT = int(os.getenv("TRACE_RECENT", "500")) # 진단 페이지에 보여줄 최근 span 수
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH") # 지정하면 JSON lines 로 내보냄
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "1") != "0"
+
+_current = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "started_at", "seconds", "status", "attrs")
+
+    def __init__(self, name, trace_id, parent_id=None, attrs=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.started_at = time.time()
+        self.seconds = 0.0
+        self.status = "ok"
+        self.attrs = attrs or {}
+
+    def set(self, **attrs):
+        """행 수, 바이트 수, 쿼리 ID 같은 속성을 추가합니다."""
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name, "trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+            "started_at": self.started_at, "ms": self.seconds * 1000, "status": self.status, **self.attrs,
+        }
+
+
+class _NullSpan:
+    # 추적을 끈 경우(TRACING_ENABLED=0) 호출 측 코드를 바꾸지 않도록 아무것도 하지 않는 span
+    def set(self, **attrs):
+        pass
+
+
+class TraceRecorder:
+    """끝난 span 을 모아 단계별 지연 시간 창(window)과 최근 span 목록을 유지합니다."""
+
+    def __init__(self, window: int = TRACE_WINDOW, recent: int = TRACE_RECENT, log_path: str = TRACE_LOG_PATH):
+        self.window = window
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self._samples = {} # 단계 → deque(ms)
+        self._counts = {} # 단계 → (전체 횟수, 오류 횟수)
+        self._recent = deque(maxlen=recent)
+        self._log_file = None
+
+    def record(self, span: Span):
+        ms = span.seconds * 1000
+        with self._lock:
+            samples = self._samples.get(span.name)
+            if samples is None:
+                samples = self._samples[span.name] = deque(maxlen=self.window)
+            samples.append(ms)
+            count, errors = self._counts.get(span.name, (0, 0))
+            self._counts[span.name] = (count + 1, errors + (span.status != "ok"))
+            self._recent.append(span)
+            if self.log_path:
+                self._write(span)
+
+    def _write(self, span: Span):
+        try:
+            if self._log_file is None:
+                os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+                self._log_file = open(self.log_path, "a", encoding="utf-8", buffering=1)
+            self._log_file.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+        except OSError as e:
+            # 기록 실패가 요청을 막지 않도록 내보내기만 끔
+            print(f"Trace export to {self.log_path} failed, disabling: {e}")
+            self.log_path = None
+
+    def stage_stats(self) -> pd.DataFrame:
+        """단계별 호출 수/오류 수와 최근 창의 p50/p95/p99/최대 (ms)."""
+        with self._lock:
+            snapshot = {name: (np.array(samples), self._counts[name]) for name, samples in self._samples.items()}
+        rows = []
+        for name, (samples, (count, errors)) in sorted(snapshot.items()):
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            rows.append({
+                "stage": name, "count": count, "errors": errors, "window": len(samples),
+                "p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "max_ms": samples.max(),
+            })
+        return pd.DataFrame(rows, columns=["stage", "count", "errors", "window", "p50_ms", "p95_ms", "p99_ms", "max_ms"])
+
+    def recent_spans(self, limit: int = None) -> list:
+        with self._lock:
+            spans = list(self._recent)
+        return [s.to_dict() for s in spans[-limit:]] if limit else [s.to_dict() for s in spans]
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._recent.clear()
+
+
+recorder = TraceRecorder()
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    name 단계의 소요 시간을 기록합니다. 안에서 예외가 나면 status="error" 로 기록하고 예외는 그대로 전달합니다.
+    바깥 span 이 없으면 새 trace 를 시작합니다.
+    """
+    if not TRACING_ENABLED:
+        yield _NullSpan()
+        return
+
+    parent = _current.get()
+    current = Span(name, parent.trace_id if parent else uuid.uuid4().hex[:16], parent.span_id if parent else None, attrs)
+    token = _current.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.attrs["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.seconds = time.perf_counter() - started
+        _current.reset(token)
+        recorder.record(current)
+
+
+def traced(name: str):
+    """함수 전체를 name 단계 span 으로 기록하는 데코레이터."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span():
+    """지금 열려 있는 span (없으면 속성 설정을 무시하는 빈 span)."""
+    return _current.get() or _NullSpan()
+
+
+def stage_stats() -> pd.DataFrame:
+    return recorder.stage_stats()
+
+
+def recent_spans(limit: int = None) -> list:
+    return recorder.recent_spans(limit)
+
+
+def reset():
+    recorder.reset()
@@ -0,0 +1,110 @@
+"""
+모델 학습 데이터 스트리밍 적재.
+
+DataSource.iter_arrow_batches 로 결과를 Arrow 배치 단위로 받아, 도착하는 대로
+- 키(피처) 컬럼은 사전 인코딩(category) 컬럼으로,
+- 값 컬럼(행 수, 매출 합계 등)은 float64 로
+바꾼 뒤 키 기준 합계로 주기적으로 압축합니다. 메모리 사용량은 memory_budget 안으로 유지되므로
+여러 해의 원본 행을 집계해야 하는 경우에도 작은 워커에서 적재할 수 있습니다.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pandas.api.types import union_categoricals
+
+from tracing import span
+
+# 학습 데이터 적재 메모리 상한 (기본 256MB)
+MEMORY_BUDGET_BYTES = int(float(os.getenv("TRAINING_MEMORY_BUDGET_MB", "256")) * 1024 * 1024)
+BATCH_ROWS = int(os.getenv("TRAINING_BATCH_ROWS", "100000"))
+
+
+class MemoryBudgetExceeded(MemoryError):
+    """키 기준으로 압축한 뒤에도 결과가 메모리 상한을 넘음 (키 조합이 너무 많음)."""
+
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def batch_to_frame(batch, keys) -> pd.DataFrame:
+    # Arrow 단계에서 문자열 키는 사전 인코딩, 숫자 값(Snowflake NUMBER → decimal 포함)은 float64 로 변환
+    table = pa.Table.from_batches([batch]) if isinstance(batch, pa.RecordBatch) else batch
+    columns = []
+    for name in table.column_names:
+        column = table[name]
+        if name in keys:
+            if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+                column = column.dictionary_encode()
+        elif not pa.types.is_floating(column.type):
+            column = column.cast(pa.float64())
+        columns.append(column)
+    df = pa.table(columns, names=table.column_names).to_pandas()
+    for key in keys:
+        if not isinstance(df[key].dtype, pd.CategoricalDtype):
+            df[key] = df[key].astype("category")
+    return df
+
+
+def concat_frames(frames, keys) -> pd.DataFrame:
+    # 배치마다 category 목록이 다르므로 union_categoricals 로 합쳐 category 를 유지
+    if len(frames) == 1:
+        return frames[0]
+    data = {}
+    for col in frames[0].columns:
+        if col in keys:
+            data[col] = union_categoricals([f[col] for f in frames], ignore_order=True)
+        else:
+            data[col] = np.concatenate([f[col].to_numpy() for f in frames])
+    return pd.DataFrame(data)
+
+
+def compact(frames, keys) -> pd.DataFrame:
+    df = concat_frames(frames, keys)
+    return df.groupby(keys, observed=True, sort=False, dropna=False).sum().reset_index()
+
+
+def load_aggregated(source, sql: str, keys, params=None, memory_budget: int = None,
+                    batch_rows: int = None) -> pd.DataFrame:
+    """
+    sql 결과(키 컬럼 + 합산 가능한 값 컬럼)를 스트리밍으로 읽어 키별 합계 DataFrame 을 반환합니다.
+    키 컬럼은 category dtype 입니다. 결과가 없으면 빈 DataFrame 을 반환합니다.
+    """
+    with span("sql.stream", keys=",".join(keys)) as current:
+        result, rows, batches, peak_bytes = _stream_aggregated(source, sql, keys, params, memory_budget, batch_rows)
+        current.set(rows=rows, batches=batches, bytes=peak_bytes)
+    return result
+
+
+def _stream_aggregated(source, sql, keys, params, memory_budget, batch_rows):
+    budget = memory_budget or MEMORY_BUDGET_BYTES
+    keys = list(keys)
+    frames, pending_bytes, peak_bytes = [], 0, 0
+    rows = batches = 0
+
+    for batch in source.iter_arrow_batches(sql, params, batch_rows or BATCH_ROWS):
+        if batch.num_rows == 0:
+            continue
+        frame = batch_to_frame(batch, keys)
+        frames.append(frame)
+        rows += len(frame)
+        batches += 1
+        pending_bytes += frame_bytes(frame)
+        peak_bytes = max(peak_bytes, pending_bytes)
+        # 압축 중에는 입력과 결과가 동시에 메모리에 있으므로 상한의 절반에서 압축
+        if pending_bytes > budget // 2:
+            frames = [compact(frames, keys)]
+            pending_bytes = frame_bytes(frames[0])
+            if pending_bytes > budget // 2:
+                raise MemoryBudgetExceeded(
+                    f"집계 결과({pending_bytes / 1e6:.1f}MB)가 학습 데이터 메모리 상한({budget / 1e6:.1f}MB)을 넘습니다."
+                )
+
+    if not frames:
+        return pd.DataFrame(), rows, batches, peak_bytes
+    result = compact(frames, keys)
+    print(f"Streamed {rows} rows in {batches} batches -> {len(result)} rows "
+          f"(peak ~{peak_bytes / 1e6:.1f}MB, budget {budget / 1e6:.1f}MB).")
+    return result, rows, batches, peak_bytes